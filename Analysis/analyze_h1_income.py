@@ -1,46 +1,46 @@
-import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
-import os
 import statsmodels.api as sm
+import render_pool
+from datasets import AnalysisContext
 
-def analyze_income_impact():
-    
-    # load data
-    # Don't change where anything is in the file path, it's already correct
-    # Use absolute path or correct relative path depending on execution context
-    # Assuming execution from project root
-    if os.path.exists('Data/processed/master_dataset_powerbi.csv'):
-        df = pd.read_csv('Data/processed/master_dataset_powerbi.csv')
-    else:
-        # Fallback to relative path if run from inside Analysis/
-        df = pd.read_csv('../Data/processed/master_dataset_powerbi.csv')
-    output_dir = 'visuals'
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # filter for valid data
-    df_clean = df.dropna(subset=['Median_Household_Income', 'Alt_Housing_Growth_Pct_Capped'])
-    
+# master dataset columns this hypothesis uses
+COLUMNS = ['Median_Household_Income', 'Alt_Housing_Growth_Pct_Capped', 'Income_Band']
+
+def plot_income_scatter(path, df):
     # this scatter plot with trend line
     plt.figure(figsize=(10, 6))
-    sns.regplot(data=df_clean, x='Median_Household_Income', y='Alt_Housing_Growth_Pct_Capped', 
+    sns.regplot(data=df, x='Median_Household_Income', y='Alt_Housing_Growth_Pct_Capped', 
                 scatter_kws={'alpha':0.3}, line_kws={'color':'red'})
     plt.title('Impact of Median Household Income on Alternative Housing Growth')
     plt.xlabel('Median Household Income ($)')
     plt.ylabel('Alt Housing Growth (%)')
     plt.grid(True, alpha=0.3)
-    plt.savefig(f'{output_dir}/H1_Income_Scatter.png')
+    plt.savefig(path)
     plt.close()
-    
+
+def plot_income_boxplot(path, df):
     # box plot by income band
+    plt.figure(figsize=(10, 6))
+    order = ['Low', 'Medium-Low', 'Medium-High', 'High']
+    sns.boxplot(data=df, x='Income_Band', y='Alt_Housing_Growth_Pct_Capped', order=order)
+    plt.title('Alternative Housing Growth Distribution by Income Level')
+    plt.savefig(path)
+    plt.close()
+
+def figure_jobs(ctx=None, output_dir='visuals'):
+    ctx = ctx or AnalysisContext(COLUMNS)
+    
+    # filter for valid data
+    df_clean = ctx.view(COLUMNS, dropna=['Median_Household_Income', 'Alt_Housing_Growth_Pct_Capped'])
+    
+    jobs = [render_pool.job(plot_income_scatter, f'{output_dir}/H1_Income_Scatter.png', df=df_clean)]
     if 'Income_Band' in df_clean.columns:
-        plt.figure(figsize=(10, 6))
-        order = ['Low', 'Medium-Low', 'Medium-High', 'High']
-        sns.boxplot(data=df_clean, x='Income_Band', y='Alt_Housing_Growth_Pct_Capped', order=order)
-        plt.title('Alternative Housing Growth Distribution by Income Level')
-        plt.savefig(f'{output_dir}/H1_Income_Boxplot.png')
-        plt.close()
+        jobs.append(render_pool.job(plot_income_boxplot, f'{output_dir}/H1_Income_Boxplot.png', df=df_clean))
+    return jobs
+
+def analyze_income_impact(ctx=None, workers=1):
+    return render_pool.render(figure_jobs(ctx), workers)
 
 if __name__ == "__main__":
     analyze_income_impact()
-
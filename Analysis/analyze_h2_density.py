@@ -1,44 +1,47 @@
-import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
-import os
 import statsmodels.api as sm
 import numpy as np
+import render_pool
+from datasets import AnalysisContext
 
-def analyze_density_impact():
-    
-    # load data
-    # Don't change where anything is in the file path, it's already correct
-    if os.path.exists('Data/processed/master_dataset_powerbi.csv'):
-        df = pd.read_csv('Data/processed/master_dataset_powerbi.csv')
-    else:
-        df = pd.read_csv('../Data/processed/master_dataset_powerbi.csv')
-    output_dir = 'visuals'
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # filter for valid data
-    df_clean = df.dropna(subset=['Population_Density', 'Alt_Housing_Growth_Pct_Capped'])
-    
+# master dataset columns this hypothesis uses
+COLUMNS = ['Population_Density', 'Alt_Housing_Growth_Pct_Capped', 'Density_Category']
+
+def plot_density_scatter(path, df):
     # scatter plot log scale for density due to skew
     plt.figure(figsize=(10, 6))
-    sns.scatterplot(data=df_clean, x='Population_Density', y='Alt_Housing_Growth_Pct_Capped', alpha=0.4)
+    sns.scatterplot(data=df, x='Population_Density', y='Alt_Housing_Growth_Pct_Capped', alpha=0.4)
     plt.xscale('log')
     plt.title('Impact of Population Density on Alt Housing Growth (Log Scale)')
     plt.xlabel('Population Density (People/Sq Mile) - Log Scale')
     plt.ylabel('Alt Housing Growth (%)')
     plt.grid(True, alpha=0.3)
-    plt.savefig(f'{output_dir}/H2_Density_Scatter.png')
+    plt.savefig(path)
     plt.close()
-    
+
+def plot_density_bar(path, df):
     # bar chart by density category
+    plt.figure(figsize=(10, 6))
+    order = ['Rural', 'Low-Density', 'Medium-Density', 'Urban']
+    sns.barplot(data=df, x='Density_Category', y='Alt_Housing_Growth_Pct_Capped', order=order, estimator=np.mean)
+    plt.title('Average Alternative Housing Growth by Density Category')
+    plt.savefig(path)
+    plt.close()
+
+def figure_jobs(ctx=None, output_dir='visuals'):
+    ctx = ctx or AnalysisContext(COLUMNS)
+    
+    # filter for valid data
+    df_clean = ctx.view(COLUMNS, dropna=['Population_Density', 'Alt_Housing_Growth_Pct_Capped'])
+    
+    jobs = [render_pool.job(plot_density_scatter, f'{output_dir}/H2_Density_Scatter.png', df=df_clean)]
     if 'Density_Category' in df_clean.columns:
-        plt.figure(figsize=(10, 6))
-        order = ['Rural', 'Low-Density', 'Medium-Density', 'Urban']
-        sns.barplot(data=df_clean, x='Density_Category', y='Alt_Housing_Growth_Pct_Capped', order=order, estimator=np.mean)
-        plt.title('Average Alternative Housing Growth by Density Category')
-        plt.savefig(f'{output_dir}/H2_Density_Bar.png')
-        plt.close()
+        jobs.append(render_pool.job(plot_density_bar, f'{output_dir}/H2_Density_Bar.png', df=df_clean))
+    return jobs
+
+def analyze_density_impact(ctx=None, workers=1):
+    return render_pool.render(figure_jobs(ctx), workers)
 
 if __name__ == "__main__":
     analyze_density_impact()
-
@@ -1,24 +1,9 @@
-import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
-import os
+import render_pool
+from datasets import AnalysisContext
 
-def analyze_pricing():
-    
-    # load data
-    # Don't change where anything is in the file path, it's already correct
-    if os.path.exists('Data/processed/rvshare_classb_amenities.csv'):
-        input_file = 'Data/processed/rvshare_classb_amenities.csv'
-    else:
-        input_file = '../Data/processed/rvshare_classb_amenities.csv'
-    if not os.path.exists(input_file):
-        print("Run finalize_rvshare_data.py first")
-        return
-
-    df = pd.read_csv(input_file)
-    output_dir = 'visuals'
-    os.makedirs(output_dir, exist_ok=True)
-    
+def plot_price_vs_amenities(path, df):
     # 1. price vs amenity count
     plt.figure(figsize=(10, 6))
     sns.regplot(data=df, x='Amenity Count', y='Nightly Price', 
@@ -26,18 +11,35 @@ def analyze_pricing():
     plt.title('Impact of Amenity Count on Nightly Rental Price')
     plt.xlabel('Total Amenities')
     plt.ylabel('Nightly Price ($)')
-    plt.savefig(f'{output_dir}/RV_Price_vs_Amenities.png')
+    plt.savefig(path)
     plt.close()
-    
+
+def plot_bathroom_premium(path, df):
     # 2. bathroom premium
     plt.figure(figsize=(8, 6))
     sns.barplot(data=df, x='Has Bathroom', y='Nightly Price', palette='Blues')
     plt.title('Price Premium for Having a Bathroom')
     plt.xticks([0, 1], ['No Bathroom', 'Has Bathroom'])
     plt.ylabel('Avg Nightly Price ($)')
-    plt.savefig(f'{output_dir}/RV_Bathroom_Premium.png')
+    plt.savefig(path)
     plt.close()
 
+def figure_jobs(ctx=None, output_dir='visuals'):
+    ctx = ctx or AnalysisContext()
+    
+    # load data
+    df = ctx.view(['Amenity Count', 'Nightly Price', 'Has Bathroom'], dataset='amenities')
+    if df is None:
+        print("Run finalize_rvshare_data.py first")
+        return []
+
+    return [
+        render_pool.job(plot_price_vs_amenities, f'{output_dir}/RV_Price_vs_Amenities.png', df=df),
+        render_pool.job(plot_bathroom_premium, f'{output_dir}/RV_Bathroom_Premium.png', df=df),
+    ]
+
+def analyze_pricing(ctx=None, workers=1):
+    return render_pool.render(figure_jobs(ctx), workers)
+
 if __name__ == "__main__":
     analyze_pricing()
-
@@ -0,0 +1,115 @@
+"""
+Dataset loading for the analysis scripts
+Works no matter which folder a script is started from (repo root, Analysis/ or
+Analysis/regression/) and reads the typed master dataset through src/master_store.py
+
+AnalysisContext is what run_analysis_pipeline hands to every analyze_* function
+so each dataset is read once and the dropna'd views are built once
+"""
+
+import os
+import sys
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+import master_store
+
+MASTER_FILE = os.path.join(ROOT, 'Data', 'processed', 'master_dataset.parquet')
+MASTER_CSV = os.path.join(ROOT, 'Data', 'processed', 'master_dataset_powerbi.csv')
+AMENITIES_FILE = os.path.join(ROOT, 'Data', 'processed', 'rvshare_classb_amenities.csv')
+
+
+def load_master(columns=None):
+    """Master county dataset, only `columns` if given (see master_store.read_master)"""
+    return master_store.read_master(columns=columns, path=MASTER_FILE, csv_path=MASTER_CSV)
+
+
+def load_amenities():
+    """RVshare amenity/price table (None if finalize_rvshare_data.py hasnt been run)"""
+    if not os.path.exists(AMENITIES_FILE):
+        return None
+    return pd.read_csv(AMENITIES_FILE)
+
+
+class AnalysisContext:
+    """
+    Datasets shared by the analysis scripts
+
+    - the master dataset is read once, the first time it is needed; columns
+      asked for later that weren't part of that read are topped up, never reread
+    - the amenity table is read once
+    - view(columns, dropna) results are memoized on (dataset, columns, dropna),
+      callers must treat them as read only (copy before adding columns)
+
+    Args:
+        columns: master columns to read on first use (None = all of them)
+    """
+
+    def __init__(self, columns=None):
+        self.columns = None if columns is None else list(dict.fromkeys(columns))
+        self._master = None
+        self._master_complete = False  # every column of the file is loaded
+        self._missing = set()  # asked for but not in the file
+        self._amenities = None
+        self._amenities_loaded = False
+        self._views = {}
+        self.disk_reads = 0
+
+    def master(self, columns=None):
+        """Master dataset with at least `columns` (all columns if None)"""
+        if self._master_complete:
+            return self._master
+        if columns is None or (self._master is None and self.columns is None):
+            self._master = load_master()
+            self._master_complete = True
+            self.disk_reads += 1
+            return self._master
+        if self._master is None:
+            # first use, read everything this context was set up for in one go
+            columns = self.columns + [c for c in columns if c not in self.columns]
+
+        loaded = set() if self._master is None else set(self._master.columns)
+        wanted = [c for c in columns if c not in loaded and c not in self._missing]
+        if wanted:
+            df = load_master(columns=wanted)
+            self.disk_reads += 1
+            self._missing.update(c for c in wanted if c not in df.columns)
+            # same file, same row order, so new columns line up with the loaded ones
+            self._master = df if self._master is None else pd.concat([self._master, df], axis=1)
+        return self._master
+
+    def amenities(self):
+        """RVshare amenity table (None if missing)"""
+        if not self._amenities_loaded:
+            self._amenities = load_amenities()
+            self._amenities_loaded = True
+            self.disk_reads += 1
+        return self._amenities
+
+    def view(self, columns, dropna=None, dataset='master'):
+        """
+        Column subset with rows missing any `dropna` column removed (memoized)
+
+        Args:
+            columns: columns wanted (ones the dataset doesnt have are left out)
+            dropna: columns that must be present for a row to stay
+            dataset: 'master' or 'amenities'
+
+        Returns:
+            DataFrame, or None if the dataset doesnt exist
+        """
+        key = (dataset, tuple(columns), tuple(dropna or ()))
+        if key in self._views:
+            return self._views[key]
+
+        df = self.master(columns) if dataset == 'master' else self.amenities()
+        if df is None:
+            return None
+        df = df[[c for c in columns if c in df.columns]]
+        if dropna:
+            df = df.dropna(subset=dropna)
+        self._views[key] = df
+        return df
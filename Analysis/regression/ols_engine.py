@@ -0,0 +1,139 @@
+"""
+OLS Engine
+Closed form regressions from sufficient statistics instead of one sm.OLS fit per model
+- every simple regression y ~ x_j is fit in one vectorized pass from the
+  pairwise complete counts, means and cross products (each predictor keeps
+  every row where it and y are present, same as dropna per model)
+- VIF for all predictors at once from the inverse of their correlation matrix
+- results match statsmodels (see benchmarks/bench_ols_engine.py)
+
+    fits = ols_engine.simple_regressions(df, ['Median_Household_Income', 'Avg_Temp_F'], 'Alt_Housing_Growth_Pct_Capped')
+    fits.loc['Avg_Temp_F', 'p_value']
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+
+def pairwise_moments(X, y):
+    """
+    Sufficient statistics for y ~ x_j over the rows where both are present
+
+    Args:
+        X: (n, k) float array, NaN = missing
+        y: (n,) float array, NaN = missing
+
+    Returns:
+        dict of (k,) arrays: n, x_mean, y_mean, sxx, syy, sxy
+        (sxx / syy / sxy are centered sums of squares and cross products)
+    """
+    X = np.asarray(X, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    if X.ndim == 1:
+        X = X[:, None]
+
+    mask = ~np.isnan(X) & ~np.isnan(y)[:, None]
+    n = mask.sum(axis=0)
+
+    # shift by the overall means first so the sums stay small (big incomes /
+    # home values squared lose digits otherwise), shifting doesnt change the fit
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # all NaN column, its n is 0 anyway
+        x0 = np.nan_to_num(np.nanmean(X, axis=0)) if X.size else np.zeros(X.shape[1])
+        y0 = np.nan_to_num(np.nanmean(y)) if y.size else 0.0
+    xz = np.where(mask, X - x0, 0.0)
+    yz = np.where(mask, (y - y0)[:, None], 0.0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        dx = xz.sum(axis=0) / n
+        dy = yz.sum(axis=0) / n
+        sxx = np.einsum('ij,ij->j', xz, xz) - n * dx * dx
+        syy = np.einsum('ij,ij->j', yz, yz) - n * dy * dy
+        sxy = np.einsum('ij,ij->j', xz, yz) - n * dx * dy
+
+    return {'n': n, 'x_mean': x0 + dx, 'y_mean': y0 + dy, 'sxx': sxx, 'syy': syy, 'sxy': sxy}
+
+
+def fit_from_moments(m):
+    """
+    Slope, intercept, R², standard errors and p-values from pairwise_moments output
+
+    Returns:
+        dict of (k,) arrays (NaN where there are fewer than 3 rows or x is constant)
+    """
+    n = m['n'].astype('float64')
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slope = m['sxy'] / m['sxx']
+        intercept = m['y_mean'] - slope * m['x_mean']
+        ssr = np.maximum(m['syy'] - slope * m['sxy'], 0.0)  # residual sum of squares
+        df_resid = n - 2
+        sigma2 = ssr / df_resid
+        std_err = np.sqrt(sigma2 / m['sxx'])
+        intercept_se = np.sqrt(sigma2 * (1 / n + m['x_mean'] ** 2 / m['sxx']))
+        t_value = slope / std_err
+        p_value = 2 * stats.t.sf(np.abs(t_value), df_resid)
+        r_squared = m['sxy'] ** 2 / (m['sxx'] * m['syy'])
+
+    bad = (n < 3) | ~(m['sxx'] > 0)
+    out = {
+        'slope': slope,
+        'intercept': intercept,
+        'r_squared': r_squared,
+        'std_err': std_err,
+        'intercept_se': intercept_se,
+        't_value': t_value,
+        'p_value': p_value,
+    }
+    for key in out:
+        out[key] = np.where(bad, np.nan, out[key])
+    out['n'] = m['n']
+    return out
+
+
+def simple_regressions(df, x_vars, y_var):
+    """
+    Fit y_var ~ x for every x in x_vars (each with its own complete rows)
+
+    Returns:
+        DataFrame indexed by variable with slope, intercept, r_squared, p_value,
+        n, std_err, intercept_se and t_value columns
+    """
+    X = df[list(x_vars)].to_numpy(dtype='float64', na_value=np.nan)
+    y = df[y_var].to_numpy(dtype='float64', na_value=np.nan)
+    fits = pd.DataFrame(fit_from_moments(pairwise_moments(X, y)), index=pd.Index(list(x_vars), name='variable'))
+    fits['n'] = fits['n'].astype(int)
+    return fits
+
+
+def vif(X, columns=None):
+    """
+    Variance inflation factors, the diagonal of the inverse correlation matrix
+
+    Same as statsmodels' variance_inflation_factor with a constant in the
+    design (the centered VIF). Rows with any missing value are dropped.
+
+    Args:
+        X: DataFrame or (n, k) array of predictors (no constant column)
+        columns: names for an array input
+
+    Returns:
+        Series of VIF per predictor (inf for a predictor that is an exact
+        combination of the others)
+    """
+    if isinstance(X, pd.DataFrame):
+        columns = list(X.columns)
+        X = X.to_numpy(dtype='float64', na_value=np.nan)
+    X = np.asarray(X, dtype='float64')
+    X = X[~np.isnan(X).any(axis=1)]
+    if columns is None:
+        columns = list(range(X.shape[1]))
+
+    corr = np.atleast_2d(np.corrcoef(X, rowvar=False))
+    try:
+        values = np.diag(np.linalg.inv(corr))
+    except np.linalg.LinAlgError:
+        values = np.full(len(columns), np.inf)
+    return pd.Series(values, index=columns, name='VIF')
@@ -3,37 +3,69 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 import statsmodels.api as sm
-from statsmodels.stats.outliers_influence import variance_inflation_factor
+import argparse
 import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import render_pool
+import ols_engine
+import streaming_ols
+import resampling
+import spatial
+from datasets import load_master
+
+# every column the regressions below touch
+REGRESSION_COLUMNS = [
+    'Alt_Housing_Growth_Pct_Capped',
+    'Median_Household_Income',
+    'Population_Density',
+    'Median_Home_Value',
+    'Distance_to_Park_Miles',
+    'Campgrounds_Within_30mi',
+    'Avg_Temp_F',
+    'Remote_Work_Pct',
+]
+
+# rv rental supply from aggregate_rv_supply.py, only fit when the master has it
+SUPPLY_COLUMN = 'RV_Listings_Within_50mi'
 
 def load_data():
-    # load the county dataset
-    if os.path.exists('Data/processed/master_dataset_powerbi.csv'):
-        df = pd.read_csv('Data/processed/master_dataset_powerbi.csv')
-    elif os.path.exists('../Data/processed/master_dataset_powerbi.csv'):
-        df = pd.read_csv('../Data/processed/master_dataset_powerbi.csv')
-    else:
-        df = pd.read_csv('../../Data/processed/master_dataset_powerbi.csv')
-    return df
+    # load the county dataset (just the regression columns)
+    return load_master(columns=REGRESSION_COLUMNS + [SUPPLY_COLUMN])
 
-def simple_regression(df, x_var, y_var, title, filename, output_dir):
-    # clean data
-    df_clean = df[[x_var, y_var]].dropna()
+def simple_regression(df, x_var, y_var, title, filename, output_dir, fits=None):
+    # clean data (the store keeps float32, fit in float64)
+    df_clean = df[[x_var, y_var]].dropna().astype('float64')
     
     # prepare data
     X = df_clean[x_var]
     y = df_clean[y_var]
-    X_with_const = sm.add_constant(X)
     
-    # fit regression model
-    model = sm.OLS(y, X_with_const).fit()
+    # fits = ols_engine.simple_regressions output for all predictors, else fit just this one
+    if fits is None or x_var not in fits.index:
+        fits = ols_engine.simple_regressions(df, [x_var], y_var)
+    fit = fits.loc[x_var]
     
-    # extract statistics
-    slope = model.params[x_var]
-    intercept = model.params['const']
-    r_squared = model.rsquared
-    p_value = model.pvalues[x_var]
-    n = len(df_clean)
+    result = {
+        'variable': x_var,
+        'slope': float(fit['slope']),
+        'intercept': float(fit['intercept']),
+        'r_squared': float(fit['r_squared']),
+        'p_value': float(fit['p_value']),
+        'n': int(fit['n'])
+    }
+    # the chart is drawn later by render_pool (maybe in another process)
+    figure = render_pool.job(plot_simple_regression, f'{output_dir}/{filename}',
+                             X=X, y=y, result=result, title=title, y_var=y_var)
+    return result, figure
+
+def plot_simple_regression(path, X, y, result, title, y_var):
+    x_var = result['variable']
+    slope = result['slope']
+    intercept = result['intercept']
     
     # create visualization
     fig, ax = plt.subplots(figsize=(10, 7))
@@ -48,9 +80,9 @@ def simple_regression(df, x_var, y_var, title, filename, output_dir):
     
     # add statistics text box
     stats_text = f'Equation: y = {slope:.6f}x + {intercept:.2f}\n'
-    stats_text += f'R² = {r_squared:.4f}\n'
-    stats_text += f'p-value = {p_value:.4e}\n'
-    stats_text += f'n = {n:,}'
+    stats_text += f'R² = {result["r_squared"]:.4f}\n'
+    stats_text += f'p-value = {result["p_value"]:.4e}\n'
+    stats_text += f'n = {result["n"]:,}'
     
     # position text box based on slope
     if slope > 0:
@@ -73,22 +105,13 @@ def simple_regression(df, x_var, y_var, title, filename, output_dir):
     ax.legend(fontsize=10)
     
     plt.tight_layout()
-    plt.savefig(f'{output_dir}/{filename}', dpi=300, bbox_inches='tight')
+    plt.savefig(path, dpi=300, bbox_inches='tight')
     plt.close()
-    
-    return {
-        'variable': x_var,
-        'slope': slope,
-        'intercept': intercept,
-        'r_squared': r_squared,
-        'p_value': p_value,
-        'n': n
-    }
 
 def multiple_regression(df, x_vars, y_var, output_dir):
     # clean data
     vars_needed = x_vars + [y_var]
-    df_clean = df[vars_needed].dropna()
+    df_clean = df[vars_needed].dropna().astype('float64')
     
     # prepare data
     X = df_clean[x_vars]
@@ -101,20 +124,34 @@ def multiple_regression(df, x_vars, y_var, output_dir):
     # calculate vif for multicollinearity check
     vif_data = pd.DataFrame()
     vif_data["Variable"] = x_vars
-    vif_data["VIF"] = [variance_inflation_factor(X.values, i) for i in range(len(x_vars))]
-    
+    vif_data["VIF"] = ols_engine.vif(X).values
+    
+    # only the numbers the chart shows go to the renderer, not the whole model
+    stats = {
+        'rsquared': model.rsquared,
+        'rsquared_adj': model.rsquared_adj,
+        'fvalue': model.fvalue,
+        'f_pvalue': model.f_pvalue,
+        'nobs': model.nobs,
+    }
+    figure = render_pool.job(plot_multiple_regression, f'{output_dir}/regression_multiple.png',
+                             x_vars=x_vars, params=model.params, conf_int=model.conf_int(),
+                             pvalues=model.pvalues, stats=stats)
+    return model, figure
+
+def plot_multiple_regression(path, x_vars, params, conf_int, pvalues, stats):
     # visualize coefficients
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
     
     # plot 1 - coefficient values with confidence intervals
-    params = model.params[1:]
-    conf_int = model.conf_int().iloc[1:]
-    errors = np.abs(conf_int.values - params.values.reshape(-1, 1))
+    coefs = params.iloc[1:]
+    conf_int = conf_int.iloc[1:]
+    errors = np.abs(conf_int.values - coefs.values.reshape(-1, 1))
     
-    y_pos = np.arange(len(params))
-    colors = ['green' if p < 0.05 else 'gray' for p in model.pvalues[1:]]
+    y_pos = np.arange(len(coefs))
+    colors = ['green' if p < 0.05 else 'gray' for p in pvalues.iloc[1:]]
     
-    ax1.barh(y_pos, params, xerr=errors[:, 0], color=colors, alpha=0.7, 
+    ax1.barh(y_pos, coefs, xerr=errors[:, 0], color=colors, alpha=0.7, 
              error_kw={'elinewidth': 2, 'capsize': 5})
     ax1.axvline(x=0, color='black', linestyle='--', linewidth=1)
     ax1.set_yticks(y_pos)
@@ -128,18 +165,18 @@ def multiple_regression(df, x_vars, y_var, output_dir):
     ax2.axis('off')
     stats_text = "Multiple Regression Statistics\n"
     stats_text += "="*40 + "\n\n"
-    stats_text += f"R² = {model.rsquared:.4f}\n"
-    stats_text += f"Adjusted R² = {model.rsquared_adj:.4f}\n"
-    stats_text += f"F-statistic = {model.fvalue:.2f}\n"
-    stats_text += f"Prob (F-statistic) = {model.f_pvalue:.4e}\n"
-    stats_text += f"Sample size = {int(model.nobs):,}\n\n"
+    stats_text += f"R² = {stats['rsquared']:.4f}\n"
+    stats_text += f"Adjusted R² = {stats['rsquared_adj']:.4f}\n"
+    stats_text += f"F-statistic = {stats['fvalue']:.2f}\n"
+    stats_text += f"Prob (F-statistic) = {stats['f_pvalue']:.4e}\n"
+    stats_text += f"Sample size = {int(stats['nobs']):,}\n\n"
     stats_text += "Significant Predictors (p < 0.05):\n"
     stats_text += "-"*40 + "\n"
     
     for var in x_vars:
-        p_val = model.pvalues[var]
+        p_val = pvalues[var]
         if p_val < 0.05:
-            coef = model.params[var]
+            coef = params[var]
             stats_text += f"{var.replace('_', ' ')}: {coef:.6f}\n"
             stats_text += f"  (p = {p_val:.4e})\n"
     
@@ -148,13 +185,14 @@ def multiple_regression(df, x_vars, y_var, output_dir):
              bbox=dict(boxstyle='round', facecolor='lightblue', alpha=0.3))
     
     plt.tight_layout()
-    plt.savefig(f'{output_dir}/regression_multiple.png', dpi=300, bbox_inches='tight')
+    plt.savefig(path, dpi=300, bbox_inches='tight')
     plt.close()
-    
-    return model
 
 def create_summary_table(results, output_dir):
-    # create summary table
+    # create summary table (drawn by render_pool)
+    return render_pool.job(plot_summary_table, f'{output_dir}/regression_summary.png', results=results)
+
+def plot_summary_table(path, results):
     summary_df = pd.DataFrame(results)
     
     fig, ax = plt.subplots(figsize=(12, 8))
@@ -163,9 +201,9 @@ def create_summary_table(results, output_dir):
     
     # format data for display
     display_data = []
-    display_data.append(['Hypothesis', 'Variable', 'Slope', 'R²', 'P-Value', 'N'])
+    display_data.append(['Hypothesis', 'Variable', 'Slope', '95% CI (bootstrap)', 'R²', 'P-Value', 'Perm. P', 'N'])
     
-    hypotheses = ['H1', 'H2', 'H3', 'H4a', 'H4b', 'H5', 'H6']
+    hypotheses = ['H1', 'H2', 'H3', 'H4a', 'H4b', 'H5', 'H6', 'H7']
     
     for i, result in enumerate(results):
         hypothesis = hypotheses[i] if i < len(hypotheses) else f'H{i+1}'
@@ -174,26 +212,28 @@ def create_summary_table(results, output_dir):
         r_sq = f"{result['r_squared']:.4f}"
         p_val = f"{result['p_value']:.4e}"
         n = f"{result['n']:,}"
+        ci = f"[{result['ci_low']:.3g}, {result['ci_high']:.3g}]" if 'ci_low' in result else '-'
+        perm_p = f"{result['perm_p_value']:.4f}" if 'perm_p_value' in result else '-'
         
-        display_data.append([hypothesis, var_name, slope, r_sq, p_val, n])
+        display_data.append([hypothesis, var_name, slope, ci, r_sq, p_val, perm_p, n])
     
     # create table
     table = ax.table(cellText=display_data, cellLoc='left', loc='center',
-                     colWidths=[0.1, 0.3, 0.15, 0.1, 0.15, 0.1])
+                     colWidths=[0.1, 0.22, 0.11, 0.2, 0.08, 0.11, 0.08, 0.07])
     
     table.auto_set_font_size(False)
     table.set_fontsize(9)
     table.scale(1, 2.5)
     
     # style header row
-    for i in range(6):
+    for i in range(len(display_data[0])):
         cell = table[(0, i)]
         cell.set_facecolor('#4472C4')
         cell.set_text_props(weight='bold', color='white')
     
     # style data rows with alternate colors
     for i in range(1, len(display_data)):
-        for j in range(6):
+        for j in range(len(display_data[0])):
             cell = table[(i, j)]
             if i % 2 == 0:
                 cell.set_facecolor('#E7E6E6')
@@ -202,119 +242,229 @@ def create_summary_table(results, output_dir):
     
     plt.title('Summary of Simple Linear Regressions\nPredicting Alternative Housing Growth', 
               fontsize=14, fontweight='bold', pad=20)
-    plt.savefig(f'{output_dir}/regression_summary.png', dpi=300, bbox_inches='tight')
+    plt.savefig(path, dpi=300, bbox_inches='tight')
     plt.close()
 
-def main():
-    # setup
-    output_dir = 'visuals'
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir, exist_ok=True)
-    
-    # load data
-    df = load_data()
-    
+def figure_jobs(df, output_dir='visuals', n_boot=5000, n_perm=5000, workers=1):
+    """
+    Fit every regression, returns the render_pool jobs for their charts
+
+    n_boot / n_perm are the bootstrap and permutation replicates behind the
+    summary table's CI and Perm. P columns (0 skips them), workers is for those
+    """
     # define dependent variable
     y_var = 'Alt_Housing_Growth_Pct_Capped'
     
-    # store results
+    # every predictor, the simple regressions are all fit in one pass
+    x_vars = [
+        'Median_Household_Income',
+        'Population_Density',
+        'Median_Home_Value',
+        'Distance_to_Park_Miles',
+        'Campgrounds_Within_30mi',
+        'Avg_Temp_F',
+        'Remote_Work_Pct'
+    ]
+    supply_vars = [SUPPLY_COLUMN] if SUPPLY_COLUMN in df.columns else []
+    fits = ols_engine.simple_regressions(df, x_vars + supply_vars, y_var)
+    
+    # store results and the charts to draw
     results = []
+    jobs = []
     
     # h1 income impact
-    result = simple_regression(
+    result, figure = simple_regression(
         df, 
         'Median_Household_Income', 
         y_var,
         'H1: Impact of Median Household Income on Alternative Housing Growth',
         'regression_h1_income.png',
-        output_dir
+        output_dir,
+        fits
     )
     results.append(result)
+    jobs.append(figure)
     
     # h2 population density impact
-    result = simple_regression(
+    result, figure = simple_regression(
         df,
         'Population_Density',
         y_var,
         'H2: Impact of Population Density on Alternative Housing Growth',
         'regression_h2_density.png',
-        output_dir
+        output_dir,
+        fits
     )
     results.append(result)
+    jobs.append(figure)
     
     # h3 housing cost impact
-    result = simple_regression(
+    result, figure = simple_regression(
         df,
         'Median_Home_Value',
         y_var,
         'H3: Impact of Median Home Value on Alternative Housing Growth',
         'regression_h3_housing.png',
-        output_dir
+        output_dir,
+        fits
     )
     results.append(result)
+    jobs.append(figure)
     
     # h4a distance to parks
-    result = simple_regression(
+    result, figure = simple_regression(
         df,
         'Distance_to_Park_Miles',
         y_var,
         'H4a: Impact of Distance to Nearest National Park',
         'regression_h4a_park_distance.png',
-        output_dir
+        output_dir,
+        fits
     )
     results.append(result)
+    jobs.append(figure)
     
     # h4b campground density
-    result = simple_regression(
+    result, figure = simple_regression(
         df,
         'Campgrounds_Within_30mi',
         y_var,
         'H4b: Impact of Campground Density (within 30 miles)',
         'regression_h4b_campgrounds.png',
-        output_dir
+        output_dir,
+        fits
     )
     results.append(result)
+    jobs.append(figure)
     
     # h5 climate impact
-    result = simple_regression(
+    result, figure = simple_regression(
         df,
         'Avg_Temp_F',
         y_var,
         'H5: Impact of Average Temperature on Alternative Housing Growth',
         'regression_h5_climate.png',
-        output_dir
+        output_dir,
+        fits
     )
     results.append(result)
+    jobs.append(figure)
     
     # h6 remote work impact
-    result = simple_regression(
+    result, figure = simple_regression(
         df,
         'Remote_Work_Pct',
         y_var,
         'H6: Impact of Remote Work Percentage on Alternative Housing Growth',
         'regression_h6_remote.png',
-        output_dir
+        output_dir,
+        fits
     )
     results.append(result)
+    jobs.append(figure)
+    
+    # h7 rv rental supply nearby, fit on the counties the rvshare searches
+    # covered (NaN everywhere else) so it stays out of the multiple regression
+    if supply_vars:
+        result, figure = simple_regression(
+            df,
+            SUPPLY_COLUMN,
+            y_var,
+            'H7: Impact of Nearby RV Rental Supply on Alternative Housing Growth',
+            'regression_h7_rv_supply.png',
+            output_dir,
+            fits
+        )
+        results.append(result)
+        jobs.append(figure)
+    
+    # bootstrap CIs and permutation p-values for the summary table
+    # (each can be turned off on its own, the table shows '-' for what wasnt run)
+    inference_cols = (['ci_low', 'ci_high'] if n_boot else []) + (['perm_p_value'] if n_perm else [])
+    if inference_cols:
+        inference = resampling.resample_table(df, x_vars + supply_vars, y_var, n_boot, n_perm, workers=workers)
+        for result in results:
+            result.update(inference.loc[result['variable'], inference_cols].to_dict())
     
     # create summary table
-    create_summary_table(results, output_dir)
+    jobs.append(create_summary_table(results, output_dir))
     
     # multiple regression with all predictors
-    x_vars = [
-        'Median_Household_Income',
-        'Population_Density',
-        'Median_Home_Value',
-        'Distance_to_Park_Miles',
-        'Campgrounds_Within_30mi',
-        'Avg_Temp_F',
-        'Remote_Work_Pct'
-    ]
+    model, figure = multiple_regression(df, x_vars, y_var, output_dir)
+    jobs.append(figure)
     
-    model = multiple_regression(df, x_vars, y_var, output_dir)
+    return jobs
+
+def stream_main(path, chunksize=100000):
+    # stats only, no charts (the scatter plots would need every point in memory)
+    y_var = 'Alt_Housing_Growth_Pct_Capped'
+    x_vars = [c for c in REGRESSION_COLUMNS if c != y_var]
+    fits, model = streaming_ols.stream_regressions(path, x_vars, y_var, chunksize)
+    
+    print(f"simple regressions ({path}, {chunksize:,} rows per chunk)")
+    print(fits[['slope', 'intercept', 'r_squared', 'p_value', 'n']].to_string())
+    print(f"\nmultiple regression: R² = {model.rsquared:.4f}, adjusted R² = {model.rsquared_adj:.4f}, "
+          f"F = {model.fvalue:.2f} (p = {model.f_pvalue:.4e}), n = {int(model.nobs):,}")
+    print(pd.DataFrame({'coef': model.params, 'std err': model.bse, 'p-value': model.pvalues}).to_string())
+    return fits, model
+
+def spatial_main(k=8, permutations=999):
+    # spatial autocorrelation check and the spatial lag version of the multiple regression
+    y_var = 'Alt_Housing_Growth_Pct_Capped'
+    x_vars = [c for c in REGRESSION_COLUMNS if c != y_var]
+    df = load_master(columns=REGRESSION_COLUMNS + ['County_Lat', 'County_Lon'])
+    if 'County_Lat' not in df.columns:
+        print("No County_Lat/County_Lon, run calculate_park_distance.py first")
+        return None
+    df_clean = df[x_vars + [y_var, 'County_Lat', 'County_Lon']].dropna().astype('float64')
+    
+    W = spatial.knn_weights(df_clean['County_Lat'], df_clean['County_Lon'], k=k)
+    model = sm.OLS(df_clean[y_var], sm.add_constant(df_clean[x_vars])).fit()
+    
+    print(f"spatial weights: {k} nearest counties, n = {len(df_clean):,}")
+    for label, values in [(y_var, df_clean[y_var]), ('OLS residuals', model.resid)]:
+        moran = spatial.morans_i(values, W, permutations)
+        print(f"  Moran's I {label}: {moran['I']:.4f} (expected {moran['expected_I']:.4f}, "
+              f"z = {moran['z_sim']:.2f}, p = {moran['p_sim']:.4f}, {permutations} permutations)")
+    
+    lag = spatial.spatial_lag_regression(df_clean[y_var], df_clean[x_vars], W, x_vars)
+    print(f"\nspatial lag model (S2SLS), pseudo R² = {lag.pseudo_r2:.4f}")
+    print(lag.summary_frame().to_string())
+    return lag
+
+def main(workers=None, n_boot=5000, n_perm=5000):
+    # setup
+    output_dir = 'visuals'
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir, exist_ok=True)
+    
+    # load data
+    df = load_data()
+    
+    # fit everything first, then draw the charts across a process pool
+    t0 = time.perf_counter()
+    timings = render_pool.render(figure_jobs(df, output_dir, n_boot, n_perm, workers), workers)
+    render_pool.print_timings(timings, time.perf_counter() - t0)
     
     print('analysis complete')
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Simple and multiple regressions for every hypothesis")
+    parser.add_argument('--workers', type=int, default=None,
+                        help='processes to draw the charts with (default one per core, 1 = no pool)')
+    parser.add_argument('--bootstrap', type=int, default=5000, help='bootstrap replicates per slope (0 = no CIs)')
+    parser.add_argument('--permutations', type=int, default=5000, help='permutation replicates per slope (0 = no permutation p-values)')
+    parser.add_argument('--spatial', action='store_true',
+                        help="Moran's I and a spatial lag regression on county neighbors instead of the charts")
+    parser.add_argument('--neighbors', type=int, default=8, help='nearest neighbors per county with --spatial')
+    parser.add_argument('--stream', metavar='FILE',
+                        help='fit from a csv/parquet file chunk by chunk instead (tract / block group data), prints stats only')
+    parser.add_argument('--chunksize', type=int, default=100000, help='rows per chunk with --stream')
+    args = parser.parse_args()
+    if args.stream:
+        stream_main(args.stream, args.chunksize)
+    elif args.spatial:
+        spatial_main(args.neighbors)
+    else:
+        main(workers=args.workers, n_boot=args.bootstrap, n_perm=args.permutations)
 
@@ -0,0 +1,142 @@
+"""
+Resampling
+Bootstrap confidence intervals and permutation p-values for the simple
+regression slopes, the growth variable is skewed and capped so the OLS
+p-values alone are a bit optimistic
+- replicates are drawn as index matrices (one row per replicate) and every
+  slope in a chunk is solved with a couple of matrix ops, no per replicate fit
+- chunks are sized to a memory budget, each chunk gets its own child seed so
+  the answer is the same serial or spread over a process pool
+
+    table = resampling.resample_table(df, x_vars, 'Alt_Housing_Growth_Pct_Capped')
+    table.loc['Avg_Temp_F', ['ci_low', 'ci_high', 'perm_p_value']]
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# bytes of replicate data per chunk (index matrix + gathered x and y)
+CHUNK_BYTES = 64 * 1024 * 1024
+
+
+def _seed_sequence(seed):
+    return seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+
+
+def _bootstrap_chunk(x, y, reps, seed):
+    """Slopes of `reps` bootstrap samples (rows drawn with replacement)"""
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(x), size=(reps, len(x)))
+    xb = x[idx]
+    yb = y[idx]
+    xb -= xb.mean(axis=1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.einsum('ij,ij->i', xb, yb) / np.einsum('ij,ij->i', xb, xb)
+
+
+def _permutation_chunk(x, y, reps, seed):
+    """Slopes with y shuffled `reps` times (x fixed, so its sum of squares is too)"""
+    rng = np.random.default_rng(seed)
+    xc = x - x.mean()
+    shuffled = rng.permuted(np.broadcast_to(y, (reps, len(y))), axis=1)
+    return shuffled @ xc / (xc @ xc)
+
+
+_CHUNK_FUNCS = {'bootstrap': _bootstrap_chunk, 'permutation': _permutation_chunk}
+
+
+def _run_chunk(args):
+    kind, x, y, reps, seed = args
+    return _CHUNK_FUNCS[kind](x, y, reps, seed)
+
+
+def replicate_slopes(kind, x, y, n_reps, seed=480, workers=1, chunk_bytes=CHUNK_BYTES):
+    """
+    Slope of y ~ x for n_reps bootstrap or permutation replicates
+
+    Args:
+        kind: 'bootstrap' or 'permutation'
+        x, y: complete (no NaN) 1d arrays
+        n_reps: replicates
+        seed: base seed or SeedSequence (each chunk gets a child of it)
+        workers: processes (1 = run here, None = one per core)
+        chunk_bytes: memory budget per chunk
+
+    Returns:
+        (n_reps,) array of slopes (all NaN with fewer than 2 rows)
+    """
+    if len(x) < 2:
+        return np.full(n_reps, np.nan)
+    # center once, slopes dont care and the products stay small
+    x = np.asarray(x, dtype='float64') - np.mean(x)
+    y = np.asarray(y, dtype='float64') - np.mean(y)
+    per_rep = len(x) * 8 * 3
+    reps = max(1, min(n_reps, chunk_bytes // per_rep))
+    sizes = [min(reps, n_reps - start) for start in range(0, n_reps, reps)]
+    seeds = _seed_sequence(seed).spawn(len(sizes))
+    jobs = [(kind, x, y, size, s) for size, s in zip(sizes, seeds)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) == 1:
+        parts = [_run_chunk(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_run_chunk, jobs))
+    return np.concatenate(parts) if parts else np.empty(0)
+
+
+def slope_inference(x, y, n_boot=5000, n_perm=5000, alpha=0.05, seed=480, workers=1):
+    """
+    Percentile bootstrap CI and two sided permutation p-value for one slope
+
+    Returns:
+        dict with slope, ci_low, ci_high, perm_p_value, n_boot, n_perm
+        (the CI is NaN when n_boot is 0, the p-value when n_perm is, and
+        everything is NaN when there is no slope to fit: under 2 rows or x constant)
+    """
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    result = {'slope': np.nan, 'ci_low': np.nan, 'ci_high': np.nan,
+              'perm_p_value': np.nan, 'n_boot': n_boot, 'n_perm': n_perm}
+    if len(x) < 2:
+        return result
+    xc = x - x.mean()
+    if not xc @ xc > 0:
+        return result
+    slope = xc @ (y - y.mean()) / (xc @ xc)
+
+    # separate child seeds so the bootstrap and permutation draws dont overlap
+    boot_seed, perm_seed = _seed_sequence(seed).spawn(2)
+    boot = replicate_slopes('bootstrap', x, y, n_boot, boot_seed, workers)
+    perm = replicate_slopes('permutation', x, y, n_perm, perm_seed, workers)
+
+    ci_low = ci_high = perm_p = np.nan
+    if n_boot:
+        # a resample where every x is the same has no slope, leave it out
+        ci_low, ci_high = np.nanquantile(boot, [alpha / 2, 1 - alpha / 2])
+    if n_perm:
+        # +1 on both sides counts the observed data as one of the permutations
+        perm_p = (np.sum(np.abs(perm) >= np.abs(slope) - 1e-12 * np.abs(slope)) + 1) / (n_perm + 1)
+    return {'slope': slope, 'ci_low': ci_low, 'ci_high': ci_high,
+            'perm_p_value': perm_p, 'n_boot': n_boot, 'n_perm': n_perm}
+
+
+def resample_table(df, x_vars, y_var, n_boot=5000, n_perm=5000, alpha=0.05, seed=480, workers=1):
+    """
+    slope_inference for y_var ~ x for every x (each on its own complete rows)
+
+    Returns:
+        DataFrame indexed by variable
+    """
+    seeds = _seed_sequence(seed).spawn(len(x_vars))
+    rows = {}
+    for x_var, s in zip(x_vars, seeds):
+        df_clean = df[[x_var, y_var]].dropna().astype('float64')
+        rows[x_var] = slope_inference(df_clean[x_var].values, df_clean[y_var].values,
+                                      n_boot, n_perm, alpha, s, workers)
+    table = pd.DataFrame.from_dict(rows, orient='index')
+    table.index.name = 'variable'
+    return table
@@ -0,0 +1,193 @@
+"""
+Spatial Statistics
+Neighboring counties tend to grow alike, this checks how much and fits a
+regression that allows for it
+- weights are sparse (scipy csr), built from the SphereIndex KD-tree in
+  src/geo_index.py, so only neighbor pairs are ever stored (tract scale is fine)
+  k nearest neighbors or every point within a distance band
+- Moran's I with a permutation test, the shuffled copies are pushed through
+  W a chunk at a time as one sparse x dense product
+- spatial lag model y = rho*Wy + Xb + e fit by two stage least squares
+  (instruments X, WX, W²X), no n x n inverse or log determinant needed
+
+    W = spatial.knn_weights(df['County_Lat'], df['County_Lon'], k=8)
+    spatial.morans_i(df['Alt_Housing_Growth_Pct_Capped'], W)
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy import sparse, stats
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src'))
+from geo_index import SphereIndex
+
+# bytes of permuted values per chunk in morans_i
+CHUNK_BYTES = 64 * 1024 * 1024
+
+
+def row_standardize(W):
+    """Each row sums to 1 (rows without neighbors stay 0)"""
+    W = sparse.csr_matrix(W, dtype='float64')
+    sums = np.asarray(W.sum(axis=1)).ravel()
+    scale = np.divide(1.0, sums, out=np.zeros_like(sums), where=sums > 0)
+    return sparse.diags(scale) @ W
+
+
+def knn_weights(lat, lon, k=8, standardize=True):
+    """
+    k nearest neighbor weights (great circle distance, a point isnt its own neighbor)
+
+    Args:
+        lat, lon: coordinates, no missing values (subset first)
+        k: neighbors per point
+        standardize: row standardize (else binary 0/1)
+
+    Returns:
+        (n, n) csr matrix
+    """
+    lat = np.asarray(lat, dtype='float64')
+    lon = np.asarray(lon, dtype='float64')
+    n = len(lat)
+    k = min(k, n - 1)
+    if np.isnan(lat).any() or np.isnan(lon).any():
+        raise ValueError("knn_weights needs complete coordinates, drop the missing rows first")
+
+    # ask for one extra, the point itself (or a twin at the same spot) comes back first
+    _, idx = SphereIndex(lat, lon).query_nearest(lat, lon, k=k + 1)
+    idx = idx.reshape(n, k + 1)
+    rows = np.arange(n)
+    not_self = idx != rows[:, None]
+    # rows where self wasnt returned (k+1 identical points) keep their first k
+    not_self[not_self.all(axis=1), -1] = False
+    cols = idx[not_self].reshape(n, k)
+
+    W = sparse.csr_matrix((np.ones(n * k), (np.repeat(rows, k), cols.ravel())), shape=(n, n))
+    return row_standardize(W) if standardize else W
+
+
+def distance_band_weights(lat, lon, max_miles, standardize=True):
+    """
+    Every other point within max_miles is a neighbor
+
+    Points with nobody in range get an empty row (an island), morans_i and
+    spatial_lag_regression treat their lag as 0
+
+    Returns:
+        (n, n) csr matrix
+    """
+    lat = np.asarray(lat, dtype='float64')
+    lon = np.asarray(lon, dtype='float64')
+    n = len(lat)
+    if np.isnan(lat).any() or np.isnan(lon).any():
+        raise ValueError("distance_band_weights needs complete coordinates, drop the missing rows first")
+
+    q_idx, p_idx, _ = SphereIndex(lat, lon).query_radius_pairs(lat, lon, max_miles)
+    keep = q_idx != p_idx
+    W = sparse.csr_matrix((np.ones(keep.sum()), (q_idx[keep], p_idx[keep])), shape=(n, n))
+    return row_standardize(W) if standardize else W
+
+
+def morans_i(values, W, permutations=999, seed=480, chunk_bytes=CHUNK_BYTES):
+    """
+    Global Moran's I with a permutation test
+
+    Args:
+        values: (n,) values, no missing
+        W: (n, n) sparse weights
+        permutations: random relabelings (0 = just the statistic)
+        seed: rng seed
+
+    Returns:
+        dict with I, expected_I, p_sim (one sided, in the direction of I like
+        PySAL's), z_sim, n
+    """
+    z = np.asarray(values, dtype='float64')
+    z = z - z.mean()
+    n = len(z)
+    W = sparse.csr_matrix(W)
+    s0 = W.sum()
+    scale = n / s0 / (z @ z)
+    moran = scale * (z @ (W @ z))
+    result = {'I': moran, 'expected_I': -1.0 / (n - 1), 'n': n}
+    if not permutations:
+        return result
+
+    rng = np.random.default_rng(seed)
+    cols = max(1, min(permutations, chunk_bytes // (n * 8 * 2)))
+    sims = []
+    for start in range(0, permutations, cols):
+        b = min(cols, permutations - start)
+        # (n, b), each column a shuffled copy of z
+        Z = rng.permuted(np.broadcast_to(z[:, None], (n, b)), axis=0)
+        sims.append(scale * np.einsum('ij,ij->j', Z, W @ Z))
+    sims = np.concatenate(sims)
+
+    if moran >= sims.mean():
+        larger = np.sum(sims >= moran)
+    else:
+        larger = np.sum(sims <= moran)
+    result['p_sim'] = (larger + 1) / (permutations + 1)
+    result['z_sim'] = (moran - sims.mean()) / sims.std()
+    return result
+
+
+class SpatialLagResult:
+    """params / bse / zvalues / pvalues Series ('const', x_vars..., 'rho'), n, pseudo_r2"""
+
+    def __init__(self, names, params, cov, n, pseudo_r2):
+        self.params = pd.Series(params, index=names)
+        self.bse = pd.Series(np.sqrt(np.diag(cov)), index=names)
+        self.zvalues = self.params / self.bse
+        self.pvalues = pd.Series(2 * stats.norm.sf(np.abs(self.zvalues)), index=names)
+        self.nobs = n
+        self.pseudo_r2 = pseudo_r2
+
+    def summary_frame(self):
+        return pd.DataFrame({'coef': self.params, 'std err': self.bse, 'z': self.zvalues, 'p-value': self.pvalues})
+
+
+def spatial_lag_regression(y, X, W, x_vars=None):
+    """
+    Spatial two stage least squares for y = rho*Wy + const + X b + e
+
+    Wy is instrumented with [WX, W²X] (Kelejian & Prucha), everything is sparse
+    products so the cost grows with the number of neighbor pairs
+
+    Args:
+        y: (n,) outcome
+        X: (n, k) predictors (no constant, no missing)
+        W: (n, n) sparse weights, normally row standardized
+        x_vars: names for the predictors
+
+    Returns:
+        SpatialLagResult
+    """
+    y = np.asarray(y, dtype='float64')
+    X = np.asarray(X, dtype='float64')
+    if X.ndim == 1:
+        X = X[:, None]
+    n, k = X.shape
+    W = sparse.csr_matrix(W)
+    if x_vars is None:
+        x_vars = [f'x{j}' for j in range(k)]
+
+    WX = W @ X
+    WWX = W @ WX
+    Wy = W @ y
+    Xc = np.column_stack([np.ones(n), X])
+    Z = np.column_stack([Xc, Wy])
+    H = np.column_stack([Xc, WX, WWX])
+
+    # first stage, project Z onto the instruments
+    Z_hat = H @ np.linalg.lstsq(H, Z, rcond=None)[0]
+    # second stage
+    theta = np.linalg.solve(Z_hat.T @ Z, Z_hat.T @ y)
+    resid = y - Z @ theta
+    sigma2 = resid @ resid / n
+    cov = sigma2 * np.linalg.inv(Z_hat.T @ Z_hat)
+
+    pseudo_r2 = np.corrcoef(y, Z @ theta)[0, 1] ** 2
+    return SpatialLagResult(['const'] + list(x_vars) + ['rho'], theta, cov, n, pseudo_r2)
@@ -0,0 +1,198 @@
+"""
+Streaming OLS
+The same regressions as regression_analysis.py, fit from a file read chunk by
+chunk, for tract / block group data that doesnt fit in memory
+- each chunk is reduced to counts, means and centered cross products, chunks
+  are merged with the pairwise update from Chan et al. (no big sums of squares
+  that lose digits, memory doesnt grow with the row count)
+- PairwiseAccumulator: every simple regression y ~ x_j (pairwise complete rows,
+  like dropna per model), solved with ols_engine
+- JointAccumulator: the multiple regression (rows complete in every column),
+  the result has the statsmodels attribute names the charts use
+- csv and parquet are both streamed
+
+    fits, model = streaming_ols.stream_regressions('tracts.parquet', x_vars, y_var)
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from scipy import stats
+
+import ols_engine
+
+
+def iter_chunks(path, columns, chunksize=100000):
+    """DataFrames of `columns` from a csv or parquet file, chunksize rows at a time"""
+    if os.path.splitext(path)[1].lower() in ('.parquet', '.pq'):
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunksize)
+
+
+def _as_float(df, columns):
+    return df[columns].to_numpy(dtype='float64', na_value=np.nan)
+
+
+class PairwiseAccumulator:
+    """
+    Running pairwise moments for y ~ x_j, one slot per predictor
+
+    Args:
+        x_vars: predictor columns
+        y_var: dependent column
+    """
+
+    def __init__(self, x_vars, y_var):
+        self.x_vars = list(x_vars)
+        self.y_var = y_var
+        k = len(self.x_vars)
+        self.n = np.zeros(k, dtype=np.int64)
+        self.x_mean = np.zeros(k)
+        self.y_mean = np.zeros(k)
+        self.sxx = np.zeros(k)
+        self.syy = np.zeros(k)
+        self.sxy = np.zeros(k)
+
+    def update(self, df):
+        """Add one chunk"""
+        m = ols_engine.pairwise_moments(_as_float(df, self.x_vars), _as_float(df, [self.y_var])[:, 0])
+        n_a, n_b = self.n, m['n']
+        n = n_a + n_b
+        with np.errstate(invalid='ignore', divide='ignore'):
+            w = np.where(n > 0, n_a * n_b / n, 0.0)
+            w_b = np.where(n > 0, n_b / n, 0.0)
+        # slots the chunk had no rows for have NaN chunk means, leave them alone
+        dx = np.where(n_b > 0, m['x_mean'] - self.x_mean, 0.0)
+        dy = np.where(n_b > 0, m['y_mean'] - self.y_mean, 0.0)
+
+        self.sxx += np.where(n_b > 0, m['sxx'], 0.0) + w * dx * dx
+        self.syy += np.where(n_b > 0, m['syy'], 0.0) + w * dy * dy
+        self.sxy += np.where(n_b > 0, m['sxy'], 0.0) + w * dx * dy
+        self.x_mean += dx * w_b
+        self.y_mean += dy * w_b
+        self.n = n
+
+    def moments(self):
+        return {'n': self.n, 'x_mean': self.x_mean, 'y_mean': self.y_mean,
+                'sxx': self.sxx, 'syy': self.syy, 'sxy': self.sxy}
+
+    def fit(self):
+        """Same table as ols_engine.simple_regressions"""
+        fits = pd.DataFrame(ols_engine.fit_from_moments(self.moments()),
+                            index=pd.Index(self.x_vars, name='variable'))
+        fits['n'] = fits['n'].astype(int)
+        return fits
+
+
+class JointAccumulator:
+    """
+    Running means and centered cross product matrix of [x_vars..., y_var]
+    over rows with no missing values
+
+    Args:
+        x_vars: predictor columns
+        y_var: dependent column
+    """
+
+    def __init__(self, x_vars, y_var):
+        self.x_vars = list(x_vars)
+        self.y_var = y_var
+        k = len(self.x_vars) + 1
+        self.n = 0
+        self.mean = np.zeros(k)
+        self.comoment = np.zeros((k, k))
+
+    def update(self, df):
+        """Add one chunk"""
+        Z = _as_float(df, self.x_vars + [self.y_var])
+        Z = Z[~np.isnan(Z).any(axis=1)]
+        n_b = len(Z)
+        if n_b == 0:
+            return
+        mean_b = Z.mean(axis=0)
+        Zc = Z - mean_b
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.comoment += Zc.T @ Zc + np.outer(delta, delta) * (self.n * n_b / n)
+        self.mean += delta * (n_b / n)
+        self.n = n
+
+    def fit(self):
+        """Solve the normal equations (centered), returns a StreamingOLSResult"""
+        return StreamingOLSResult(self.x_vars, self.n, self.mean, self.comoment)
+
+
+class StreamingOLSResult:
+    """
+    Multiple regression fit from accumulated moments
+
+    Has the statsmodels RegressionResults attributes regression_analysis uses:
+    params, bse, tvalues, pvalues, conf_int(), rsquared, rsquared_adj,
+    fvalue, f_pvalue, nobs (params / bse / ... are Series with 'const' first)
+    """
+
+    def __init__(self, x_vars, n, mean, comoment):
+        k = len(x_vars)
+        sxx = comoment[:k, :k]
+        sxy = comoment[:k, k]
+        syy = comoment[k, k]
+        x_mean, y_mean = mean[:k], mean[k]
+
+        sxx_inv = np.linalg.pinv(sxx)
+        beta = sxx_inv @ sxy
+        intercept = y_mean - x_mean @ beta
+
+        ssr = max(syy - beta @ sxy, 0.0)
+        self.nobs = float(n)
+        self.df_model = float(k)
+        self.df_resid = float(n - k - 1)
+        self.ssr = ssr
+        self.centered_tss = syy
+        sigma2 = ssr / self.df_resid
+        self.scale = sigma2
+
+        # covariance of [const, beta] from the centered inverse
+        var_beta = sigma2 * np.diag(sxx_inv)
+        var_const = sigma2 * (1 / n + x_mean @ sxx_inv @ x_mean)
+
+        index = ['const'] + list(x_vars)
+        self.params = pd.Series(np.r_[intercept, beta], index=index)
+        self.bse = pd.Series(np.sqrt(np.r_[var_const, var_beta]), index=index)
+        self.tvalues = self.params / self.bse
+        self.pvalues = pd.Series(2 * stats.t.sf(np.abs(self.tvalues), self.df_resid), index=index)
+
+        self.rsquared = 1 - ssr / syy
+        self.rsquared_adj = 1 - (1 - self.rsquared) * (n - 1) / self.df_resid
+        self.fvalue = (self.rsquared / k) / ((1 - self.rsquared) / self.df_resid)
+        self.f_pvalue = stats.f.sf(self.fvalue, k, self.df_resid)
+
+    def conf_int(self, alpha=0.05):
+        q = stats.t.ppf(1 - alpha / 2, self.df_resid)
+        return pd.DataFrame({0: self.params - q * self.bse, 1: self.params + q * self.bse})
+
+
+def stream_regressions(path, x_vars, y_var, chunksize=100000):
+    """
+    Simple regressions for every predictor and the multiple regression on all
+    of them, in one pass over the file
+
+    Args:
+        path: csv or parquet file
+        x_vars: predictor columns
+        y_var: dependent column
+        chunksize: rows per chunk (memory is about chunksize x columns floats)
+
+    Returns:
+        (simple regression table like ols_engine.simple_regressions, StreamingOLSResult)
+    """
+    pairwise = PairwiseAccumulator(x_vars, y_var)
+    joint = JointAccumulator(x_vars, y_var)
+    for chunk in iter_chunks(path, list(x_vars) + [y_var], chunksize):
+        pairwise.update(chunk)
+        joint.update(chunk)
+    return pairwise.fit(), joint.fit()
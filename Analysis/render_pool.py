@@ -0,0 +1,81 @@
+"""
+Render Pool
+Draws independent figures in parallel worker processes
+- a job is a module level plotting function, the png it writes and the data it
+  needs, so the whole thing can be pickled over to a worker
+- everything is drawn with the non interactive Agg backend
+- results come back as (path, seconds) in the order the jobs were given
+
+    jobs = [render_pool.job(plot_scatter, 'visuals/scatter.png', df=df_clean)]
+    for path, seconds in render_pool.render(jobs):
+        print(path, seconds)
+"""
+
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+
+FigureJob = namedtuple('FigureJob', ['func', 'path', 'kwargs'])
+
+
+def job(func, path, **kwargs):
+    """FigureJob that calls func(path, **kwargs), func has to save the figure to path"""
+    return FigureJob(func, path, kwargs)
+
+
+def _use_agg():
+    matplotlib.use('Agg')
+
+
+def draw(figure_job):
+    """Run one job in this process, returns (path, seconds)"""
+    import matplotlib.pyplot as plt
+
+    t0 = time.perf_counter()
+    os.makedirs(os.path.dirname(figure_job.path) or '.', exist_ok=True)
+    try:
+        figure_job.func(figure_job.path, **figure_job.kwargs)
+    finally:
+        # a job that raised half way shouldnt leave its figure behind for the next one
+        plt.close('all')
+    return figure_job.path, time.perf_counter() - t0
+
+
+def render(jobs, workers=None):
+    """
+    Draw every job, spread over a process pool
+
+    Args:
+        jobs: FigureJobs (independent of each other)
+        workers: processes to use (None = one per core, 1 = draw here, no pool)
+
+    Returns:
+        list of (path, seconds) in job order
+    """
+    jobs = list(jobs)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(jobs)))
+
+    _use_agg()
+    if workers == 1:
+        return [draw(j) for j in jobs]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_use_agg) as pool:
+        # the slow dpi=300 figures are usually given last, chunksize 1 keeps
+        # them from piling up on one worker
+        return list(pool.map(draw, jobs, chunksize=1))
+
+
+def print_timings(results, wall_seconds=None):
+    """Per figure timings, slowest first"""
+    for path, seconds in sorted(results, key=lambda r: r[1], reverse=True):
+        print(f"  {seconds:6.2f}s  {path}")
+    total = sum(seconds for _, seconds in results)
+    line = f"{len(results)} figures, {total:.2f}s of drawing"
+    if wall_seconds is not None:
+        line += f" in {wall_seconds:.2f}s wall"
+    print(line)
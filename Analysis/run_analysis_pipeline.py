@@ -5,23 +5,81 @@ import analyze_h4_nature
 import analyze_h5_climate
 import analyze_h6_remote
 import analyze_pricing
+import argparse
 import os
+import time
+import tracemalloc
+import render_pool
+from datasets import AnalysisContext
+from regression import regression_analysis
+
+HYPOTHESES = [analyze_h1_income, analyze_h2_density, analyze_h3_housing,
+              analyze_h4_nature, analyze_h5_climate, analyze_h6_remote]
 
 # Make it easy to run, did use batch but I'm on macos / windows / manjaro sometimes so wanted to not have to deal with the ENDL in windows.
-def run_all_analysis():    
+def run_all_analysis(shared=True, workers=None, regression=True):
+    """
+    Render every analysis chart (and the regression charts)
+
+    Data is loaded and every figure job is built first, then all figures are
+    drawn together across a render_pool process pool
+
+    Args:
+        shared: hand all modules one AnalysisContext so each dataset is read once
+                (False = every module loads its own, the way it used to work)
+        workers: drawing processes (None = one per core, 1 = draw one after another here)
+        regression: also draw the regression charts into regression/visuals
+
+    Returns:
+        (seconds, peak traced memory in bytes, disk reads, [(path, seconds), ...])
+    """
+    tracemalloc.start()
+    t0 = time.perf_counter()
+
     # ensure visuals directory exists
     os.makedirs('visuals', exist_ok=True)
-    
-    analyze_h1_income.analyze_income_impact()
-    analyze_h2_density.analyze_density_impact()
-    analyze_h3_housing.analyze_housing_cost()
-    analyze_h4_nature.analyze_nature_impact()
-    analyze_h5_climate.analyze_climate_impact()
-    analyze_h6_remote.analyze_remote_work()
-    analyze_pricing.analyze_pricing()
-    
+
+    # the shared context reads every column any chart needs in one go
+    columns = [c for module in HYPOTHESES for c in module.COLUMNS]
+    regression_columns = regression_analysis.REGRESSION_COLUMNS + [regression_analysis.SUPPLY_COLUMN]
+    if regression:
+        columns += regression_columns
+    contexts = []
+    def context(module_columns=None):
+        if not shared or not contexts:
+            contexts.append(AnalysisContext(columns if shared else module_columns))
+        return contexts[-1]
+
+    jobs = []
+    for module in HYPOTHESES:
+        jobs += module.figure_jobs(context(module.COLUMNS))
+    jobs += analyze_pricing.figure_jobs(context())
+    if regression:
+        df = context(regression_columns).master(regression_columns)
+        # next to regression_analysis.py, not wherever the pipeline was started from
+        regression_dir = os.path.join(os.path.dirname(os.path.abspath(regression_analysis.__file__)), 'visuals')
+        jobs += regression_analysis.figure_jobs(df, regression_dir)
+
+    timings = render_pool.render(jobs, workers)
+
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    disk_reads = sum(ctx.disk_reads for ctx in contexts)
+
+    render_pool.print_timings(timings)
     print("All visualizations are done in this dir 'Analysis/visuals/'")
+    print(f"{'shared context' if shared else 'separate loads'}: {elapsed:.2f}s, "
+          f"peak traced memory {peak / 1e6:.1f} MB (this process), {disk_reads} dataset reads")
+    return elapsed, peak, disk_reads, timings
 
 if __name__ == "__main__":
-    run_all_analysis()
-
+    parser = argparse.ArgumentParser(description="Render every analysis chart")
+    parser.add_argument('--separate', action='store_true',
+                        help='let every module load its own data (for comparing against the shared context)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='processes to draw with (default one per core, 1 = no pool)')
+    parser.add_argument('--no-regression', action='store_true',
+                        help='skip the regression charts')
+    args = parser.parse_args()
+    run_all_analysis(shared=not args.separate, workers=args.workers, regression=not args.no_regression)
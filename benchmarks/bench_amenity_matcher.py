@@ -0,0 +1,177 @@
+"""
+Benchmark: amenity flags
+Compares the original create_amenity_features loop (one .apply substring scan
+per feature) against the single-regex AmenityMatcher on synthetic listings, and
+reports how many flags the whole-word matching changes
+
+Before timing anything it checks, amenity by amenity on real rvshare wording,
+that every flag the batch matcher sets differently from the old substring test
+is in EXPECTED_CHANGES (and exits 1 if not)
+
+Usage:
+    python benchmarks/bench_amenity_matcher.py [--listings 1000000] [--legacy-sample 100000] [--full]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from amenity_matcher import AmenityMatcher
+from process_rvshare_clean import AMENITY_FEATURES, create_amenity_features
+
+# the keyword map create_amenity_features used before the matcher
+LEGACY_MAP = {
+    'has_shower': ['shower'],
+    'has_toilet': ['toilet'],
+    'has_bathroom_sink': ['bathroom sink'],
+    'has_refrigerator': ['refrigerator', 'fridge'],
+    'has_microwave': ['microwave'],
+    'has_kitchen_sink': ['kitchen sink'],
+    'has_stove': ['range', 'stove', 'range (stove)'],
+    'has_oven': ['oven'],
+    'has_tv': ['tv', 'television'],
+    'has_dvd_player': ['dvd player', 'dvd'],
+    'has_radio': ['am/fm radio', 'radio', 'am/fm'],
+    'has_cd_player': ['cd player'],
+    'has_bluetooth': ['bluetooth', 'ipod docking station'],
+    'has_ac': ['air conditioning', 'roof air conditioning', 'in dash air conditioning', 'a/c', 'ac'],
+    'has_heating': ['heating', 'furnace', 'hot & cold water supply'],
+    'has_slide_out': ['slide out', 'slideout'],
+    'has_generator': ['generator'],
+    'has_awning': ['awning'],
+}
+
+# what rvshare amenity lists look like, plus words the old substring test tripped on
+VOCAB = {
+    'bathroom': ['Shower', 'Toilet', 'Bathroom sink', 'Outdoor shower', 'Cassette toilet', 'Towels'],
+    'kitchen': ['Refrigerator', 'Mini fridge', 'Microwave', 'Kitchen sink', 'Range (stove)', 'Oven',
+                'Coffee maker', 'Dishes and utensils', 'Cooler', 'Pots and pans', 'Stovetop', 'Cooktop'],
+    'entertainment': ['TV', 'DVD player', 'AM/FM radio', 'CD player', 'Bluetooth', 'iPod docking station',
+                      'Board games', 'Backgammon', 'Tracking device', 'HDTV'],
+    'temperature_control': ['Air conditioning', 'Roof air conditioning', 'In dash air conditioning',
+                            'Heating', 'Furnace', 'Hot & cold water supply', 'Vacuum', 'Fan',
+                            'Heater', 'Heat pump'],
+}
+
+# amenities as listings actually write them, one at a time through both versions
+REAL_AMENITIES = [
+    'Shower', 'Outdoor shower', 'Showerhead', 'Toilet', 'Cassette toilet', 'Composting toilet',
+    'Bathroom sink', 'Towels', 'Refrigerator', 'Mini fridge', 'Microwave', 'Microwave oven',
+    'Kitchen sink', 'Sink', 'Range (stove)', 'Stove', 'Two burner stove', 'Stovetop', 'Cooktop',
+    'Oven', 'Coffee maker', 'Pots and pans', 'Arrange', 'Arranged delivery', 'Orange crate',
+    'TV', 'HDTV', 'Smart TV', 'Television', 'DVD player', 'DVDs', 'AM/FM radio', 'Radio',
+    'CD player', 'Bluetooth', 'Bluetooth speaker', 'iPod docking station', 'Board games',
+    'Backgammon', 'Tracking device', 'Air conditioning', 'Roof air conditioning',
+    'In dash air conditioning', 'A/C', 'AC', 'Heating', 'Heater', 'Diesel heater', 'Heat pump',
+    'Heated seats', 'Furnace', 'Hot & cold water supply', 'Vacuum', 'Fan', 'Backpack',
+    'Backup camera', 'Back up camera', 'Slide out', 'Slideouts', 'Generator', 'Awning', 'Solar panels',
+]
+
+# amenity -> flags the old substring test set that whole words (rightly) dont,
+# nothing may be gained and nothing else may be lost
+EXPECTED_CHANGES = {
+    # 'ac' inside another word
+    'Backgammon': {'has_ac'},
+    'Tracking device': {'has_ac'},
+    'Furnace': {'has_ac'},
+    'Vacuum': {'has_ac'},
+    'Backpack': {'has_ac'},
+    'Backup camera': {'has_ac'},
+    'Back up camera': {'has_ac'},
+    # 'range' inside another word
+    'Arrange': {'has_stove'},
+    'Arranged delivery': {'has_stove'},
+    'Orange crate': {'has_stove'},
+}
+
+
+def synthetic_listings(n, seed):
+    """Each column gets a random subset of its vocabulary (built per subset, not per row)"""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for col, words in VOCAB.items():
+        # bit j of the mask = word j is listed, about a third of the words per listing
+        bits = rng.random((n, len(words))) < 0.35
+        masks = bits @ (1 << np.arange(len(words)))
+        subsets = np.array([', '.join(w for j, w in enumerate(words) if m >> j & 1) or None
+                            for m in range(1 << len(words))], dtype=object)
+        data[col] = subsets[masks]
+    return pd.DataFrame(data)
+
+
+def legacy_features(df):
+    """create_amenity_features before the matcher"""
+    df = df.copy()
+    cols = [c for c in VOCAB if c in df.columns]
+    df['all_amenities_text'] = df[cols].fillna('').agg(' '.join, axis=1).str.lower()
+    for feature_name, keywords in LEGACY_MAP.items():
+        df[feature_name] = df['all_amenities_text'].apply(
+            lambda x: 1 if any(keyword in x for keyword in keywords) else 0
+        )
+    df['total_amenities'] = df[list(LEGACY_MAP)].sum(axis=1)
+    return df
+
+
+def check_changes(matcher):
+    """Compare old and new flags on REAL_AMENITIES, True if they only differ as EXPECTED_CHANGES says"""
+    ok = True
+    for amenity in REAL_AMENITIES:
+        text = amenity.lower()
+        old = {f for f, words in LEGACY_MAP.items() if any(w in text for w in words)}
+        new = matcher.match(amenity)
+        gained, lost = new - old, old - new
+        if gained or lost != EXPECTED_CHANGES.get(amenity, set()):
+            ok = False
+            print(f"  unexpected: {amenity!r} gained {sorted(gained)} lost {sorted(lost)}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--listings', type=int, default=1_000_000)
+    parser.add_argument('--legacy-sample', type=int, default=100_000,
+                        help='listings to time the old loop on (result is extrapolated)')
+    parser.add_argument('--full', action='store_true', help='run the old loop over every listing')
+    parser.add_argument('--seed', type=int, default=480)
+    args = parser.parse_args()
+
+    df = synthetic_listings(args.listings, args.seed)
+    print(f"{args.listings:,} synthetic listings, {len(AMENITY_FEATURES)} amenity flags")
+
+    matcher = AmenityMatcher(AMENITY_FEATURES)
+    if not check_changes(matcher):
+        sys.exit(1)
+    print(f"  {len(REAL_AMENITIES)} real amenity names: flags only change where EXPECTED_CHANGES says")
+
+    t0 = time.perf_counter()
+    df_new = create_amenity_features(df.copy(), matcher)
+    t_new = time.perf_counter() - t0
+
+    n_legacy = args.listings if args.full else min(args.legacy_sample, args.listings)
+    t0 = time.perf_counter()
+    df_old = legacy_features(df.iloc[:n_legacy])
+    t_legacy = time.perf_counter() - t0
+    t_legacy_total = t_legacy * args.listings / n_legacy
+
+    label = "old .apply per feature" if args.full else f"old .apply (est. from {n_legacy:,})"
+    for name, seconds in [("one-pass matcher", t_new), (label, t_legacy_total)]:
+        print(f"  {name + ':':<36}{seconds:8.3f} s")
+    print(f"  {'speedup:':<36}{t_legacy_total / t_new:8.1f}x")
+
+    # whole word matching is meant to change some flags, show which
+    print(f"  flags that differ from the substring test (first {n_legacy:,} listings):")
+    new_part = df_new.iloc[:n_legacy]
+    for feature in AMENITY_FEATURES:
+        gained = int(((new_part[feature] == 1) & (df_old[feature] == 0)).sum())
+        lost = int(((new_part[feature] == 0) & (df_old[feature] == 1)).sum())
+        if gained or lost:
+            print(f"    {feature:<20} +{gained:<8,} -{lost:,}")
+
+
+if __name__ == "__main__":
+    main()
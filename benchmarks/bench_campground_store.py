@@ -0,0 +1,104 @@
+"""
+Benchmark: Overpass campground ingestion
+Parses a synthetic Overpass "out center" response the old way (json.loads the
+whole body, then python lists of lat/lon) and with campground_store's
+streaming parser, then times reopening the saved layer as a memory map
+
+Usage:
+    python benchmarks/bench_campground_store.py [--elements 200000]
+"""
+
+import argparse
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+import campground_store
+
+
+def synthetic_response(n, seed=480):
+    """Overpass json with mostly nodes, some ways / relations with a center, tags like the real thing"""
+    rng = np.random.default_rng(seed)
+    lats = rng.uniform(25, 49, n)
+    lons = rng.uniform(-124, -67, n)
+    kinds = rng.choice(['node', 'way', 'relation'], n, p=[0.7, 0.28, 0.02])
+    elements = []
+    for i in range(n):
+        tags = {'tourism': 'camp_site', 'name': f'Campground {i}', 'caravans': 'yes' if i % 3 else 'no',
+                'operator': 'USDA Forest Service', 'website': f'https://example.org/camp/{i}'}
+        if kinds[i] == 'node':
+            el = {'type': 'node', 'id': 1000000 + i, 'lat': round(lats[i], 7), 'lon': round(lons[i], 7)}
+        else:
+            el = {'type': kinds[i], 'id': 5000 + i,
+                  'center': {'lat': round(lats[i], 7), 'lon': round(lons[i], 7)}}
+        el['tags'] = tags
+        elements.append(el)
+    body = {'version': 0.6, 'generator': 'Overpass API', 'osm3s': {}, 'elements': elements}
+    return json.dumps(body, indent=1).encode('utf-8')
+
+
+def old_parse(body):
+    data = json.loads(body)
+    camp_lats, camp_lons = [], []
+    for el in data.get('elements', []):
+        lat = el.get('lat')
+        lon = el.get('lon')
+        if lat is None and 'center' in el:
+            lat = el['center'].get('lat')
+            lon = el['center'].get('lon')
+        if lat and lon:
+            camp_lats.append(lat)
+            camp_lons.append(lon)
+    return camp_lats, camp_lons
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--elements', type=int, default=200000)
+    args = parser.parse_args()
+
+    body = synthetic_response(args.elements)
+    print(f"{args.elements:,} elements, {len(body) / 1e6:.1f} MB response")
+
+    (lats, _), t_old, peak_old = measure(old_parse, body)
+    records, t_new, peak_new = measure(lambda: campground_store.build_layer(io.BytesIO(body)))
+    print(f"  {'json.loads + lists:':<26}{t_old:8.2f} s   peak {peak_old / 1e6:8.1f} MB")
+    print(f"  {'streaming parse:':<26}{t_new:8.2f} s   peak {peak_new / 1e6:8.1f} MB   "
+          f"({records.nbytes / 1e6:.1f} MB of records)")
+
+    out_dir = tempfile.mkdtemp(prefix='campground_bench_')
+    try:
+        path = os.path.join(out_dir, 'layer.npy')
+        campground_store.save_layer(records, 'bench', path, os.path.join(out_dir, 'layer.json'))
+        t0 = time.perf_counter()
+        layer = campground_store.open_layer(path)
+        t_open = time.perf_counter() - t0
+        print(f"  {'reopen (memory map):':<26}{t_open * 1000:8.2f} ms")
+
+        same = np.allclose(np.sort(layer['lat']), np.sort(np.asarray(lats, dtype='float32')))
+        print(f"  same locations: {len(layer) == len(lats) and same}")
+        del layer
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: Census API pulls
+Fetches years x variables of county data from a local stub of api.census.gov
+one request at a time (nationwide, the way download_census_api used to), with
+census_fetcher's thread pool over nationwide requests and over state shards,
+then again from a warm cache
+
+Usage:
+    python benchmarks/bench_census_fetcher.py [--years 5] [--variables 60] [--latency 0.3] [--workers 16]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+import census_fetcher
+import http_cache
+from local_stub_server import StubServer, CensusStubHandler
+
+
+def variable_list(n):
+    """Detailed table estimates plus a handful of S1901 income ones, like a real wishlist"""
+    subject = [f'S1901_C01_{j:03d}E' for j in range(1, min(n // 5, 13) + 1)]
+    detailed = [f'B{25001 + t:05d}_{j:03d}E' for t in range(n) for j in range(1, 11)][:n - len(subject)]
+    return detailed + subject
+
+
+def run(label, server, variables, years, cache, **kwargs):
+    before = server.request_count
+    t0 = time.perf_counter()
+    df = census_fetcher.fetch(variables, years, base_url=server.url('/data'), cache=cache, **kwargs)
+    elapsed = time.perf_counter() - t0
+    print(f"  {label:<28}{elapsed:8.2f} s   {server.request_count - before:5d} requests   "
+          f"{len(df):,} rows x {df.shape[1]} cols")
+    return elapsed, df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--variables', type=int, default=60)
+    parser.add_argument('--latency', type=float, default=0.3, help='stub delay per request in seconds')
+    parser.add_argument('--seconds-per-row', type=float, default=0.0002,
+                        help='extra stub delay per county returned (nationwide answers are slower)')
+    parser.add_argument('--workers', type=int, default=16)
+    args = parser.parse_args()
+
+    variables = variable_list(args.variables)
+    years = range(2024 - args.years, 2024)
+    print(f"{args.years} years x {len(variables)} variables, {args.latency * 1000:.0f} ms stub latency "
+          f"+ {args.seconds_per_row * 1000:.2f} ms per county row")
+
+    cache_dir = tempfile.mkdtemp(prefix='census_bench_')
+    try:
+        with StubServer(CensusStubHandler, latency=args.latency, seconds_per_row=args.seconds_per_row) as server:
+            t_serial, serial = run("serial, nationwide", server, variables, years,
+                                   http_cache.HttpCache(os.path.join(cache_dir, 'serial')),
+                                   shard_states=False, workers=1)
+            t_parallel, parallel = run(f"nationwide, {args.workers} workers", server, variables, years,
+                                       http_cache.HttpCache(os.path.join(cache_dir, 'parallel')),
+                                       shard_states=False, workers=args.workers)
+            cache = http_cache.HttpCache(os.path.join(cache_dir, 'sharded'))
+            t_sharded, sharded = run(f"sharded, {args.workers} workers", server, variables, years, cache,
+                                     shard_states=True, workers=args.workers)
+            run("sharded, warm cache", server, variables, years, cache, shard_states=True, workers=args.workers)
+        print(f"  {'speedup (nationwide):':<28}{t_serial / t_parallel:8.1f}x   same data: {serial.equals(parallel)}")
+        print(f"  {'speedup (sharded):':<28}{t_serial / t_sharded:8.1f}x   same data: {serial.equals(sharded)}")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
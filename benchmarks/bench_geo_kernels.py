@@ -0,0 +1,110 @@
+"""
+Benchmark: great circle distance kernels
+Times each kernel in src/geo_kernels.py (float64 and float32) against the
+way distances used to be computed: the scalar math.* haversine in a loop for
+the elementwise case, and the inline numpy version (radians + cos of every
+point redone per query point) for one-to-many / many-to-many
+
+Usage:
+    python benchmarks/bench_geo_kernels.py [--rows 3200] [--cols 20000] [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+from math import radians, cos, sin, asin, sqrt
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+import geo_kernels
+
+
+def scalar_haversine(lon1, lat1, lon2, lat2):
+    """The unused helper calculate_park_distance.py used to carry"""
+    lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
+    a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    return 2 * asin(sqrt(a)) * 3956
+
+
+def inline_one_to_many(lat, lon, lats, lons):
+    """The inline numpy haversine the enrichment scripts each had"""
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * np.arcsin(np.sqrt(a)) * 3956
+
+
+def best_of(repeat, func, *args, **kwargs):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def random_points(n, rng):
+    return rng.uniform(25, 49, n), rng.uniform(-124, -67, n)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=3200, help='query points (counties)')
+    parser.add_argument('--cols', type=int, default=20000, help='target points (campgrounds / listings)')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(480)
+    lat1, lon1 = random_points(args.rows, rng)
+    lat2, lon2 = random_points(args.cols, rng)
+    print(f"{args.rows:,} x {args.cols:,} points, best of {args.repeat}")
+
+    def report(label, seconds, baseline=None, error=None):
+        extra = f"   {baseline / seconds:7.1f}x" if baseline else ""
+        extra += f"   max err {error:.2e} mi" if error is not None else ""
+        print(f"    {label:<38}{seconds * 1000:10.2f} ms{extra}")
+
+    # elementwise, one pair per row
+    n = min(args.rows, args.cols)
+    print("  haversine (elementwise):")
+    t_loop, ref = best_of(1, lambda: np.array([scalar_haversine(lon1[i], lat1[i], lon2[i], lat2[i])
+                                               for i in range(n)]))
+    report("math.* loop", t_loop)
+    for dtype in ('float64', 'float32'):
+        t, d = best_of(args.repeat, geo_kernels.haversine, lat1[:n], lon1[:n], lat2[:n], lon2[:n], dtype=dtype)
+        report(dtype, t, t_loop, np.abs(d - ref).max())
+
+    # one county against every target, for all counties
+    print("  one_to_many (every row in turn):")
+    t_inline, ref = best_of(1, lambda: [inline_one_to_many(lat1[i], lon1[i], lat2, lon2) for i in range(args.rows)])
+    report("inline numpy", t_inline)
+    for dtype in ('float64', 'float32'):
+        out = np.empty(args.cols, dtype=dtype)
+        t, _ = best_of(args.repeat, lambda: [geo_kernels.one_to_many(lat1[i], lon1[i], lat2, lon2, out=out, dtype=dtype)
+                                             for i in range(args.rows)])
+        report(dtype, t, t_inline)
+        targets = geo_kernels.Points(lat2, lon2, dtype)
+        t, _ = best_of(args.repeat, lambda: [geo_kernels.one_to_many(lat1[i], lon1[i], targets, out=out)
+                                             for i in range(args.rows)])
+        report(f"{dtype}, prepared Points", t, t_inline)
+
+    # nearest target for every row, the many-to-many case
+    print("  nearest target (many to many):")
+    t_inline, ref = best_of(1, lambda: np.array([inline_one_to_many(lat1[i], lon1[i], lat2, lon2).argmin()
+                                                 for i in range(args.rows)]))
+    report("inline numpy per row", t_inline)
+    if args.rows * args.cols * 8 <= 512 * 1024 * 1024:
+        t, d = best_of(args.repeat, geo_kernels.pairwise, lat1, lon1, lat2, lon2)
+        report(f"pairwise float64 ({d.nbytes / 1e6:.0f} MB)", t, t_inline)
+        del d
+    for dtype in ('float64', 'float32'):
+        t, nearest = best_of(args.repeat, geo_kernels.reduce_pairwise, lat1, lon1, lat2, lon2,
+                             lambda d: d.argmin(axis=1), dtype=dtype)
+        report(f"reduce_pairwise {dtype} (64 MB cap)", t, t_inline)
+        print(f"    {'':<38}same nearest: {(nearest == ref).mean():.2%}")
+
+
+if __name__ == "__main__":
+    main()
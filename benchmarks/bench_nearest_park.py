@@ -0,0 +1,97 @@
+"""
+Benchmark: nearest park lookup
+Compares the original per-county haversine loop from calculate_park_distance.py
+against the batched SphereIndex query on synthetic points
+
+Usage:
+    python benchmarks/bench_nearest_park.py [--queries 100000] [--parks 10000] [--full]
+"""
+
+import argparse
+import os
+import sys
+import time
+from math import radians
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from geo_index import SphereIndex
+
+
+def random_points(n, rng):
+    # rough lower 48 + alaska/hawaii spread
+    lat = rng.uniform(18.0, 65.0, n)
+    lon = rng.uniform(-165.0, -66.0, n)
+    return lat, lon
+
+
+def legacy_loop(df_master, park_lats, park_lons):
+    """The loop calculate_park_distance used before the index (iterrows + full haversine per row)"""
+    min_distances = []
+    nearest = []
+    for idx, row in df_master.iterrows():
+        lat1, lon1 = map(radians, [row['County_Lat'], row['County_Lon']])
+        lat2 = np.radians(park_lats)
+        lon2 = np.radians(park_lons)
+        dlon = lon2 - lon1
+        dlat = lat2 - lat1
+        a = np.sin(dlat/2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon/2)**2
+        dist_miles = 2 * np.arcsin(np.sqrt(a)) * 3956
+        min_idx = np.argmin(dist_miles)
+        min_distances.append(dist_miles[min_idx])
+        nearest.append(min_idx)
+    return np.array(min_distances), np.array(nearest)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--queries', type=int, default=100_000)
+    parser.add_argument('--parks', type=int, default=10_000)
+    parser.add_argument('--legacy-sample', type=int, default=5_000,
+                        help='number of queries to time the old loop on (result is extrapolated)')
+    parser.add_argument('--full', action='store_true', help='run the old loop over every query')
+    parser.add_argument('--seed', type=int, default=480)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    q_lat, q_lon = random_points(args.queries, rng)
+    p_lat, p_lon = random_points(args.parks, rng)
+
+    print(f"{args.queries:,} query points x {args.parks:,} parks")
+
+    # index build + batched query
+    t0 = time.perf_counter()
+    index = SphereIndex(p_lat, p_lon)
+    t_build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    dist, idx = index.query_nearest(q_lat, q_lon)
+    t_query = time.perf_counter() - t0
+
+    # old loop on a sample (or everything)
+    n_legacy = args.queries if args.full else min(args.legacy_sample, args.queries)
+    df_sample = pd.DataFrame({'County_Lat': q_lat[:n_legacy], 'County_Lon': q_lon[:n_legacy]})
+    t0 = time.perf_counter()
+    legacy_dist, legacy_idx = legacy_loop(df_sample, p_lat, p_lon)
+    t_legacy = time.perf_counter() - t0
+    t_legacy_total = t_legacy * args.queries / n_legacy
+
+    max_err = np.max(np.abs(legacy_dist - dist[:n_legacy]))
+    same_idx = np.mean(legacy_idx == idx[:n_legacy]) * 100
+
+    label = "old loop" if args.full else f"old loop (est. from {n_legacy:,})"
+    rows = [
+        ("index build", t_build),
+        ("batched query", t_query),
+        (label, t_legacy_total),
+    ]
+    for name, seconds in rows:
+        print(f"  {name + ':':<30}{seconds:8.3f} s")
+    print(f"  {'speedup:':<30}{t_legacy_total / (t_build + t_query):8.1f}x")
+    print(f"  {'max distance diff:':<30}{max_err:.2e} miles, same nearest park on {same_idx:.2f}% of rows")
+
+
+if __name__ == "__main__":
+    main()
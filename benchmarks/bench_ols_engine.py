@@ -0,0 +1,99 @@
+"""
+Benchmark: simple regressions + VIF
+Compares one sm.OLS fit per predictor (dropna + add_constant each time) and
+variance_inflation_factor per column against the batched ols_engine, on a
+synthetic county sized frame with missing values, and checks that the numbers agree
+
+Usage:
+    python benchmarks/bench_ols_engine.py [--rows 3200] [--predictors 50] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import statsmodels.api as sm
+from statsmodels.stats.outliers_influence import variance_inflation_factor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Analysis', 'regression'))
+import ols_engine
+
+
+def synthetic_frame(rows, predictors, seed):
+    """Correlated predictors on very different scales, ~5% of each column missing"""
+    rng = np.random.default_rng(seed)
+    base = rng.normal(size=(rows, 3))
+    mix = rng.normal(size=(3, predictors))
+    X = base @ mix + rng.normal(size=(rows, predictors))
+    X *= 10.0 ** rng.integers(-2, 6, predictors)  # income / density / percent scales
+    X += 10.0 ** rng.integers(0, 6, predictors)
+    y = (X[:, :3] / X[:, :3].std(axis=0)) @ rng.normal(size=3) + rng.standard_t(3, rows) * 5
+
+    X[rng.random(X.shape) < 0.05] = np.nan
+    y[rng.random(rows) < 0.03] = np.nan
+    df = pd.DataFrame(X, columns=[f'x{j}' for j in range(predictors)])
+    df['y'] = y
+    return df
+
+
+def statsmodels_fits(df, x_vars, y_var):
+    """What simple_regression did per predictor"""
+    rows = []
+    for x_var in x_vars:
+        df_clean = df[[x_var, y_var]].dropna()
+        model = sm.OLS(df_clean[y_var], sm.add_constant(df_clean[x_var])).fit()
+        rows.append({'variable': x_var, 'slope': model.params[x_var], 'intercept': model.params['const'],
+                     'r_squared': model.rsquared, 'p_value': model.pvalues[x_var], 'n': int(model.nobs)})
+    return pd.DataFrame(rows).set_index('variable')
+
+
+def statsmodels_vif(df, x_vars):
+    X = sm.add_constant(df[x_vars].dropna())
+    return pd.Series([variance_inflation_factor(X.values, i + 1) for i in range(len(x_vars))], index=x_vars)
+
+
+def best_of(repeat, func, *args):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func(*args)
+        times.append(time.perf_counter() - t0)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=3200)
+    parser.add_argument('--predictors', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=480)
+    args = parser.parse_args()
+
+    df = synthetic_frame(args.rows, args.predictors, args.seed)
+    x_vars = [c for c in df.columns if c != 'y']
+    print(f"{args.rows:,} rows, {args.predictors} predictors (best of {args.repeat})")
+
+    t_sm, sm_fits = best_of(args.repeat, statsmodels_fits, df, x_vars, 'y')
+    t_engine, fits = best_of(args.repeat, ols_engine.simple_regressions, df, x_vars, 'y')
+    t_sm_vif, sm_vif = best_of(args.repeat, statsmodels_vif, df, x_vars)
+    t_vif, vif = best_of(args.repeat, ols_engine.vif, df[x_vars])
+
+    for name, old, new in [("simple regressions", t_sm, t_engine), ("VIF", t_sm_vif, t_vif)]:
+        print(f"  {name + ':':<22}statsmodels {old:8.4f} s   engine {new:8.4f} s   {old / new:7.1f}x")
+
+    # agreement (relative for the coefficients, absolute for R² and p-values)
+    print("  max difference from statsmodels:")
+    for col in ['slope', 'intercept']:
+        rel = np.abs(fits[col] - sm_fits[col]) / np.abs(sm_fits[col]).clip(lower=1e-300)
+        print(f"    {col:<12}{rel.max():.2e} (relative)")
+    for col in ['r_squared', 'p_value']:
+        print(f"    {col:<12}{np.abs(fits[col] - sm_fits[col]).max():.2e}")
+    print(f"    {'n':<12}{int(np.abs(fits['n'] - sm_fits['n']).max())}")
+    print(f"    {'VIF':<12}{(np.abs(vif - sm_vif) / sm_vif).max():.2e} (relative)")
+
+
+if __name__ == "__main__":
+    main()
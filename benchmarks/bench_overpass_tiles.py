@@ -0,0 +1,72 @@
+"""
+Benchmark: tiled Overpass campground pull
+Runs the US wide campground query and the tiled version against a local
+Overpass stand-in that times out big queries, allows two requests at a time
+and fails some requests at random, then reruns the tiled pull from its
+checkpoints
+
+Usage:
+    python benchmarks/bench_overpass_tiles.py [--campgrounds 20000] [--max-elements 2500] [--fail-rate 0.1]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+import campground_store
+import http_cache
+import overpass_tiles
+from fetch_campgrounds import CAMPSITE_FILTER
+from local_stub_server import StubServer, OverpassStubHandler
+
+SINGLE_QUERY = f"""[out:json][timeout:180];
+area["ISO3166-1"="US"]->.searchArea;
+(node{CAMPSITE_FILTER}(area.searchArea); way{CAMPSITE_FILTER}(area.searchArea); relation{CAMPSITE_FILTER}(area.searchArea););
+out center;"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--campgrounds', type=int, default=20000)
+    parser.add_argument('--max-elements', type=int, default=2500, help='stub times out queries matching more')
+    parser.add_argument('--fail-rate', type=float, default=0.1)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--concurrency', type=int, default=2)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='overpass_bench_')
+    try:
+        with StubServer(OverpassStubHandler, latency=args.latency, fail_rate=args.fail_rate,
+                        campgrounds=args.campgrounds, max_elements=args.max_elements, max_in_flight=2) as server:
+            url = server.url('/api/interpreter')
+            cache = http_cache.HttpCache(os.path.join(work_dir, 'http'))
+            print(f"{args.campgrounds:,} camp sites, stub times out above {args.max_elements:,} per query")
+
+            # the old single query, same area filter and no bbox
+            single = campground_store.load_layer(url, {'data': SINGLE_QUERY}, cache=cache,
+                                                 path=os.path.join(work_dir, 'single.npy'),
+                                                 meta_path=os.path.join(work_dir, 'single.json'))
+            print(f"  {'single US query:':<26}{'failed' if single is None else f'{len(single):,} camp sites'}")
+
+            checkpoints = os.path.join(work_dir, 'tiles')
+            for label in ('tiled, cold:', 'tiled, from checkpoints:'):
+                before = server.request_count
+                t0 = time.perf_counter()
+                records = overpass_tiles.fetch_tiled(url, CAMPSITE_FILTER, concurrency=args.concurrency,
+                                                     cache=cache, checkpoint_dir=checkpoints, backoff=0.2, rounds=6)
+                elapsed = time.perf_counter() - t0
+                count = 'failed' if records is None else f"{len(records):,}"
+                print(f"  {label:<26}{count:>8} camp sites   {server.request_count - before:4d} requests   "
+                      f"{elapsed:6.2f} s")
+            if records is not None:
+                print(f"  every camp site once: {len(records) == args.campgrounds}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
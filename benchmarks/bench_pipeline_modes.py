@@ -0,0 +1,93 @@
+"""
+Benchmark: subprocess vs in-process pipeline
+Runs every run_all.py stage both ways on a throwaway copy of src/ and Data/
+(the real files are never touched) and reports per stage how much of the time
+went to starting an interpreter / importing pandas and re-reading + re-writing
+the master csv
+
+Unlike the other benchmarks this one needs the repo's Data/ folder, downloads
+that cant reach the network fall back to the files already on disk
+
+Usage:
+    python benchmarks/bench_pipeline_modes.py [--repeat 3]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def interpreter_startup(repeat):
+    """Seconds for a fresh python to start and import pandas + numpy (best of repeat)"""
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'import pandas, numpy'], check=True)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run_mode(run_all, in_process):
+    """{description: (status, seconds)} for one forced run of the whole graph"""
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        results = run_all.run_pipeline(run_all.STAGES, jobs=1, force=True, in_process=in_process)
+    return {description: (status, elapsed) for description, status, elapsed in results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3, help='runs per mode, the fastest is reported')
+    args = parser.parse_args()
+
+    startup = interpreter_startup(args.repeat)
+    print(f"fresh interpreter + import pandas/numpy: {startup:.2f} s (paid by every subprocess stage)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copytree(os.path.join(REPO, 'src'), os.path.join(tmp, 'src'),
+                        ignore=shutil.ignore_patterns('__pycache__'))
+        shutil.copytree(os.path.join(REPO, 'Data'), os.path.join(tmp, 'Data'),
+                        ignore=shutil.ignore_patterns('cache'))
+        # the http cache is worth keeping, its what lets the downloads run offline
+        if os.path.isdir(os.path.join(REPO, 'Data', 'cache')):
+            shutil.copytree(os.path.join(REPO, 'Data', 'cache'), os.path.join(tmp, 'Data', 'cache'))
+
+        cwd = os.getcwd()
+        os.chdir(os.path.join(tmp, 'src'))
+        sys.path.insert(0, os.getcwd())
+        try:
+            import run_all
+            best = {}
+            for mode, in_process in (('subprocess', False), ('in process', True)):
+                for _ in range(args.repeat):
+                    for description, (status, elapsed) in run_mode(run_all, in_process).items():
+                        key = (mode, description)
+                        if key not in best or elapsed < best[key][1]:
+                            best[key] = (status, elapsed)
+        finally:
+            os.chdir(cwd)
+
+    descriptions = [stage['description'] for stage in run_all.STAGES] + ['Write outputs']
+    print(f"\n  {'stage':<36} {'subprocess':>12} {'in process':>12} {'saved':>8}")
+    totals = [0.0, 0.0]
+    for description in descriptions:
+        sub = best.get(('subprocess', description), ('-', 0.0))
+        inp = best.get(('in process', description), ('-', 0.0))
+        totals[0] += sub[1]
+        totals[1] += inp[1]
+        flags = '' if sub[0] in ('ran', '-') and inp[0] in ('ran', '-') else f"  ({sub[0]} / {inp[0]})"
+        print(f"  {description:<36} {sub[1]:10.2f} s {inp[1]:10.2f} s {sub[1] - inp[1]:6.2f} s{flags}")
+    print(f"  {'total':<36} {totals[0]:10.2f} s {totals[1]:10.2f} s {totals[0] - totals[1]:6.2f} s")
+    print("\n'Write outputs' is the in process run writing each file once at the end, "
+          "subprocess stages write inside their own time")
+
+
+if __name__ == "__main__":
+    main()
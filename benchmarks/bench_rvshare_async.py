@@ -0,0 +1,72 @@
+"""
+Benchmark: RVshare collection throughput
+Runs the sequential collector and the asyncio collector against a local stub of
+the rv-rental.json endpoint (no network) and reports counties / requests per second
+
+Usage:
+    python benchmarks/bench_rvshare_async.py [--counties 200] [--latency 0.05] [--concurrency 16] [--rps 0]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from fetch_rvshare_api import collect_listings
+from rvshare_async import collect_listings_async
+from local_stub_server import StubServer, RVshareStubHandler
+
+
+def synthetic_counties(n, seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'GEOID': [f'{i:05d}' for i in range(n)],
+        'NAME': [f'County {i}' for i in range(n)],
+        'INTPTLAT': rng.uniform(25, 49, n),
+        'INTPTLONG': rng.uniform(-125, -67, n),
+    })
+
+
+def run(label, collect, df_geo, server):
+    before = server.request_count
+    saved = {}
+    save_search = lambda geoid, listings, finished: saved.update((rv['id'], rv) for rv in listings)
+    t0 = time.perf_counter()
+    collect(df_geo, save_search)
+    elapsed = time.perf_counter() - t0
+    n_requests = server.request_count - before
+    print(f"  {label:<8} {elapsed:8.2f} s   {len(df_geo) / elapsed:8.1f} counties/s   "
+          f"{n_requests / elapsed:8.1f} req/s   {len(saved):,} listings")
+    return elapsed, set(saved)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--counties', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.05, help='stub response delay in seconds')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='fraction of stub responses that are 503s')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--rps', type=float, default=0, help='async rate limit (0 = unlimited)')
+    parser.add_argument('--seed', type=int, default=480)
+    args = parser.parse_args()
+
+    df_geo = synthetic_counties(args.counties, args.seed)
+    print(f"{args.counties} counties, {args.latency * 1000:.0f} ms stub latency, "
+          f"concurrency {args.concurrency}, rps limit {args.rps or 'none'}")
+
+    with StubServer(RVshareStubHandler, latency=args.latency, fail_rate=args.fail_rate, seed=args.seed) as server:
+        url = server.url('/rv-rental.json')
+        t_sync, ids_sync = run('sync', lambda *a: collect_listings(*a, base_url=url), df_geo, server)
+        t_async, ids_async = run('async', lambda *a: collect_listings_async(
+            *a, base_url=url, concurrency=args.concurrency, requests_per_second=args.rps or None),
+            df_geo, server)
+
+    print(f"  speedup  {t_sync / t_async:8.1f}x   same listings: {ids_sync == ids_async}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+ACS Panel Builder
+Turns the multi-year ACS table downloads in Data/raw/ (the ACSDT5Y*/ACSST5Y*
+-Data.csv files for B25077, B01003, B08006 and S1901) into one long table
+- one row per (GeoID, year, variable), numeric value plus year over year growth
+- every file is parsed in parallel and only the GEO_ID + wanted estimate
+  columns are read (B08006 / S1901 are hundreds of columns wide)
+- the result is cached as parquet next to a list of the source file hashes
+  and the VARIABLES it was built with, it's only rebuilt when a source file
+  is added, removed or changed, or VARIABLES is edited
+
+    panel = acs_panel.load_panel()
+    acs_panel.wide(panel, 2023)   # GeoID x variable for one year
+"""
+
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+RAW_DIR = '../Data/raw'
+PANEL_FILE = '../Data/processed/acs_panel.parquet'
+PANEL_META = '../Data/processed/acs_panel.json'
+
+# ACS estimate column -> name used everywhere else (same names download_census_api gives them)
+VARIABLES = {
+    'B25077_001E': 'Median_Home_Value',
+    'B01003_001E': 'Population',
+    'B08006_001E': 'Total_Workers',
+    'B08006_017E': 'Worked_From_Home',
+    'S1901_C01_012E': 'Median_Household_Income',
+}
+
+# ACSDT5Y2023.B25077-Data.csv -> detailed table, 2023, B25077
+FILE_PATTERN = re.compile(r'ACS(?:DT|ST)5Y(\d{4})\.([A-Z]\d+)-Data\.csv$')
+
+
+def find_table_files(raw_dir=RAW_DIR):
+    """[(path, year, table)] for every ACS 5 year data csv one folder below raw_dir"""
+    found = []
+    for path in sorted(glob.glob(os.path.join(raw_dir, '*', 'ACS*5Y*-Data.csv'))):
+        match = FILE_PATTERN.search(os.path.basename(path))
+        if match:
+            found.append((path, int(match.group(1)), match.group(2)))
+    return found
+
+
+def parse_estimates(values):
+    """
+    ACS estimate strings to floats
+
+    '2,000,000+' / '250-' (top / bottom coded medians) keep their number,
+    '(X)', '-', 'N', '*****' and other annotations become NaN
+    """
+    cleaned = values.astype('string').str.replace(',', '', regex=False).str.rstrip('+-')
+    return pd.to_numeric(cleaned, errors='coerce').astype('float64')
+
+
+def geo_ids(geo_id):
+    """
+    GEO_ID to the GeoID the rest of the project uses
+
+    0500000US01001 -> 01001 (county FIPS), 0400000US01 -> 01, 0100000US -> US
+    """
+    codes = geo_id.astype('string').str.split('US', n=1).str[1]
+    return codes.mask(codes == '', 'US')
+
+
+def read_table_file(path, year, table, variables=VARIABLES):
+    """
+    Long frame (GeoID, year, variable, value) of the wanted columns in one file
+
+    Returns an empty frame if the file has none of them
+    """
+    # the header row tells us which wanted columns this table has
+    header = pd.read_csv(path, nrows=0, encoding='utf-8-sig').columns
+    wanted = [c for c in variables if c in header]
+    if not wanted:
+        return pd.DataFrame(columns=['GeoID', 'year', 'variable', 'value'])
+
+    # row 2 is the human readable label row, skip it
+    df = pd.read_csv(path, usecols=['GEO_ID'] + wanted, skiprows=[1], dtype=str,
+                     encoding='utf-8-sig')
+    long = df.melt(id_vars='GEO_ID', var_name='variable', value_name='value')
+    return pd.DataFrame({
+        'GeoID': geo_ids(long['GEO_ID']).to_numpy(),
+        'year': np.int16(year),
+        'variable': long['variable'].map(variables).to_numpy(),
+        'value': parse_estimates(long['value']).to_numpy(),
+    })
+
+
+def add_growth(panel):
+    """
+    yoy_growth_pct = % change from the previous year for the same GeoID + variable
+
+    One sort and a shift over the whole table, NaN where the previous year is
+    missing (first year, or a gap)
+    """
+    panel = panel.sort_values(['variable', 'GeoID', 'year'], ignore_index=True)
+    value = panel['value'].to_numpy()
+    year = panel['year'].to_numpy()
+    same_series = ((panel['GeoID'].to_numpy()[1:] == panel['GeoID'].to_numpy()[:-1]) &
+                   (panel['variable'].to_numpy()[1:] == panel['variable'].to_numpy()[:-1]) &
+                   (year[1:] == year[:-1] + 1))
+
+    growth = np.full(len(panel), np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change = (value[1:] / value[:-1] - 1) * 100
+    growth[1:] = np.where(same_series & (value[:-1] != 0), change, np.nan)
+    panel['yoy_growth_pct'] = growth
+    return panel
+
+
+def add_remote_work(panel):
+    """Remote_Work_Pct rows from Worked_From_Home / Total_Workers for each GeoID + year"""
+    parts = panel[panel['variable'].isin(['Worked_From_Home', 'Total_Workers'])]
+    if parts.empty:
+        return panel
+    wide_parts = parts.pivot_table(index=['GeoID', 'year'], columns='variable', values='value', aggfunc='first')
+    if not {'Worked_From_Home', 'Total_Workers'} <= set(wide_parts.columns):
+        return panel
+    pct = (wide_parts['Worked_From_Home'] / wide_parts['Total_Workers'] * 100).rename('value').reset_index()
+    pct['variable'] = 'Remote_Work_Pct'
+    return pd.concat([panel, pct[panel.columns]], ignore_index=True)
+
+
+def build_panel(raw_dir=RAW_DIR, variables=VARIABLES, workers=8):
+    """
+    Parse every ACS table file under raw_dir into the long panel
+
+    Args:
+        raw_dir: folder holding the census.gov table folders
+        variables: estimate column -> variable name
+        workers: files parsed at once (the csv parser does its work outside the GIL)
+
+    Returns:
+        DataFrame GeoID (category), year (int16), variable (category), value,
+        yoy_growth_pct
+    """
+    files = find_table_files(raw_dir)
+    if not files:
+        print(f"No ACS table files found under {raw_dir}")
+        return None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        parts = list(pool.map(lambda f: read_table_file(*f, variables=variables), files))
+    parts = [p for p in parts if not p.empty]
+    if not parts:
+        print(f"None of the ACS table files under {raw_dir} have the wanted estimate columns")
+        return None
+    panel = pd.concat(parts, ignore_index=True)
+    # the same table can be downloaded twice (two folders), keep one copy
+    panel = panel.drop_duplicates(['GeoID', 'year', 'variable'], keep='last')
+    panel = add_growth(add_remote_work(panel))
+    panel['GeoID'] = panel['GeoID'].astype('category')
+    panel['variable'] = panel['variable'].astype('category')
+    panel['year'] = panel['year'].astype('int16')
+    return panel
+
+
+def source_signature(raw_dir=RAW_DIR):
+    """relative path -> sha256 of every table file the panel is built from"""
+    signature = {}
+    for path, _, _ in find_table_files(raw_dir):
+        with open(path, 'rb') as f:
+            signature[os.path.relpath(path, raw_dir)] = hashlib.sha256(f.read()).hexdigest()
+    return signature
+
+
+def panel_is_current(signature, path=PANEL_FILE, meta_path=PANEL_META):
+    """True if the cached panel was built from these source files with the current VARIABLES"""
+    if not (os.path.exists(path) and os.path.exists(meta_path)):
+        return False
+    try:
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return meta.get('sources') == signature and meta.get('variables') == VARIABLES
+
+
+def load_panel(raw_dir=RAW_DIR, path=PANEL_FILE, meta_path=PANEL_META, refresh=False):
+    """
+    Cached panel, rebuilt (and re-cached) when the source files or VARIABLES changed
+
+    Args:
+        refresh: rebuild even if the cache looks current
+    """
+    signature = source_signature(raw_dir)
+    if not refresh and panel_is_current(signature, path, meta_path):
+        return pd.read_parquet(path)
+
+    panel = build_panel(raw_dir)
+    if panel is None:
+        return None
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # write then rename so a half written cache is never picked up
+    panel.to_parquet(path + '.tmp', index=False)
+    os.replace(path + '.tmp', path)
+    with open(meta_path + '.tmp', 'w') as f:
+        json.dump({'sources': signature, 'variables': VARIABLES}, f, indent=1)
+    os.replace(meta_path + '.tmp', meta_path)
+    return panel
+
+
+def wide(panel, year=None, value='value'):
+    """
+    GeoID x variable table (one year, or GeoID/year rows if year is None)
+
+    Args:
+        value: 'value' or 'yoy_growth_pct'
+    """
+    if year is not None:
+        panel = panel[panel['year'] == year]
+        index = 'GeoID'
+    else:
+        index = ['GeoID', 'year']
+    return panel.pivot_table(index=index, columns='variable', values=value, aggfunc='first', observed=True)
+
+
+if __name__ == "__main__":
+    t0 = time.perf_counter()
+    panel = load_panel(refresh='--refresh' in sys.argv)
+    if panel is None:
+        sys.exit(1)
+    print(f"{len(panel):,} rows, {panel['GeoID'].nunique():,} geographies, "
+          f"years {panel['year'].min()}-{panel['year'].max()}, {time.perf_counter() - t0:.2f}s")
+    print(wide(panel).tail(10))
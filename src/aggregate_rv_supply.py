@@ -0,0 +1,217 @@
+"""
+RV Rental Supply Aggregates
+Rolls the geocoded RVshare listings up to the county master dataset so the
+rental supply can sit next to the H-series predictors
+- per county (the GeoID geocode_listings put each listing in): RV_Listings,
+  RV_Median_Price, RV_P90_Price and the share of listings with a bathroom,
+  a generator and instant booking
+- per radius around each county centroid: the same columns with a
+  _Within_<N>mi suffix, so counties with no listing of their own still see
+  the rentals next door
+- one SphereIndex radius search at the largest radius finds every
+  county / listing pair, each radius is then one groupby over the pairs
+  inside it (no counties x listings distance matrix)
+- only counties whose centroid is within the search distance of a search
+  the collector actually ran get values (RV_Search_Covered), there a county
+  without listings gets a count of 0 and NaN prices / shares, everywhere
+  else every RV_ column is NaN (never searched is not the same as no rentals)
+
+    python aggregate_rv_supply.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import gazetteer
+import geo_kernels
+import master_store
+from geo_index import SphereIndex
+from geocode_listings import OUTPUT_FILE as GEOCODED_FILE
+from listing_store import ListingStore, STORE_FILE
+from plan_rvshare_queries import SEARCH_DISTANCE
+
+RADII_MILES = (25, 50)
+
+# bool column marking the counties the searches reached
+COVERED_COLUMN = 'RV_Search_Covered'
+
+# listing column -> share column suffix
+AMENITIES = {
+    'has_bathroom': 'Bathroom_Share',
+    'has_generator': 'Generator_Share',
+    'is_instant_book': 'Instant_Book_Share',
+}
+
+
+def prepare_listings(df):
+    """Listing coordinates, nightly price (NaN unless > 0) and 0/1 amenity flags"""
+    price = pd.to_numeric(df['price_nightly'], errors='coerce')
+    listings = pd.DataFrame({
+        'GeoID': df['GeoID'].astype('string').str.zfill(5) if 'GeoID' in df.columns else pd.NA,
+        'lat': pd.to_numeric(df['lat'], errors='coerce'),
+        'lng': pd.to_numeric(df['lng'], errors='coerce'),
+        'price': price.where(price > 0),
+    })
+    for col in AMENITIES:
+        if col in df.columns:
+            # is_instant_book comes back from the csv as True/False strings
+            flag = df[col].replace({'True': 1, 'False': 0, True: 1, False: 0})
+            listings[col] = pd.to_numeric(flag, errors='coerce')
+    return listings
+
+
+def summarize(listings, keys, suffix=''):
+    """
+    One groupby of listings on keys -> count, median / p90 price and amenity shares
+
+    Args:
+        listings: prepare_listings() rows (repeated once per county they count for)
+        keys: group key for each row
+        suffix: appended to every column name
+
+    Returns:
+        DataFrame indexed by key
+    """
+    grouped = listings.groupby(np.asarray(keys), sort=False)
+    out = pd.DataFrame({f'RV_Listings{suffix}': grouped.size()})
+    prices = grouped['price'].quantile([0.5, 0.9]).unstack().reindex(columns=[0.5, 0.9])
+    out[f'RV_Median_Price{suffix}'] = prices[0.5]
+    out[f'RV_P90_Price{suffix}'] = prices[0.9]
+    for col, name in AMENITIES.items():
+        if col in listings.columns:
+            out[f'RV_{name}{suffix}'] = grouped[col].mean()
+    return out
+
+
+def search_centers(df_listings, gaz, store_path=STORE_FILE):
+    """
+    Gazetteer rows of the points the collector searched from (counties or cover centers)
+
+    The listing store's checkpoints have every finished search, the ones that
+    found nothing included. Without the store they're inferred from the
+    listings' search_county names (the county of that name nearest the
+    listing), which misses searches that turned up no new listing
+    """
+    if os.path.exists(store_path):
+        with ListingStore(store_path) as store:
+            rows = gazetteer.rows_for(gaz, sorted(store.done_keys()))
+        return np.unique(rows[rows >= 0])
+
+    names = np.asarray(gaz['NAME'])
+    found = []
+    located = df_listings.dropna(subset=['lat', 'lng', 'search_county'])
+    for name, group in located.groupby('search_county'):
+        candidates = np.flatnonzero(names == name)
+        if not len(candidates):
+            continue
+        # a name like Washington County is in 30 states, take the one the listing is near
+        miles = geo_kernels.pairwise(group['lat'].values, group['lng'].values,
+                                     gaz['INTPTLAT'][candidates], gaz['INTPTLONG'][candidates])
+        found.append(candidates[miles.argmin(axis=1)])
+    return np.unique(np.concatenate(found)) if found else np.empty(0, dtype=np.int64)
+
+
+def search_coverage(county_lat, county_lon, center_lat, center_lon, distance=SEARCH_DISTANCE):
+    """True for the counties whose centroid is within distance miles of a search center"""
+    if not len(center_lat):
+        return np.zeros(len(county_lat), dtype=bool)
+    miles, _ = SphereIndex(center_lat, center_lon).query_nearest(county_lat, county_lon)
+    return miles <= distance  # NaN (no coordinates) is never covered
+
+
+def radius_supply(county_lat, county_lon, listings, radii_miles=RADII_MILES):
+    """
+    Listing aggregates within each radius of every county centroid
+
+    Args:
+        county_lat, county_lon: (n,) county centroids
+        listings: prepare_listings() frame
+        radii_miles: radii, each adds a set of _Within_<N>mi columns
+
+    Returns:
+        DataFrame with n rows (positional, same order as the counties)
+    """
+    index = SphereIndex(listings['lat'].values, listings['lng'].values)
+    county_idx, listing_idx, miles = index.query_radius_pairs(county_lat, county_lon, max(radii_miles))
+    pairs = listings.iloc[listing_idx].reset_index(drop=True)
+
+    parts = []
+    for r in radii_miles:
+        inside = miles <= r
+        parts.append(summarize(pairs[inside], county_idx[inside], f'_Within_{r}mi'))
+    return pd.concat(parts, axis=1).reindex(np.arange(len(county_lat)))
+
+
+def aggregate_rv_supply(df_master=None, df_listings=None, radii_miles=RADII_MILES, save=True):
+    """
+    Add the RV_ supply columns to the master dataset
+
+    Args:
+        df_master: master frame (None = read it from disk)
+        df_listings: geocoded listings (None = read rvshare_listings_geocoded.csv)
+        radii_miles: radii for the _Within_<N>mi columns
+        save: write the master dataset back out
+
+    Returns:
+        the updated master DataFrame (None on error)
+    """
+    if df_listings is None:
+        if not os.path.exists(GEOCODED_FILE):
+            print(f"Error: {GEOCODED_FILE} not found. Run geocode_listings.py first.")
+            return None
+        df_listings = pd.read_csv(GEOCODED_FILE, dtype={'GeoID': str})
+    if df_master is None:
+        if not master_store.master_exists():
+            print("Error: Master dataset not found.")
+            return None
+        df_master = master_store.read_master()
+    if 'County_Lat' not in df_master.columns:
+        print("Warning: County_Lat not found in master. Run calculate_park_distance.py first.")
+        return None
+
+    gaz = gazetteer.load()
+    if gaz is None:
+        print("Error: Gazetteer text file not found. Run download_land_area.py first.")
+        return None
+
+    t0 = time.perf_counter()
+    listings = prepare_listings(df_listings)
+    # reruns replace the old columns instead of adding _x / _y copies
+    df_master = df_master.drop(columns=[c for c in df_master.columns if c.startswith(master_store.RV_PREFIX)])
+
+    own = summarize(listings[listings['GeoID'].notna()], listings['GeoID'].dropna())
+    df_master = df_master.merge(own, left_on='GeoID', right_index=True, how='left')
+    nearby = radius_supply(df_master['County_Lat'].values, df_master['County_Lon'].values, listings, radii_miles)
+    nearby.index = df_master.index
+    df_master = pd.concat([df_master, nearby], axis=1)
+
+    # a zero only means something where a search could have found a listing
+    centers = search_centers(df_listings, gaz)
+    covered = search_coverage(df_master['County_Lat'].values, df_master['County_Lon'].values,
+                              gaz['INTPTLAT'][centers], gaz['INTPTLONG'][centers])
+    rv_cols = [c for c in df_master.columns if c.startswith(master_store.RV_PREFIX)]
+    count_cols = [c for c in rv_cols if c.startswith('RV_Listings')]
+    df_master.loc[covered, count_cols] = df_master.loc[covered, count_cols].fillna(0)
+    df_master.loc[~covered, rv_cols] = np.nan
+    df_master[COVERED_COLUMN] = covered
+
+    print(f"Aggregated {len(listings):,} listings onto {len(df_master):,} counties "
+          f"({', '.join(str(r) for r in radii_miles)} mile radii) in {time.perf_counter() - t0:.2f}s")
+    print(f"  {covered.sum():,} counties within {SEARCH_DISTANCE} miles of one of {len(centers):,} searches, "
+          f"the rest are left NaN")
+    for col in count_cols:
+        print(f"  {col}: {(df_master[col] > 0).sum():,} counties with at least one listing")
+
+    if save:
+        df_master = master_store.write_master(df_master)
+        print(f"Saved updated dataset with RV supply to {master_store.MASTER_FILE}")
+    return df_master
+
+
+if __name__ == "__main__":
+    if aggregate_rv_supply() is None:
+        sys.exit(1)
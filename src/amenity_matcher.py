@@ -0,0 +1,151 @@
+"""
+Amenity Matcher
+Turns free text amenity lists into has_* flags with one compiled regex
+- every keyword of every feature sits in one alternation, each feature is a
+  named group so a match says which flag it sets
+- keywords only match as whole words (optionally plural), so 'ac' no longer
+  fires inside 'back' or 'vacuum' and 'range' no longer inside 'orange'
+- a text is scanned once no matter how many features there are, whole columns
+  are scanned as one joined string
+- used by the scraper (one listing at a time, SCRAPER_KEYWORDS) and
+  process_rvshare_clean (whole columns, AMENITY_KEYWORDS)
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+# feature -> keywords (matched case insensitive as whole words), the lists
+# process_rvshare_clean has always had plus the compounds its substring test
+# used to catch (showerhead, stovetop, hdtv), solar / backup camera are scraper only
+AMENITY_KEYWORDS = {
+    # bathroom
+    'has_shower': ['shower', 'showerhead'],
+    'has_toilet': ['toilet'],
+    'has_bathroom_sink': ['bathroom sink'],
+
+    # kitchen
+    'has_refrigerator': ['refrigerator', 'fridge'],
+    'has_microwave': ['microwave'],
+    'has_kitchen_sink': ['kitchen sink'],
+    'has_stove': ['range', 'stove', 'range (stove)', 'stovetop'],
+    'has_oven': ['oven'],
+
+    # entertainment
+    'has_tv': ['tv', 'hdtv', 'television'],
+    'has_dvd_player': ['dvd player', 'dvd'],
+    'has_radio': ['am/fm radio', 'radio', 'am/fm'],
+    'has_cd_player': ['cd player'],
+    'has_bluetooth': ['bluetooth', 'ipod docking station'],
+
+    # climate
+    'has_ac': ['air conditioning', 'roof air conditioning', 'in dash air conditioning', 'a/c', 'ac'],
+    'has_heating': ['heating', 'furnace', 'hot & cold water supply'],
+
+    # other
+    'has_slide_out': ['slide out', 'slideout'],
+    'has_generator': ['generator'],
+    'has_awning': ['awning'],
+    'has_solar': ['solar'],
+    'has_backup_camera': ['backup camera', 'back up camera', 'rear camera'],
+}
+
+# the scraper always counted anything with 'heat' in it as heating, and takes
+# a cooktop for a stove, process_rvshare_clean never did so they stay out of its lists
+SCRAPER_EXTRA_KEYWORDS = {
+    'has_stove': ['cooktop'],
+    'has_heating': ['heat', 'heater', 'heated', 'heat pump'],
+}
+SCRAPER_KEYWORDS = {feature: words + SCRAPER_EXTRA_KEYWORDS.get(feature, [])
+                    for feature, words in AMENITY_KEYWORDS.items()}
+
+
+def build_pattern(keywords):
+    """
+    One regex with a named group per feature, longest keywords tried first
+
+    Matched against lowercased text (cheaper than re.IGNORECASE), the leading
+    lookahead on the keywords' first letters lets most positions fail before
+    the alternation is tried
+    """
+    groups = []
+    first_letters = set()
+    for feature, words in keywords.items():
+        words = sorted({w.lower() for w in words}, key=len, reverse=True)
+        first_letters.update(w[0] for w in words)
+        groups.append(f"(?P<{feature}>{'|'.join(re.escape(w) for w in words)})")
+    guard = '(?=[' + ''.join(re.escape(c) for c in sorted(first_letters)) + '])'
+    # letters/digits on either side means it's part of a longer word, a trailing s is a plural
+    return re.compile(guard + r'(?<![a-z0-9])(?:' + '|'.join(groups) + r')s?(?![a-z0-9])')
+
+
+class AmenityMatcher:
+    """
+    Args:
+        features: subset of AMENITY_KEYWORDS to look for (None = all of them)
+        keywords: feature -> keyword list to use instead of AMENITY_KEYWORDS
+    """
+
+    def __init__(self, features=None, keywords=None):
+        keywords = AMENITY_KEYWORDS if keywords is None else keywords
+        if features is not None:
+            keywords = {f: keywords[f] for f in features}
+        self.features = list(keywords)
+        self.pattern = build_pattern(keywords)
+
+    def match(self, text):
+        """Set of features found in one text"""
+        if not isinstance(text, str):
+            return set()
+        return {m.lastgroup for m in self.pattern.finditer(text.lower())}
+
+    def flags(self, text):
+        """feature -> 1/0 for one text (what the scraper stores on an item)"""
+        found = self.match(text)
+        return {feature: int(feature in found) for feature in self.features}
+
+    def match_matrix(self, texts, chunk_size=100000):
+        """
+        (len(texts), len(features)) boolean matrix
+
+        Texts are joined into one string per chunk and scanned with a single
+        finditer, each hit is mapped back to its row from the text offsets
+        (much cheaper than starting a scan per row)
+
+        Args:
+            texts: iterable of strings (non strings count as no amenities)
+            chunk_size: texts joined per scan (bounds memory)
+        """
+        # lowercase each text before measuring it (lower() can change the length of some characters)
+        texts = [t.lower() if isinstance(t, str) else '' for t in texts]
+        matrix = np.zeros((len(texts), len(self.features)), dtype=bool)
+        finditer = self.pattern.finditer
+
+        for start in range(0, len(texts), chunk_size):
+            chunk = texts[start:start + chunk_size]
+            # offset where each text (plus its newline) ends in the joined string
+            ends = np.cumsum(np.fromiter(map(len, chunk), dtype=np.int64, count=len(chunk)) + 1)
+            hits = np.array([(m.start(), m.lastindex) for m in finditer('\n'.join(chunk))],
+                            dtype=np.int64).reshape(-1, 2)
+            rows = np.searchsorted(ends, hits[:, 0], side='right')
+            # group numbers follow the feature order (1 = first feature)
+            matrix[start + rows, hits[:, 1] - 1] = True
+        return matrix
+
+    def frame(self, texts, index=None):
+        """DataFrame of 0/1 int8 flag columns"""
+        if index is None and isinstance(texts, pd.Series):
+            index = texts.index
+        return pd.DataFrame(self.match_matrix(texts).astype(np.int8), columns=self.features, index=index)
+
+
+_scraper_matcher = None
+
+
+def scraper_matcher():
+    """Matcher over every SCRAPER_KEYWORDS feature (compiled once)"""
+    global _scraper_matcher
+    if _scraper_matcher is None:
+        _scraper_matcher = AmenityMatcher(keywords=SCRAPER_KEYWORDS)
+    return _scraper_matcher
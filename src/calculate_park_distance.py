@@ -1,56 +1,47 @@
 import pandas as pd
 import numpy as np
-import glob
 import os
-from math import radians, cos, sin, asin, sqrt
+import sys
+import time
+from geo_index import SphereIndex
+import master_store
+import gazetteer
 
-def haversine(lon1, lat1, lon2, lat2):
-    # calculate great circle distance between two points on the earth specified in decimal degrees
-    
-    # convert decimal degrees to radians 
-    lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
+def calculate_park_distance(df_master=None, save=True, boundaries=False):
+    """
+    Add County_Lat/Lon, Distance_to_Park_Miles and Nearest_Park to the master dataset
 
-    # haversine formula 
-    dlon = lon2 - lon1 
-    dlat = lat2 - lat1 
-    # i know random trig from developing so many games without an engine 
-    # I know this is probably overkill 
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * asin(sqrt(a)) 
-    r = 3956 # radius of earth in miles
-    return c * r
+    Args:
+        df_master: master frame from clean_data (None = read it from disk)
+        save: write the master csv back out
+        boundaries: also add Park_Boundary_Distance_Miles / Nearest_Park_Boundary,
+                    the distance to the nearest park edge (needs the NPS boundary
+                    shapefile and geopandas, see park_boundaries.py)
 
-def calculate_park_distance():
+    Returns:
+        the updated master DataFrame (None on error)
+    """
 
     # load master dataset
-    master_file = '../Data/processed/master_dataset_powerbi.csv'
-    if not os.path.exists(master_file):
-        print("Error: Master dataset not found. Run clean_data.py first.")
-        return
-    
-    df_master = pd.read_csv(master_file)
-    df_master['GeoID'] = df_master['GeoID'].astype(str).str.zfill(5)
+    if df_master is None:
+        if not master_store.master_exists():
+            print("Error: Master dataset not found. Run clean_data.py first.")
+            return
+        df_master = master_store.read_master()
     print(f"Loaded {len(df_master)} counties from master dataset.")
 
     # load county coordinates gazetteer (a word a learned for just geo dictionary)
-    gazetteer_files = glob.glob('../Data/raw/gazetteer/*.txt')
-    if not gazetteer_files:
+    # parsed once into a cached array by gazetteer.py, this just memory maps it
+    gaz = gazetteer.load()
+    if gaz is None:
         print("Error: Gazetteer text file not found.")
         return
-    
-    print(f"Loading coordinates from {gazetteer_files[0]}...")
-    # gazetteer is usually tab separated iso-8859-1 (sorry i am always on random platforms)
-    df_geo = pd.read_csv(gazetteer_files[0], sep='\t', encoding='ISO-8859-1', dtype={'GEOID': str})
-    df_geo.columns = [c.strip() for c in df_geo.columns] # clean whitespace from headers
-    
-    if 'INTPTLAT' not in df_geo.columns or 'INTPTLONG' not in df_geo.columns:
-        print("Error: Lat/Long columns not found in Gazetteer.")
-        return
 
-    df_geo = df_geo[['GEOID', 'INTPTLAT', 'INTPTLONG']].copy()
+    df_geo = gazetteer.to_frame(gaz, ['GEOID', 'INTPTLAT', 'INTPTLONG'])
     df_geo.rename(columns={'GEOID': 'GeoID', 'INTPTLAT': 'County_Lat', 'INTPTLONG': 'County_Lon'}, inplace=True)
     
-    # merge coordinates into master
+    # merge coordinates into master (drop coords from an earlier run so reruns dont get _x _y columns)
+    df_master = df_master.drop(columns=['County_Lat', 'County_Lon'], errors='ignore')
     df_master = df_master.merge(df_geo, on='GeoID', how='left')
     print(f"Merged coordinates. Missing coords: {df_master['County_Lat'].isna().sum()}")
 
@@ -64,62 +55,55 @@ def calculate_park_distance():
     print(f"Loaded {len(df_parks)} National Parks.")
 
     # calculate distances
-    print("Calculating distances (this might take a moment)...")
+    print("Calculating distances...")
     
-    # prepare arrays for vectorization or efficient looping
-    # since we have 3000 counties and 60 parks a nested loop is fine 180000 ops is instant
+    # build the index once over the parks and answer every county in one batched query
+    # (the old per county loop recomputed radians for every park on every row)
+    park_index = SphereIndex(df_parks['Lat'].values, df_parks['Lon'].values)
+    min_distances, park_idx = park_index.query_nearest(df_master['County_Lat'].values,
+                                                       df_master['County_Lon'].values)
     
-    min_distances = []
-    nearest_parks = []
-
-    park_lats = df_parks['Lat'].values
-    park_lons = df_parks['Lon'].values
     park_names = df_parks['Name'].values
-    
-    for idx, row in df_master.iterrows():
-        c_lat = row['County_Lat']
-        c_lon = row['County_Lon']
-        
-        if pd.isna(c_lat) or pd.isna(c_lon):
-            min_distances.append(np.nan)
-            nearest_parks.append(None)
-            continue
-            
-        # vectorized haversine for one county vs all parks
-        # its cleaner to just loop or use a ckdtree but lets stick to simple loop for clarity if needed
-        # but actually numpy vectorization is better (this is way to complicated )
-        
-        # convert single point to radians
-        lat1, lon1 = map(radians, [c_lat, c_lon])
-        
-        # convert all parks to radians
-        lat2 = np.radians(park_lats)
-        lon2 = np.radians(park_lons)
-        
-        dlon = lon2 - lon1
-        dlat = lat2 - lat1
-        
-        a = np.sin(dlat/2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon/2)**2
-        c = 2 * np.arcsin(np.sqrt(a))
-        r = 3956
-        dist_miles = c * r
-        
-        # find min
-        min_idx = np.argmin(dist_miles)
-        min_distances.append(dist_miles[min_idx])
-        nearest_parks.append(park_names[min_idx])
-        
-        if idx % 500 == 0:
-            print(f"  Processed {idx} counties...")
+    nearest_parks = np.where(park_idx >= 0, park_names[np.maximum(park_idx, 0)], None)
 
     df_master['Distance_to_Park_Miles'] = min_distances
     df_master['Nearest_Park'] = nearest_parks
 
+    if boundaries:
+        df_master = add_boundary_distances(df_master)
+
     # 5. save
-    df_master.to_csv(master_file, index=False)
-    print(f"Saved updated dataset with Park Distances to {master_file}")
+    if save:
+        df_master = master_store.write_master(df_master)
+        print(f"Saved updated dataset with Park Distances to {master_store.MASTER_FILE}")
     print(df_master[['GeoID_Name', 'Distance_to_Park_Miles', 'Nearest_Park']].head())
+    if 'Park_Boundary_Distance_Miles' in df_master.columns:
+        print(df_master[['GeoID_Name', 'Park_Boundary_Distance_Miles', 'Nearest_Park_Boundary']].head())
+    return df_master
+
+def add_boundary_distances(df_master):
+    """Distance to the nearest park polygon, the point distances stay as they are if that cant run"""
+    try:
+        import park_boundaries
+    except ImportError as e:
+        print(f"Warning: boundary distances need geopandas / shapely ({e}), keeping point distances only.")
+        return df_master
+    if not park_boundaries.boundary_file_exists():
+        # only the shapefile's .xml metadata is checked in, the shapes come from the NPS data store
+        print(f"Warning: {park_boundaries.BOUNDARY_FILE} not found, keeping point distances only.")
+        return df_master
+
+    t0 = time.perf_counter()
+    parks = park_boundaries.load_boundaries()
+    miles, names = park_boundaries.boundary_distances(df_master['County_Lat'].values, df_master['County_Lon'].values,
+                                                      df_master['GeoID'].astype('string').str[:2].values, parks)
+    df_master['Park_Boundary_Distance_Miles'] = miles
+    df_master['Nearest_Park_Boundary'] = names
+    print(f"Boundary distances for {np.isfinite(miles).sum()} counties in {time.perf_counter() - t0:.1f}s "
+          f"(inside a park: {(miles == 0).sum()})")
+    return df_master
 
 if __name__ == "__main__":
-    calculate_park_distance()
+    if calculate_park_distance(boundaries='--boundaries' in sys.argv) is None:
+        sys.exit(1)
 
@@ -0,0 +1,253 @@
+"""
+Campground Layer Store
+Turns the Overpass tourism=camp_site response into one compact numpy record
+array and keeps it on disk so later runs just memory map it
+- the response is parsed as a stream, one element at a time with the json
+  decoder's raw_decode, so the full element list is never built as python dicts
+- only type, id, lat/lon (the center for ways / relations) and a few RV
+  relevant tags are kept, in a preallocated array that doubles when full
+- records are sorted by (type, id) with duplicates dropped, that order is the
+  id index (find() is a binary search)
+- saved as a .npy next to a small json with the sha256 of the response it came
+  from, it's only rebuilt when the cached response changes
+
+    layer = campground_store.load_layer(url, params)
+    layer['lat'], layer['lon']
+"""
+
+import codecs
+import hashlib
+import io
+import json
+import os
+import re
+import time
+
+import numpy as np
+
+import http_cache
+
+LAYER_FILE = '../Data/processed/osm_campgrounds.npy'
+LAYER_META = '../Data/processed/osm_campgrounds.json'
+
+OSM_TYPES = {'node': 0, 'way': 1, 'relation': 2}
+
+# osm tag -> column, stored as 1 = yes, 0 = no, -1 = not tagged / anything else
+FLAG_TAGS = {
+    'caravans': 'caravans',      # rvs / trailers allowed
+    'tents': 'tents',
+    'fee': 'fee',
+    'backcountry': 'backcountry',
+}
+
+# float32 keeps coordinates to about a meter, plenty for radius counts
+CAMPGROUND_DTYPE = np.dtype([('type', 'u1'), ('id', '<i8'), ('lat', '<f4'), ('lon', '<f4')] +
+                            [(col, 'i1') for col in FLAG_TAGS.values()])
+
+_FLAG_VALUES = {'yes': 1, 'no': 0}
+# whitespace and the commas between elements
+_SEPARATORS = re.compile(r'[\s,]*')
+_REMARK = re.compile(rb'"remark"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+
+def overpass_error(content):
+    """
+    The error remark of a 200 response that isn't a real answer (the query
+    timed out or ran out of memory on the server), None for a good response
+    """
+    # overpass puts the remark after the elements
+    remark = _REMARK.search(content[-2000:])
+    if remark and b'error' in remark.group(1):
+        return remark.group(1).decode('utf-8', errors='replace')
+    return None
+
+
+def iter_elements(stream, chunk_size=1 << 20):
+    """
+    Yield the objects in an Overpass response's "elements" list one at a time
+
+    Args:
+        stream: binary file object holding the response body
+        chunk_size: bytes read per step
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    buf = ''
+    pos = None  # None until we're inside the elements list
+    eof = False
+
+    while True:
+        if not eof:
+            chunk = stream.read(chunk_size)
+            eof = not chunk
+            buf += utf8.decode(chunk, final=eof)
+
+        if pos is None:
+            start = buf.find('"elements"')
+            bracket = buf.find('[', start) if start >= 0 else -1
+            if bracket < 0:
+                if eof:
+                    return  # error responses have no elements list
+                continue
+            pos = bracket + 1
+
+        while True:
+            pos = _SEPARATORS.match(buf, pos).end()
+            if pos < len(buf) and buf[pos] == ']':
+                return
+            try:
+                element, pos = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                break  # element cut off at the end of the chunk, read more
+            yield element
+
+        # drop what's been parsed so the buffer stays around one chunk
+        buf = buf[pos:]
+        pos = 0
+
+
+def elements_to_array(elements, capacity=1 << 16):
+    """
+    Records for every element that has a location
+
+    Args:
+        elements: iterable of Overpass element dicts
+        capacity: starting size of the preallocated array
+
+    Returns:
+        CAMPGROUND_DTYPE array in response order
+    """
+    out = np.empty(capacity, dtype=CAMPGROUND_DTYPE)
+    n = 0
+    for el in elements:
+        lat = el.get('lat')
+        lon = el.get('lon')
+        # ways / relations come with a center instead
+        if lat is None and 'center' in el:
+            lat = el['center'].get('lat')
+            lon = el['center'].get('lon')
+        if lat is None or lon is None:
+            continue
+
+        if n == len(out):
+            out = np.resize(out, 2 * len(out))
+        tags = el.get('tags', {})
+        out[n] = ((OSM_TYPES.get(el.get('type'), 0), el['id'], lat, lon) +
+                  tuple(_FLAG_VALUES.get(tags.get(tag), -1) for tag in FLAG_TAGS))
+        n += 1
+    return out[:n].copy()
+
+
+def build_layer(stream):
+    """Parse a response stream into records sorted by (type, id), duplicates dropped"""
+    return sort_unique(elements_to_array(iter_elements(stream)))
+
+
+def sort_unique(records):
+    """Records sorted by (type, id), keeping the first copy of each"""
+    records = records[np.lexsort((records['id'], records['type']))]
+    if len(records):
+        first = np.ones(len(records), dtype=bool)
+        first[1:] = (records['type'][1:] != records['type'][:-1]) | (records['id'][1:] != records['id'][:-1])
+        records = records[first]
+    return records
+
+
+def save_layer(records, source_sha256, path=LAYER_FILE, meta_path=LAYER_META):
+    """Write the records and the sha256 of the response they came from"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # write then rename so a half written file is never opened
+    with open(path + '.tmp', 'wb') as f:
+        np.save(f, records)
+    os.replace(path + '.tmp', path)
+    with open(meta_path + '.tmp', 'w') as f:
+        json.dump({'source_sha256': source_sha256, 'records': len(records),
+                   'tags': list(FLAG_TAGS)}, f, indent=1)
+    os.replace(meta_path + '.tmp', meta_path)
+
+
+def open_layer(path=LAYER_FILE):
+    """Memory mapped records (read only)"""
+    return np.load(path, mmap_mode='r')
+
+
+def layer_is_current(source_sha256, path=LAYER_FILE, meta_path=LAYER_META):
+    """True if the saved layer was built from the response with this sha256"""
+    if not (os.path.exists(path) and os.path.exists(meta_path)):
+        return False
+    try:
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return meta.get('source_sha256') == source_sha256 and meta.get('tags') == list(FLAG_TAGS)
+
+
+def find(layer, osm_type, osm_ids):
+    """
+    Row of each (type, id) in the layer, -1 where it isn't there
+
+    Args:
+        layer: records from open_layer / build_layer
+        osm_type: 'node', 'way' or 'relation'
+        osm_ids: one id or an array of them
+    """
+    code = OSM_TYPES[osm_type]
+    lo, hi = np.searchsorted(layer['type'], [code, code + 1])
+    ids = np.asarray(layer['id'][lo:hi])
+    wanted = np.atleast_1d(np.asarray(osm_ids, dtype='int64'))
+    pos = np.searchsorted(ids, wanted)
+    found = pos < len(ids)
+    found[found] = ids[pos[found]] == wanted[found]
+    return np.where(found, lo + pos, -1)
+
+
+def load_layer(url, params=None, ttl=30 * http_cache.DAY, cache=None, path=LAYER_FILE,
+               meta_path=LAYER_META, refresh=False):
+    """
+    Campground records for an Overpass query, parsed once per response
+
+    When the cached response is still fresh and the layer was built from it,
+    this is one memory map and never reads the response body
+
+    Args:
+        url, params: the Overpass request
+        ttl: seconds the cached response is trusted
+        cache: HttpCache (default: the shared one)
+        refresh: rebuild the layer even if it looks current
+
+    Returns:
+        memory mapped CAMPGROUND_DTYPE array (None if the request failed)
+    """
+    cache = cache or http_cache.default_cache()
+    entry = cache.entry(url, params, ttl)
+    if not refresh and entry is not None and layer_is_current(entry['body_sha256'], path, meta_path):
+        return open_layer(path)
+
+    response = cache.get(url, params=params, ttl=ttl)
+    error = overpass_error(response.content) if response.ok else None
+    if error and response.from_cache:
+        # an error body cached before this check existed, ask overpass again
+        cache.forget(url, params)
+        response = cache.get(url, params=params, ttl=ttl)
+        error = overpass_error(response.content) if response.ok else None
+    if not response.ok:
+        print(f"Error fetching data: {response.status_code}")
+        print(response.text[:500])
+        return None
+    if error:
+        # overpass sends its timeouts as a 200, dont let the cache keep serving it
+        cache.forget(url, params)
+        print(f"Overpass error: {error}")
+        return None
+    source = "cache" if response.from_cache else "Overpass"
+
+    digest = hashlib.sha256(response.content).hexdigest()
+    if refresh or not layer_is_current(digest, path, meta_path):
+        t0 = time.perf_counter()
+        records = build_layer(io.BytesIO(response.content))
+        save_layer(records, digest, path, meta_path)
+        print(f"Parsed {len(records):,} campgrounds from {source} in {time.perf_counter() - t0:.2f}s")
+    return open_layer(path)
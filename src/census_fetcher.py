@@ -0,0 +1,176 @@
+"""
+Census API Fetcher
+Pulls any list of ACS 5 year variables for a range of years, for every county
+- variables are split per dataset (detailed B/C tables vs subject S tables)
+  and into requests of at most 50 (the API's limit)
+- all (year, chunk) requests run at the same time on a thread pool, and can
+  be sharded by state too (52x the requests, only worth it when a few big
+  nationwide answers are slower to build than the extra round trips)
+- everything goes through the shared http cache
+- the pieces are stacked per chunk and joined once on (GeoID, year)
+- without an API key the census allows ~500 requests a day per IP, set
+  CENSUS_API_KEY before sharding big pulls by state
+
+    df = census_fetcher.fetch(['B25077_001E', 'S1901_C01_012E'], years=range(2019, 2024))
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+import http_cache
+
+BASE_URL = 'https://api.census.gov/data'
+MAX_VARIABLES = 50  # per request, NAME counts too
+
+# 50 states + DC + Puerto Rico
+STATE_FIPS = [
+    '01', '02', '04', '05', '06', '08', '09', '10', '11', '12', '13', '15', '16', '17', '18', '19',
+    '20', '21', '22', '23', '24', '25', '26', '27', '28', '29', '30', '31', '32', '33', '34', '35',
+    '36', '37', '38', '39', '40', '41', '42', '44', '45', '46', '47', '48', '49', '50', '51', '53',
+    '54', '55', '56', '72',
+]
+
+# the API codes missing / not applicable estimates as big negative numbers (-666666666 etc.)
+MISSING_BELOW = -555555555
+
+
+def dataset_for(variable):
+    """ACS 5 year dataset path a variable lives in"""
+    if variable.startswith('S'):
+        return 'acs/acs5/subject'
+    if variable.startswith('DP'):
+        return 'acs/acs5/profile'
+    return 'acs/acs5'
+
+
+def plan_requests(variables, years, states=None, with_name=True):
+    """
+    Every request needed, as (year, dataset, chunk number, variables, state)
+
+    Args:
+        variables: ACS variable ids
+        years: ACS years (end year of the 5 year window)
+        states: state FIPS to shard by (None = one nationwide request per chunk)
+        with_name: add NAME to the first chunk
+
+    Returns:
+        list of tuples
+    """
+    by_dataset = {}
+    for var in dict.fromkeys(variables):
+        by_dataset.setdefault(dataset_for(var), []).append(var)
+
+    chunks = []
+    for dataset, dataset_vars in by_dataset.items():
+        if with_name and not chunks:
+            dataset_vars = ['NAME'] + dataset_vars
+        for start in range(0, len(dataset_vars), MAX_VARIABLES):
+            chunks.append((dataset, dataset_vars[start:start + MAX_VARIABLES]))
+
+    shards = [None] if states is None else list(states)
+    return [(year, dataset, number, chunk_vars, state)
+            for year, (number, (dataset, chunk_vars)), state in product(years, enumerate(chunks), shards)]
+
+
+def fetch_one(year, dataset, chunk_vars, state=None, base_url=BASE_URL, cache=None,
+              ttl=30 * http_cache.DAY, retries=3, timeout=60):
+    """
+    One API request, returns a frame of GeoID, year + the chunk's variables
+
+    Returns None if the request keeps failing (or the API rejects it, say a
+    variable that doesnt exist that year)
+    """
+    cache = cache or http_cache.default_cache()
+    params = {
+        'get': ','.join(chunk_vars),
+        'for': 'county:*',
+        'in': f'state:{state}' if state else 'state:*',
+    }
+    # the key rides along on live requests only, it stays out of the cache key and metadata
+    secret = {'key': os.environ['CENSUS_API_KEY']} if os.environ.get('CENSUS_API_KEY') else None
+    url = f"{base_url}/{year}/{dataset}"
+
+    for attempt in range(retries):
+        try:
+            response = cache.get(url, params=params, ttl=ttl, timeout=timeout, secret_params=secret)
+        except Exception as e:
+            error = e
+        else:
+            if response.ok:
+                break
+            error = f"HTTP {response.status_code}"
+            if response.status_code < 500:
+                break  # bad variable / bad geography, asking again wont help
+        if attempt < retries - 1:
+            time.sleep(0.5 * 2 ** attempt)
+    else:
+        response = None
+
+    if response is None or not response.ok:
+        print(f"  {year} {dataset} state {state or '*'} failed: {error}")
+        return None
+
+    rows = response.json()
+    df = pd.DataFrame(rows[1:], columns=rows[0])
+    df['GeoID'] = df['state'] + df['county']
+    df['year'] = np.int16(year)
+    return df[['GeoID', 'year'] + list(chunk_vars)]
+
+
+def to_numeric(df, variables):
+    """Estimate strings to floats, the API's negative sentinels become NaN"""
+    for var in variables:
+        values = pd.to_numeric(df[var], errors='coerce')
+        df[var] = values.mask(values <= MISSING_BELOW)
+    return df
+
+
+def fetch(variables, years=(2023,), shard_states=False, workers=16, base_url=BASE_URL,
+          cache=None, ttl=30 * http_cache.DAY):
+    """
+    County values of `variables` for every year in `years`
+
+    Args:
+        variables: ACS variable ids (any mix of B/C/S/DP tables, any number)
+        years: ACS years
+        shard_states: one request per state instead of one nationwide request
+        workers: requests in flight at once
+        base_url: API root (a local stub in tests / benchmarks)
+        cache: HttpCache (default: the shared one)
+        ttl: seconds cached responses are trusted
+
+    Returns:
+        DataFrame with GeoID, year, NAME and one numeric column per variable,
+        one row per county and year (None if nothing could be fetched)
+    """
+    variables = list(dict.fromkeys(v for v in variables if v != 'NAME'))
+    years = list(years)
+    requests_plan = plan_requests(variables, years, STATE_FIPS if shard_states else None)
+
+    def run(request):
+        year, dataset, number, chunk_vars, state = request
+        return number, fetch_one(year, dataset, chunk_vars, state, base_url, cache, ttl)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(run, requests_plan))
+
+    # stack every chunk's pieces (all years, all states), then one join on the key
+    pieces = {}
+    for number, df in results:
+        if df is not None:
+            pieces.setdefault(number, []).append(df)
+    if not pieces:
+        return None
+    frames = [pd.concat(parts, ignore_index=True).set_index(['GeoID', 'year']) for _, parts in sorted(pieces.items())]
+    df = pd.concat(frames, axis=1, join='outer').sort_index().reset_index()
+
+    present = [v for v in variables if v in df.columns]
+    missing = [v for v in variables if v not in df.columns]
+    if missing:
+        print(f"  no data for: {', '.join(missing)}")
+    return to_numeric(df, present)
@@ -1,9 +1,21 @@
-import os
 import pandas as pd
 import glob
 import numpy as np
+import sys
+import master_store
 
-def clean_data():
+def clean_data(df_census=None, df_land=None, save=True):
+    """
+    Merge the county sources into the master dataset
+
+    Args:
+        df_census: census frame from download_census_data (None = read the csv it saved)
+        df_land: land area frame from download_land_area (None = read the csv it saved)
+        save: write the master dataset (parquet + power bi csv)
+
+    Returns:
+        the master DataFrame (None if the PolicyMap data is missing)
+    """
     
     # 1. load policymap data dependent variable
     print("\n[1/6] Loading PolicyMap data (Dependent Variable)...")
@@ -27,8 +39,9 @@ def clean_data():
     # load census api data income housing population remote work
 
     census_files = glob.glob('../Data/raw/census_api/county_data_2023.csv')
-    if census_files:
-        df_census = pd.read_csv(census_files[0])
+    if df_census is not None or census_files:
+        if df_census is None:
+            df_census = pd.read_csv(census_files[0])
         df_census['GeoID'] = df_census['GeoID'].astype(str).str.zfill(5)
         
         # select relevant columns
@@ -41,8 +54,9 @@ def clean_data():
 
     # load land area data
     land_files = glob.glob('../Data/raw/gazetteer/county_land_area.csv')
-    if land_files:
-        df_land = pd.read_csv(land_files[0])
+    if df_land is not None or land_files:
+        if df_land is None:
+            df_land = pd.read_csv(land_files[0])
         df_land['GeoID'] = df_land['GeoID'].astype(str).str.zfill(5)
         df_land = df_land[['GeoID', 'Land_Area_Sq_Miles']].copy()
     else:
@@ -143,19 +157,21 @@ def clean_data():
                                                 labels=['Rural', 'Low-Density', 'Medium-Density', 'Urban'],
                                                 duplicates='drop')
 
-    # save result
-    output_dir = '../Data/processed'
-    os.makedirs(output_dir, exist_ok=True)
-    output_file = os.path.join(output_dir, 'master_dataset_powerbi.csv')
-    df_final.to_csv(output_file, index=False)
-    
-    print(f"DOne: {output_file}")
+    # typed columns (zero padded GeoID, ordered bands, float32) whether or not it gets saved
+    df_final = master_store.apply_schema(df_final)
+
+    # save result, parquet is the real copy and the csv is the power bi export
+    if save:
+        master_store.write_master(df_final)
+        print(f"DOne: {master_store.MASTER_FILE} (+ {master_store.MASTER_CSV})")
     
     for col in ['Alt_Housing_Growth_Pct', 'Median_Household_Income', 'Median_Home_Value', 
                 'Population_Density', 'Avg_Temp_F', 'Remote_Work_Pct']:
         if col in df_final.columns:
             pct = (df_final[col].notna().sum() / len(df_final)) * 100
             print(f"  - {col}: {pct:.1f}% complete")
+    return df_final
 
 if __name__ == "__main__":
-    clean_data()
+    if clean_data() is None:
+        sys.exit(1)
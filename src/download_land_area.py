@@ -1,9 +1,10 @@
-import requests
-import pandas as pd
+import http_cache
+import gazetteer
 import os
+import sys
 
-def download_land_area():
-    """Download 2023 Census Gazetteer file with county land areas"""
+def download_land_area(save=True):
+    """Download 2023 Census Gazetteer file with county land areas (save=False skips writing the csv)"""
     
     print("Downloading county land area data...")
     
@@ -11,9 +12,9 @@ def download_land_area():
     url = "https://www2.census.gov/geo/docs/maps-data/data/gazetteer/2023_Gazetteer/2023_Gaz_counties_national.zip"
     
     try:
-        # download the zip file
+        # download the zip file (the 2023 file never changes so cache it for a long time)
         print(f"Fetching from {url}")
-        response = requests.get(url)
+        response = http_cache.get(url, ttl=90 * http_cache.DAY)
         response.raise_for_status()
         
         # save temporarily
@@ -28,25 +29,20 @@ def download_land_area():
         with zipfile.ZipFile(temp_zip, 'r') as zip_ref:
             zip_ref.extractall('../Data/raw/gazetteer')
         
-        # read the txt file tab delimited
-        gaz_file = '../Data/raw/gazetteer/2023_Gaz_counties_national.txt'
-        df = pd.read_csv(gaz_file, sep='\t', encoding='latin1')
-        
-        print(f"Loaded {len(df)} counties")
-        print(f"Columns: {df.columns.tolist()}")
-        
-        # create geoid from geoid column
-        df['GeoID'] = df['GEOID'].astype(str).str.zfill(5)
+        # parse the txt into the shared gazetteer cache (rebuilt because the txt hash changed if it did)
+        gaz = gazetteer.load(gazetteer.GAZETTEER_FILE)
+        print(f"Loaded {len(gaz)} counties")
         
         # keep relevant columns
-        df_clean = df[['GeoID', 'NAME', 'ALAND_SQMI']].copy()
-        df_clean.rename(columns={'ALAND_SQMI': 'Land_Area_Sq_Miles'}, inplace=True)
-        
-        # save
-        output_file = '../Data/raw/gazetteer/county_land_area.csv'
-        df_clean.to_csv(output_file, index=False)
-        
-        print(f"Saved to {output_file}")
+        df_clean = gazetteer.to_frame(gaz, ['GEOID', 'NAME', 'ALAND_SQMI'])
+        df_clean.rename(columns={'GEOID': 'GeoID', 'ALAND_SQMI': 'Land_Area_Sq_Miles'}, inplace=True)
+        
+        # save (the raw gazetteer txt is always extracted, other scripts read coordinates from it)
+        if save:
+            output_file = '../Data/raw/gazetteer/county_land_area.csv'
+            df_clean.to_csv(output_file, index=False)
+            
+            print(f"Saved to {output_file}")
         print(df_clean.head())
         
         # clean up temp file
@@ -59,5 +55,7 @@ def download_land_area():
         return None
 
 if __name__ == "__main__":
-    download_land_area()
+    # non zero exit so run_all doesnt record a failed download as done
+    if download_land_area() is None:
+        sys.exit(1)
 
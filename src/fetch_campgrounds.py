@@ -1,140 +1,107 @@
-import requests
-import json
-import pandas as pd
-import numpy as np
-import os
+import argparse
+import sys
 import time
-from math import radians, cos, sin, asin, sqrt
+from geo_index import SphereIndex
+import master_store
+import campground_store
+import overpass_tiles
 
-def fetch_osm_campgrounds():
+OVERPASS_URL = "http://overpass-api.de/api/interpreter"
+CAMPSITE_FILTER = '["tourism"="camp_site"]'
+
+def fetch_osm_campgrounds(df_master=None, radii_miles=(10, 30, 60), save=True, tiled=False, concurrency=2,
+                          overpass_url=OVERPASS_URL):
+    """
+    Count OSM campgrounds around every county centroid
+
+    Args:
+        df_master: master frame from calculate_park_distance (None = read it from disk)
+        radii_miles: radii to count within, each becomes a Campgrounds_Within_<N>mi column
+                     (30 is what the H4 analysis uses)
+        save: write the master csv back out
+        tiled: fetch in bounding box tiles (see overpass_tiles.py) instead of one US wide query
+        concurrency: tiles in flight at once when tiled
+        overpass_url: interpreter endpoint (a local stub offline)
+
+    Returns:
+        the updated master DataFrame (None on error)
+    """
     print("="*60)
     print("Fetching Campground Data from OpenStreetMap (Overpass API)...")
     print("="*60)
     
-    output_file = '../Data/raw/osm_campgrounds.json'
+    # overpass ql query
+    # the single area query times out now and then, tiled mode splits it into
+    # bounding boxes (with the same area filter) that fail and retry on their own
+    overpass_query = f"""
+    [out:json][timeout:180];
+    area["ISO3166-1"="US"]->.searchArea;
+    (
+      node{CAMPSITE_FILTER}(area.searchArea);
+      way{CAMPSITE_FILTER}(area.searchArea);
+      relation{CAMPSITE_FILTER}(area.searchArea);
+    );
+    out center;
+    """
     
-    if os.path.exists(output_file):
-        print(f"Found existing campground data at {output_file}")
-        with open(output_file, 'r') as f:
-            data = json.load(f)
-    else:
-        # overpass ql query
-        # we use a simplified bounding box for us to avoid area timeout issues sometimes
-        # 24.396308 -125.000000 sw to 49.384358 -66.934570 ne approx conus
-        # actually lets try the area filter first its cleaner
-        overpass_url = "http://overpass-api.de/api/interpreter"
-        overpass_query = """
-        [out:json][timeout:180];
-        area["ISO3166-1"="US"]->.searchArea;
-        (
-          node["tourism"="camp_site"](area.searchArea);
-          way["tourism"="camp_site"](area.searchArea);
-          relation["tourism"="camp_site"](area.searchArea);
-        );
-        out center;
-        """
-        
-        print("Sending query to Overpass API (this may take 1-2 minutes)...")
-        try:
-            response = requests.get(overpass_url, params={'data': overpass_query})
-            if response.status_code == 200:
-                data = response.json()
-                with open(output_file, 'w') as f:
-                    json.dump(data, f)
-                print(f"Successfully saved {len(data.get('elements', []))} campgrounds to {output_file}")
-            else:
-                print(f"Error fetching data: {response.status_code}")
-                print(response.text)
-                return
-        except Exception as e:
-            print(f"Exception during fetch: {e}")
-            return
+    # the shared http cache replaces the old if exists osm campgrounds json check,
+    # and the parsed layer is kept as a memory mapped array so reruns dont even
+    # re-read the response
+    try:
+        if tiled:
+            print(f"Querying Overpass in tiles ({concurrency} at a time)...")
+            camps = overpass_tiles.fetch_tiled(overpass_url, CAMPSITE_FILTER, concurrency=concurrency)
+        else:
+            print("Sending query to Overpass API (this may take 1-2 minutes on a cold cache)...")
+            camps = campground_store.load_layer(overpass_url, {'data': overpass_query})
+    except Exception as e:
+        print(f"Exception during fetch: {e}")
+        return
+    if camps is None:
+        return
 
-    # process data
-    elements = data.get('elements', [])
-    camp_lats = []
-    camp_lons = []
+    print(f"Processed {len(camps)} valid campground locations.")
     
-    for el in elements:
-        lat = el.get('lat')
-        lon = el.get('lon')
-        # for ways relations center provides lat lon
-        if lat is None and 'center' in el:
-            lat = el['center'].get('lat')
-            lon = el['center'].get('lon')
-            
-        if lat and lon:
-            camp_lats.append(lat)
-            camp_lons.append(lon)
-            
-    print(f"Processed {len(camp_lats)} valid campground locations.")
+    # calculate density per county campgrounds within each radius
+    if df_master is None:
+        if not master_store.master_exists():
+            print("Error: Master dataset not found.")
+            return
+        df_master = master_store.read_master()
     
-    # calculate density per county campgrounds within 30 miles
-    master_file = '../Data/processed/master_dataset_powerbi.csv'
-    if not os.path.exists(master_file):
-        print("Error: Master dataset not found.")
+    if 'County_Lat' not in df_master.columns:
+        # previous script saves the merged coords into master so it has to run first
+        print("Warning: County_Lat not found in master. Run calculate_park_distance.py first.")
         return
-        
-    df_master = pd.read_csv(master_file)
-    print("Calculating campground density for each county...")
-    
-    # convert to numpy arrays for vectorization
-    camp_lats = np.radians(np.array(camp_lats))
-    camp_lons = np.radians(np.array(camp_lons))
     
-    counts_30mi = []
+    print(f"Calculating campground density for each county ({', '.join(str(r) for r in radii_miles)} mile radii)...")
     
-    # loop through counties
-    # optimizing calculating distance matrix for 3000x15000 is 45m ops doable in python numpy
-    # but lets do it batch by batch or just loop counties
+    # index the campgrounds once then count every radius from a single search at the largest one
+    # (was a full haversine over all campgrounds for every county)
+    camp_index = SphereIndex(camps['lat'], camps['lon'])
+    counts = camp_index.count_within(df_master['County_Lat'].values, df_master['County_Lon'].values,
+                                     radii_miles)
     
-    for idx, row in df_master.iterrows():
-        # check for county lat might need to be remerged if previous script didnt save it
-        # ah previous script saved it if i ran it lets check columns
-        # if county lat missing we need to remerge gazetteer
-        # the previous script saved df master to file so it should have the merged cols if it ran
-        
-        # wait calculate park distance py merges but does it keep the columns
-        # yes it saves df master to csv
-        
-        if 'County_Lat' not in df_master.columns:
-             # fallback if not present e.g. if previous script failed or wasnt run
-             print("Warning: County_Lat not found in master. Run calculate_park_distance.py first.")
-             return
-
-        c_lat = row['County_Lat']
-        c_lon = row['County_Lon']
-        
-        if pd.isna(c_lat):
-            counts_30mi.append(0)
-            continue
-            
-        # vectorized haversine against all campgrounds
-        lat1 = radians(c_lat)
-        lon1 = radians(c_lon)
-        
-        dlon = camp_lons - lon1
-        dlat = camp_lats - lat1
-        
-        a = np.sin(dlat/2)**2 + np.cos(lat1) * np.cos(camp_lats) * np.sin(dlon/2)**2
-        c = 2 * np.arcsin(np.sqrt(a))
-        r = 3956
-        dists = c * r
-        
-        # count how many are within 30 miles
-        count = np.sum(dists <= 30)
-        counts_30mi.append(count)
-        
-        if idx % 500 == 0:
-            print(f"  Processed {idx} counties...")
-
-    df_master['Campgrounds_Within_30mi'] = counts_30mi
+    count_cols = []
+    for j, r in enumerate(radii_miles):
+        col = f'Campgrounds_Within_{r}mi'
+        df_master[col] = counts[:, j]
+        count_cols.append(col)
     
     # save
-    df_master.to_csv(master_file, index=False)
-    print(f"Saved updated dataset with Campground Counts to {master_file}")
-    print(df_master[['GeoID_Name', 'Campgrounds_Within_30mi']].head())
+    if save:
+        df_master = master_store.write_master(df_master)
+        print(f"Saved updated dataset with Campground Counts to {master_store.MASTER_FILE}")
+    print(df_master[['GeoID_Name'] + count_cols].head())
+    return df_master
 
 if __name__ == "__main__":
-    fetch_osm_campgrounds()
+    # non zero exit so run_all doesnt record a failed fetch as done
+    parser = argparse.ArgumentParser(description="Count OSM campgrounds around every county")
+    parser.add_argument('--tiled', action='store_true', help='fetch in bounding box tiles with per tile checkpoints')
+    parser.add_argument('--concurrency', type=int, default=2, help='tiles in flight at once (overpass allows ~2)')
+    parser.add_argument('--overpass-url', default=OVERPASS_URL)
+    args = parser.parse_args()
+    if fetch_osm_campgrounds(tiled=args.tiled, concurrency=args.concurrency, overpass_url=args.overpass_url) is None:
+        sys.exit(1)
 
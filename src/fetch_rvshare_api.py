@@ -1,184 +1,238 @@
-import pandas as pd
 import requests
 import time
 import random
 import os
 import json
+import argparse
 from datetime import datetime
+from listing_store import ListingStore
+import http_cache
+import gazetteer
+from plan_rvshare_queries import SEARCH_DISTANCE
 
-def fetch_rvshare_data():
+SEARCH_URL = "https://rvshare.com/rv-rental.json"
+MAX_PAGES = 3  # fetch up to 3 pages per county to get deep coverage
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36'
+OUTPUT_FILE = '../Data/pre_processed_data/rvshare_api_data.csv'
+CACHE_TTL = http_cache.DAY  # listings change daily, reruns the same day come from disk
+
+def build_search_params(county_name, lat, lng, page):
+    """Query string for one page of Class B results within SEARCH_DISTANCE miles of a point"""
+    return {
+        'location': county_name,
+        'lat': lat,
+        'lng': lng,
+        'rvshare_mode': 'false',
+        'rv_class': 'Class B Camping Van',
+        'distance': SEARCH_DISTANCE,
+        'limit': 50,
+        'page': page,
+    }
+
+def parse_listing(item, county_name):
+    """Flatten one api result into the row we save"""
+    attrs = item.get('attributes', {})
+    rv_type = attrs.get('type', '')
+
+    # extract fields
+    rv_data = {
+        'id': str(item.get('id')),
+        'headline': attrs.get('headline'),
+        'make_model': attrs.get('rv_make_model'),
+        'year': attrs.get('rv_year'),
+        'type': rv_type,
+        'price_nightly': attrs.get('rate'),
+        'sleeps': attrs.get('how_many_it_sleeps'),
+        'length': attrs.get('length'),
+        'fresh_water_tank': attrs.get('fresh_water_tank'),
+        'electric_service': attrs.get('electric_service'),
+        'generator_included': attrs.get('generator_usage_included'),
+        'lat': attrs.get('location', {}).get('lat'),
+        'lng': attrs.get('location', {}).get('lng'),
+        'state': attrs.get('location', {}).get('state'),
+        'city': attrs.get('location', {}).get('name'),
+        'review_score': attrs.get('reviews', {}).get('score'),
+        'review_count': attrs.get('reviews', {}).get('count'),
+        'is_instant_book': attrs.get('is_instant_book'),
+        'search_county': county_name
+    }
+
+    # simple amenity inference
+    rv_data['has_bathroom'] = 1 if (rv_data['fresh_water_tank'] or 0) > 10 else 0
+    rv_data['has_generator'] = 1 if (rv_data['generator_included'] or 0) > 0 else 0
+    return rv_data
+
+def warn_if_capped(county_name, total_pages):
+    """Say so when a search has more pages than MAX_PAGES lets us read"""
+    if total_pages > MAX_PAGES:
+        # likely in dense metros, more so with cover centers standing in for several counties
+        print(f"  Warning: {county_name} has {total_pages} pages of results, only the first {MAX_PAGES} are read")
+
+def load_county_points():
+    """Load county names and centroids from the raw gazetteer file (None if missing)"""
     # 1. load county coordinates
     land_area_file = '../Data/raw/gazetteer/county_land_area.csv'
     if not os.path.exists(land_area_file):
         print(f"Error: {land_area_file} not found. Run download_land_area.py first.")
-        return
+        return None
 
     print("Loading county coordinates...")
-    # read file handling potential tab delimiters if the original download was tab separated
-    # but my previous script saved it as csv lets try csv first
-    try:
-        df_counties = pd.read_csv(land_area_file)
-    except:
-        df_counties = pd.read_csv(land_area_file, delimiter='\t')
-
-    # ensure we have coordinates
-    # the gazetteer file usually has intptlat and intptlong
-    # my download land area py script outputted columns geoid name land area sq miles
-    # wait my previous script download land area py only saved those 3 columns
-    # i need to re download or re parse the raw gazetteer file to get the lat long
-    # the raw file is in data raw gazetteer but extracted
-    # lets check if we can find the raw txt file in that directory to get lat long
-    
-    gazetteer_dir = '../Data/raw/gazetteer'
-    raw_files = [f for f in os.listdir(gazetteer_dir) if f.endswith('.txt') and 'counties' in f]
-    
-    if not raw_files:
+    # my download land area py script only saved geoid name land area sq miles
+    # the lat long come from the cached gazetteer array (gazetteer.py parses the raw txt once)
+    gaz = gazetteer.load()
+    if gaz is None:
         print("Error: Raw gazetteer text file not found to extract Lat/Long.")
-        # fallback try to use a library or just fail
-        # ill try to re read the zip or just finding the txt file is best
-        return
-
-    raw_file_path = os.path.join(gazetteer_dir, raw_files[0])
-    print(f"Reading raw gazetteer file for coordinates: {raw_files[0]}")
-    
-    # gazetteer format is fixed width or tab separated usually tab or multiple spaces
-    # its usually iso 8859 1 encoded
-    df_geo = pd.read_csv(raw_file_path, sep='\t', encoding='ISO-8859-1', dtype={'GEOID': str})
-    # clean column names remove whitespace
-    df_geo.columns = [c.strip() for c in df_geo.columns]
-    
-    if 'INTPTLAT' not in df_geo.columns or 'INTPTLONG' not in df_geo.columns:
-        print(f"Error: Lat/Long columns not found. Columns: {df_geo.columns}")
-        return
+        return None
+    df_geo = gazetteer.to_frame(gaz)
 
     print(f"Found {len(df_geo)} counties with coordinates.")
+    return df_geo
 
-    # 2. setup output
-    output_file = '../Data/pre_processed_data/rvshare_api_data.csv'
-    processed_ids = set()
-    
-    # ensure directory exists
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    
-    # if file exists load it to resume deduplicate
-    if os.path.exists(output_file):
-        try:
-            existing_df = pd.read_csv(output_file)
-            processed_ids = set(existing_df['id'].astype(str))
-            print(f"Resuming... {len(processed_ids)} unique RVs already collected.")
-        except:
-            print("Could not read existing file, starting fresh.")
+def collect_listings(df_geo, save_search, base_url=SEARCH_URL, session=None, pause=0.05, cache=None):
+    """
+    Fetch every county one after another (the original collector)
 
-    # 3. iterate and fetch
-    results_list = []
-    
+    Args:
+        df_geo: DataFrame with GEOID, NAME, INTPTLAT, INTPTLONG columns
+        save_search: called as save_search(geoid, listings, finished) once per county
+        base_url: search endpoint (point at a local stub for benchmarks)
+        session: requests.Session to reuse
+        pause: seconds to sleep between counties
+        cache: http_cache.HttpCache to read through (None = always hit the network)
+    """
     # create a requests session for better performance
-    session = requests.Session()
-    session.headers.update({
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36'
-    })
+    if session is None:
+        session = requests.Session()
+        session.headers.update({'User-Agent': USER_AGENT})
 
     total_counties = len(df_geo)
-    
-    print("Starting API collection...")
-    print("NOTE: This will filter for CLASS B vehicles as requested.")
-    
+
     # shuffle to get a random sample of us if we stop early
     # df geo df geo sample frac 1 reset index drop true
 
-    for i, row in df_geo.iterrows():
-        lat = row['INTPTLAT']
-        lng = row['INTPTLONG']
-        county_name = row['NAME']
-        
+    for i, row in enumerate(df_geo.itertuples(index=False)):
+        lat = row.INTPTLAT
+        lng = row.INTPTLONG
+        county_name = row.NAME
+
         # simple progress
         if i % 50 == 0:
             print(f"Processing {i}/{total_counties}: {county_name}...")
-            # save progress periodically
-            if results_list:
-                new_df = pd.DataFrame(results_list)
-                # append to file
-                new_df.to_csv(output_file, mode='a', header=not os.path.exists(output_file), index=False)
-                results_list = [] # clear buffer
-                print(f"  Saved batch. Total unique RVs: {len(processed_ids)}")
 
+        results_list = []
+        finished = True
+        used_network = cache is None
         try:
-            # fetch up to 3 pages per county to get deep coverage
-            for page in range(1, 4):
-                url = f"https://rvshare.com/rv-rental.json?location={county_name}&lat={lat}&lng={lng}&rvshare_mode=false&rv_class=Class%20B%20Camping%20Van&distance=50&limit=50&page={page}"
-                
-                resp = session.get(url, timeout=10)
-                
+            for page in range(1, MAX_PAGES + 1):
+                params = build_search_params(county_name, lat, lng, page)
+                if cache is not None:
+                    resp = cache.get(base_url, params=params, ttl=CACHE_TTL, timeout=10,
+                                     headers={'User-Agent': USER_AGENT})
+                    used_network = used_network or not resp.from_cache
+                else:
+                    resp = session.get(base_url, params=params, timeout=10)
+
                 if resp.status_code == 200:
                     data = resp.json()
                     items = data.get('data', {}).get('results', [])
                     pagination = data.get('pagination', {})
-                    
+
                     if not items:
                         break # no more items stop paging for this county
 
                     for item in items:
-                        rv_id = str(item.get('id'))
-                        
-                        # deduplicate
-                        if rv_id in processed_ids:
-                            continue
-                        
-                        attrs = item.get('attributes', {})
-                        rv_type = attrs.get('type', '')
-                        
-                        # extract fields
-                        rv_data = {
-                            'id': rv_id,
-                            'headline': attrs.get('headline'),
-                            'make_model': attrs.get('rv_make_model'),
-                            'year': attrs.get('rv_year'),
-                            'type': rv_type,
-                            'price_nightly': attrs.get('rate'),
-                            'sleeps': attrs.get('how_many_it_sleeps'),
-                            'length': attrs.get('length'),
-                            'fresh_water_tank': attrs.get('fresh_water_tank'),
-                            'electric_service': attrs.get('electric_service'),
-                            'generator_included': attrs.get('generator_usage_included'),
-                            'lat': attrs.get('location', {}).get('lat'),
-                            'lng': attrs.get('location', {}).get('lng'),
-                            'state': attrs.get('location', {}).get('state'),
-                            'city': attrs.get('location', {}).get('name'),
-                            'review_score': attrs.get('reviews', {}).get('score'),
-                            'review_count': attrs.get('reviews', {}).get('count'),
-                            'is_instant_book': attrs.get('is_instant_book'),
-                            'search_county': county_name
-                        }
-                        
-                        # simple amenity inference
-                        rv_data['has_bathroom'] = 1 if (rv_data['fresh_water_tank'] or 0) > 10 else 0
-                        rv_data['has_generator'] = 1 if (rv_data['generator_included'] or 0) > 0 else 0
-                        
-                        results_list.append(rv_data)
-                        processed_ids.add(rv_id)
-                    
+                        results_list.append(parse_listing(item, county_name))
+
                     # stop if weve reached the last page
+                    if page == 1:
+                        warn_if_capped(county_name, pagination.get('totalPages', 1))
                     if page >= pagination.get('totalPages', 1):
                         break
-                
+
                 else:
+                    finished = False
                     break # stop paging on error
 
         except Exception as e:
             print(f"  Error fetching {county_name}: {e}")
+            finished = False
             time.sleep(2) # longer pause on error
 
+        # store dedupes on listing id, unfinished counties get retried on resume
+        save_search(row.GEOID, results_list, finished)
+
         # faster rate limiting we need to move fast to cover 3000 counties
-        time.sleep(0.05) 
-    
-    # final save
-    if results_list:
-        new_df = pd.DataFrame(results_list)
-        new_df.to_csv(output_file, mode='a', header=not os.path.exists(output_file), index=False)
-        print(f"Saved final batch.")
-        
-    print(f"Saved to: {output_file}")
+        if used_network:
+            time.sleep(pause)
+
+def fetch_rvshare_data(mode='sync', concurrency=16, requests_per_second=8.0, plan='county',
+                       cover_radius=SEARCH_DISTANCE):
+    """
+    Collect Class B listings around every county centroid
+
+    Args:
+        mode: 'sync' for the one-request-at-a-time loop, 'async' for the concurrent collector
+        concurrency: counties in flight at once (async mode)
+        requests_per_second: token bucket limit across all requests (async mode)
+        plan: 'county' searches every county, 'cover' only the set-cover centers from plan_rvshare_queries
+        cover_radius: miles each cover center has to reach (cover plan)
+    """
+    df_geo = load_county_points()
+    if df_geo is None:
+        return
+
+    if plan == 'cover':
+        # skip searches whose search circle mostly repeats a neighbouring one
+        from plan_rvshare_queries import build_query_plan, plan_report
+        df_plan = build_query_plan(df_geo, cover_radius)
+        plan_report(df_geo, df_plan)
+        df_geo = df_plan
+
+    # 2. setup output
+    output_file = OUTPUT_FILE
+    store = ListingStore()
+
+    # first run after the switch to sqlite - pull in whatever the old csv collector saved
+    if len(store) == 0 and os.path.exists(output_file):
+        print(f"Importing {store.import_csv(output_file)} listings from {output_file}")
+
+    # resume - skip counties whose search already finished
+    done = store.done_keys()
+    df_geo = df_geo[~df_geo['GEOID'].astype(str).isin(done)]
+    if done:
+        print(f"Resuming... {len(done)} searches finished, {len(store)} unique RVs already collected.")
+
+    # 3. iterate and fetch
+    print("Starting API collection...")
+    print("NOTE: This will filter for CLASS B vehicles as requested.")
+
+    if mode == 'async':
+        # imported here so the sync path doesnt need aiohttp
+        from rvshare_async import collect_listings_async
+        collect_listings_async(df_geo, store.save_search, concurrency=concurrency,
+                               requests_per_second=requests_per_second, cache=http_cache.default_cache())
+    else:
+        collect_listings(df_geo, store.save_search, cache=http_cache.default_cache())
+
+    # csv stays the hand off to finalize_rvshare_data py
+    n_saved = store.export_csv(output_file)
+    store.close()
+    print(f"Saved {n_saved} unique RVs to: {output_file}")
 
 if __name__ == "__main__":
-    fetch_rvshare_data()
+    parser = argparse.ArgumentParser(description="Collect Class B RVshare listings for every county")
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='use the concurrent asyncio collector')
+    parser.add_argument('--concurrency', type=int, default=16, help='counties in flight at once (async)')
+    parser.add_argument('--rps', type=float, default=8.0, help='max requests per second (async)')
+    parser.add_argument('--plan', choices=['county', 'cover'], default='county',
+                        help="'cover' only searches a minimal set of centers covering every county")
+    parser.add_argument('--cover-radius', type=float, default=SEARCH_DISTANCE,
+                        help=f'miles each cover center reaches (at most the {SEARCH_DISTANCE} mile search distance)')
+    args = parser.parse_args()
+    if args.cover_radius > SEARCH_DISTANCE:
+        parser.error(f"--cover-radius can't be more than the {SEARCH_DISTANCE} mile search distance")
 
+    fetch_rvshare_data(mode='async' if args.use_async else 'sync',
+                       concurrency=args.concurrency, requests_per_second=args.rps,
+                       plan=args.plan, cover_radius=args.cover_radius)
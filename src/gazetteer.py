@@ -0,0 +1,121 @@
+"""
+County Gazetteer Cache
+The 2023 county gazetteer txt is tab separated latin-1 with a padded last
+header, three scripts used to parse it each their own way. This parses it
+once into a typed numpy record array that every script memory maps
+- columns GEOID, USPS, NAME, ALAND_SQMI, INTPTLAT, INTPTLONG
+- rows sorted by GEOID, that order is the GeoID -> row index (rows_for)
+- saved as a .npy next to a json with the sha256 of the txt it came from,
+  it's rebuilt on the next load when the txt changes
+
+    gaz = gazetteer.load()
+    df_geo = gazetteer.to_frame(gaz, ['GEOID', 'INTPTLAT', 'INTPTLONG'])
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+GAZETTEER_FILE = '../Data/raw/gazetteer/2023_Gaz_counties_national.txt'
+CACHE_FILE = '../Data/processed/gazetteer_counties.npy'
+CACHE_META = '../Data/processed/gazetteer_counties.json'
+
+COLUMNS = ['GEOID', 'USPS', 'NAME', 'ALAND_SQMI', 'INTPTLAT', 'INTPTLONG']
+
+
+def file_sha256(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def parse(path=GAZETTEER_FILE):
+    """
+    Read the gazetteer txt into a record array
+
+    Returns:
+        structured array with COLUMNS (GEOID / USPS as fixed width bytes,
+        NAME as fixed width unicode), sorted by GEOID
+    """
+    # its iso 8859 1 encoded and the last header has trailing spaces
+    df = pd.read_csv(path, sep='\t', encoding='ISO-8859-1', dtype={'GEOID': str, 'USPS': str, 'NAME': str})
+    df.columns = [c.strip() for c in df.columns]
+    df = df.sort_values('GEOID', ignore_index=True)
+
+    name_width = max(1, int(df['NAME'].str.len().max()))
+    dtype = np.dtype([('GEOID', 'S5'), ('USPS', 'S2'), ('NAME', f'U{name_width}'),
+                      ('ALAND_SQMI', '<f8'), ('INTPTLAT', '<f8'), ('INTPTLONG', '<f8')])
+    records = np.empty(len(df), dtype=dtype)
+    for col in COLUMNS:
+        values = df[col].str.zfill(5) if col == 'GEOID' else df[col]
+        records[col] = values.to_numpy(dtype=dtype[col])
+    return records
+
+
+def cache_is_current(source_sha256, path=CACHE_FILE, meta_path=CACHE_META):
+    """True if the cache was built from a source with this sha256"""
+    if not (os.path.exists(path) and os.path.exists(meta_path)):
+        return False
+    try:
+        with open(meta_path, 'r') as f:
+            return json.load(f).get('source_sha256') == source_sha256
+    except (OSError, ValueError):
+        return False
+
+
+def load(source=GAZETTEER_FILE, path=CACHE_FILE, meta_path=CACHE_META, refresh=False):
+    """
+    Memory mapped gazetteer records, parsing the txt only when it changed
+
+    Args:
+        source: gazetteer txt
+        refresh: rebuild even if the cache looks current
+
+    Returns:
+        read only record array (None if the txt is missing)
+    """
+    if not os.path.exists(source):
+        return None
+    digest = file_sha256(source)
+    if refresh or not cache_is_current(digest, path, meta_path):
+        records = parse(source)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write then rename so a half written cache is never opened
+        with open(path + '.tmp', 'wb') as f:
+            np.save(f, records)
+        os.replace(path + '.tmp', path)
+        with open(meta_path + '.tmp', 'w') as f:
+            json.dump({'source': os.path.basename(source), 'source_sha256': digest, 'rows': len(records)}, f, indent=1)
+        os.replace(meta_path + '.tmp', meta_path)
+    return np.load(path, mmap_mode='r')
+
+
+def rows_for(gaz, geoids):
+    """Row of each GeoID (5 digit string), -1 where the gazetteer doesnt have it"""
+    keys = np.asarray(gaz['GEOID'])
+    wanted = np.asarray(pd.Series(geoids, dtype='string').str.zfill(5).fillna(''), dtype='S5')
+    pos = np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)
+    return np.where(keys[pos] == wanted, pos, -1)
+
+
+def to_frame(gaz, columns=COLUMNS):
+    """DataFrame of some columns, GEOID / USPS as str like read_csv gave them"""
+    data = {}
+    for col in columns:
+        values = np.asarray(gaz[col])
+        data[col] = values.astype(str) if values.dtype.kind == 'S' else values
+    return pd.DataFrame(data)
+
+
+if __name__ == "__main__":
+    t0 = time.perf_counter()
+    gaz = load(refresh='--refresh' in sys.argv)
+    if gaz is None:
+        print(f"Error: {GAZETTEER_FILE} not found. Run download_land_area.py first.")
+        sys.exit(1)
+    print(f"{len(gaz):,} counties in {(time.perf_counter() - t0) * 1000:.1f} ms")
+    print(to_frame(gaz).head())
@@ -0,0 +1,176 @@
+"""
+Spherical Nearest-Neighbor Index
+Builds a KD-tree once over lat/lon points projected onto the unit sphere so
+nearest-point lookups for thousands (or hundreds of thousands) of query
+points run in one batched call instead of a python loop
+"""
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from geo_kernels import EARTH_RADIUS_MILES
+
+
+def to_unit_xyz(lat, lon):
+    """
+    Convert lat/lon in decimal degrees to xyz points on the unit sphere
+
+    Args:
+        lat: array-like of latitudes
+        lon: array-like of longitudes
+
+    Returns:
+        (n, 3) float64 array
+    """
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    xyz = np.empty(lat.shape + (3,), dtype=np.float64)
+    xyz[..., 0] = cos_lat * np.cos(lon)
+    xyz[..., 1] = cos_lat * np.sin(lon)
+    xyz[..., 2] = np.sin(lat)
+    return xyz
+
+
+def chord_to_miles(chord):
+    """Convert straight-line distance on the unit sphere to great circle miles"""
+    chord = np.clip(np.asarray(chord, dtype=np.float64), 0.0, 2.0)
+    return 2.0 * np.arcsin(chord / 2.0) * EARTH_RADIUS_MILES
+
+
+def miles_to_chord(miles):
+    """Convert great circle miles to straight-line distance on the unit sphere"""
+    angle = np.minimum(np.asarray(miles, dtype=np.float64) / EARTH_RADIUS_MILES, np.pi)
+    return 2.0 * np.sin(angle / 2.0)
+
+
+class SphereIndex:
+    """
+    KD-tree over points on the unit sphere
+
+    Euclidean (chord) distance on the sphere is monotonic in great circle
+    distance so the tree's nearest neighbor is also the haversine nearest
+    neighbor, and the chord converts back to miles exactly
+    """
+
+    def __init__(self, lat, lon, leafsize=16):
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        if lat.shape != lon.shape:
+            raise ValueError("lat and lon must have the same shape")
+
+        # drop points without coordinates but remember where the rest came from
+        valid = ~(np.isnan(lat) | np.isnan(lon))
+        self.point_ids = np.flatnonzero(valid)
+        self.n_points = len(lat)
+        self.tree = cKDTree(to_unit_xyz(lat[valid], lon[valid]), leafsize=leafsize)
+
+    def __len__(self):
+        return self.n_points
+
+    def query_nearest(self, lat, lon, k=1, workers=-1):
+        """
+        Find the k nearest indexed points for every query point
+
+        Args:
+            lat: array-like of query latitudes (NaN allowed)
+            lon: array-like of query longitudes (NaN allowed)
+            k: number of neighbors to return
+            workers: threads used by the tree query (-1 = all cores)
+
+        Returns:
+            (distances_miles, indices) - shape (n,) when k == 1 else (n, k).
+            indices point back into the arrays the index was built from,
+            missing queries get NaN distance and index -1
+        """
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        shape = lat.shape if k == 1 else lat.shape + (k,)
+
+        distances = np.full(shape, np.nan)
+        indices = np.full(shape, -1, dtype=np.int64)
+
+        valid = ~(np.isnan(lat) | np.isnan(lon))
+        if not valid.any() or self.tree.n == 0:
+            return distances, indices
+
+        chord, tree_idx = self.tree.query(to_unit_xyz(lat[valid], lon[valid]), k=k, workers=workers)
+
+        # the tree pads with n / inf when k is larger than the number of points
+        found = tree_idx < self.tree.n
+        mapped = np.full(tree_idx.shape, -1, dtype=np.int64)
+        mapped[found] = self.point_ids[tree_idx[found]]
+        miles = np.where(found, chord_to_miles(np.where(found, chord, 0.0)), np.nan)
+
+        distances[valid] = miles
+        indices[valid] = mapped
+        return distances, indices
+
+    def query_radius_pairs(self, lat, lon, max_miles, workers=-1):
+        """
+        Find every indexed point within max_miles of each query point
+
+        Only tree cells that intersect the largest radius are visited, so the
+        cost follows the number of nearby points rather than queries x points
+
+        Args:
+            lat: array-like of query latitudes (NaN allowed, they match nothing)
+            lon: array-like of query longitudes
+            max_miles: search radius in miles
+            workers: threads used by the tree query (-1 = all cores)
+
+        Returns:
+            (query_idx, point_idx, miles) flat arrays, one entry per matched pair
+        """
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        valid = np.flatnonzero(~(np.isnan(lat) | np.isnan(lon)))
+        if len(valid) == 0 or self.tree.n == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+
+        xyz = to_unit_xyz(lat[valid], lon[valid])
+        # pad the search a hair so float rounding never drops a point sitting on the radius
+        radius = miles_to_chord(max_miles) * (1 + 1e-9)
+        hits = self.tree.query_ball_point(xyz, r=radius, workers=workers, return_sorted=False)
+
+        lengths = np.fromiter((len(h) for h in hits), dtype=np.int64, count=len(hits))
+        tree_idx = np.fromiter((i for h in hits for i in h), dtype=np.int64, count=lengths.sum())
+        local_q = np.repeat(np.arange(len(valid)), lengths)
+
+        # exact distance for each candidate pair from the stored unit vectors
+        chord = np.linalg.norm(self.tree.data[tree_idx] - xyz[local_q], axis=1)
+        return valid[local_q], self.point_ids[tree_idx], chord_to_miles(chord)
+
+    def count_within(self, lat, lon, radii_miles, chunk_size=20000, workers=-1):
+        """
+        Count indexed points within several radii of each query point in one pass
+
+        The tree is searched once at the largest radius and the smaller radii are
+        counted from the same candidate distances
+
+        Args:
+            lat: array-like of query latitudes (NaN rows get 0)
+            lon: array-like of query longitudes
+            radii_miles: list of radii in miles
+            chunk_size: query points per batch (keeps candidate arrays bounded)
+            workers: threads used by the tree query (-1 = all cores)
+
+        Returns:
+            (n, len(radii)) int64 array of counts
+        """
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        radii = np.asarray(radii_miles, dtype=np.float64)
+        counts = np.zeros((len(lat), len(radii)), dtype=np.int64)
+        if len(radii) == 0:
+            return counts
+
+        max_r = radii.max()
+        for start in range(0, len(lat), chunk_size):
+            stop = min(start + chunk_size, len(lat))
+            q_idx, _, miles = self.query_radius_pairs(lat[start:stop], lon[start:stop], max_r,
+                                                      workers=workers)
+            for j, r in enumerate(radii):
+                inside = miles <= r
+                counts[start:stop, j] = np.bincount(q_idx[inside], minlength=stop - start)
+        return counts
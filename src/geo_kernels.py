@@ -0,0 +1,186 @@
+"""
+Great Circle Distance Kernels
+The one haversine implementation every script shares (the nearest / radius
+searches go through geo_index.SphereIndex, these are for when the actual
+distances are needed)
+- inputs broadcast like numpy, degrees in, miles out
+- radians and cos(lat) are worked out once per point, not once per pair
+  (Points keeps them for targets reused across calls)
+- pairwise fills a preallocated (n, m) matrix in place, pairwise_blocks /
+  reduce_pairwise walk it in row blocks under a memory cap
+- dtype='float32' halves memory and runs several times faster, good to ~0.01 miles
+
+    miles = geo_kernels.one_to_many(lat, lon, park_lats, park_lons)
+    nearest = geo_kernels.reduce_pairwise(county_lat, county_lon, park_lat, park_lon,
+                                          lambda d: d.argmin(axis=1))
+"""
+
+import numpy as np
+
+EARTH_RADIUS_MILES = 3956  # same radius the haversine code has always used
+
+# bytes of distances per block in pairwise_blocks / reduce_pairwise
+BLOCK_BYTES = 64 * 1024 * 1024
+
+
+class Points:
+    """
+    Radians and cos(lat) of a set of points, computed once
+
+    Pass one in place of lats (with lons=None) to one_to_many when the same
+    targets are measured against over and over
+    """
+
+    def __init__(self, lat, lon, dtype='float64'):
+        self.lat = np.radians(np.asarray(lat, dtype=dtype))
+        self.lon = np.radians(np.asarray(lon, dtype=dtype))
+        self.cos_lat = np.cos(self.lat)
+
+
+def _points(lat, lon, dtype):
+    return lat if isinstance(lat, Points) else Points(lat, lon, dtype)
+
+
+def _finish(a, out):
+    """a = haversine term (in place) -> miles"""
+    np.clip(a, 0.0, 1.0, out=a)
+    np.sqrt(a, out=a)
+    np.arcsin(a, out=a)
+    np.multiply(a, 2.0 * EARTH_RADIUS_MILES, out=out)
+    return out
+
+
+def _haversine(p, q, out=None):
+    """Miles between Points p and q (broadcast), optionally into out"""
+    shape = np.broadcast_shapes(p.lat.shape, q.lat.shape)
+    dtype = np.result_type(p.lat, q.lat)
+    # explicit buffers, numpy hands back scalars instead of 0-d arrays otherwise
+    s_lat = np.subtract(q.lat, p.lat, out=np.empty(shape, dtype=dtype))
+    s_lat *= 0.5
+    np.sin(s_lat, out=s_lat)
+    s_lat *= s_lat
+
+    s_lon = np.subtract(q.lon, p.lon, out=np.empty(shape, dtype=dtype))
+    s_lon *= 0.5
+    np.sin(s_lon, out=s_lon)
+    s_lon *= s_lon
+    s_lon *= p.cos_lat
+    s_lon *= q.cos_lat
+
+    s_lat += s_lon
+    return _finish(s_lat, s_lat if out is None else out)
+
+
+def haversine(lat1, lon1, lat2, lon2, dtype='float64'):
+    """
+    Great circle miles between points, element by element (numpy broadcasting)
+
+    Args:
+        lat1, lon1: first point(s), decimal degrees
+        lat2, lon2: second point(s)
+        dtype: 'float64' or 'float32'
+
+    Returns:
+        array of miles (a 0-d array for scalars)
+    """
+    return _haversine(Points(lat1, lon1, dtype), Points(lat2, lon2, dtype))
+
+
+def one_to_many(lat, lon, lats, lons=None, out=None, dtype='float64'):
+    """
+    Miles from one point to every point in lats / lons
+
+    Args:
+        lat, lon: the single point
+        lats, lons: (m,) points, or a Points as lats
+        out: optional (m,) array to write into
+        dtype: 'float64' or 'float32'
+
+    Returns:
+        (m,) miles
+    """
+    targets = _points(lats, lons, dtype)
+    return _haversine(Points(lat, lon, targets.lat.dtype), targets, out)
+
+
+def pairwise(lat1, lon1, lat2, lon2, out=None, dtype='float64'):
+    """
+    Full (n, m) distance matrix
+
+    Args:
+        lat1, lon1: (n,) row points
+        lat2, lon2: (m,) column points
+        out: optional (n, m) array to fill
+        dtype: 'float64' or 'float32'
+
+    Returns:
+        (n, m) miles, n * m * itemsize bytes, see pairwise_blocks for big inputs
+    """
+    p = Points(lat1, lon1, dtype)
+    q = Points(lat2, lon2, dtype)
+    return _pairwise(p, q, slice(None), out)
+
+
+def _pairwise(p, q, rows, out=None, scratch=None):
+    lat = p.lat[rows, None]
+    n, m = len(lat), len(q.lat)
+    if out is None:
+        out = np.empty((n, m), dtype=np.result_type(p.lat, q.lat))
+    if scratch is None:
+        scratch = np.empty_like(out)
+
+    # sin²(dlat/2) straight into out, the lon term in one scratch matrix
+    np.subtract(q.lat[None, :], lat, out=out)
+    out *= 0.5
+    np.sin(out, out=out)
+    out *= out
+    np.subtract(q.lon[None, :], p.lon[rows, None], out=scratch)
+    scratch *= 0.5
+    np.sin(scratch, out=scratch)
+    scratch *= scratch
+    scratch *= p.cos_lat[rows, None]
+    scratch *= q.cos_lat[None, :]
+    out += scratch
+    return _finish(out, out)
+
+
+def pairwise_blocks(lat1, lon1, lat2, lon2, max_bytes=BLOCK_BYTES, dtype='float64'):
+    """
+    Yield (row slice, block of the distance matrix) so at most about
+    max_bytes of distances exist at once (the block buffer is reused, copy
+    it if it has to outlive the next step)
+
+    Args:
+        lat1, lon1: (n,) row points
+        lat2, lon2: (m,) column points
+        max_bytes: memory cap for one block (2 blocks worth with the scratch)
+        dtype: 'float64' or 'float32'
+    """
+    p = Points(lat1, lon1, dtype)
+    q = Points(lat2, lon2, dtype)
+    n, m = len(p.lat), len(q.lat)
+    itemsize = np.dtype(dtype).itemsize
+    rows = max(1, min(n, max_bytes // max(1, m * itemsize * 2)))
+    buffer = np.empty((rows, m), dtype=dtype)
+    scratch = np.empty((rows, m), dtype=dtype)
+    for start in range(0, n, rows):
+        stop = min(start + rows, n)
+        yield slice(start, stop), _pairwise(p, q, slice(start, stop), buffer[:stop - start],
+                                            scratch[:stop - start])
+
+
+def reduce_pairwise(lat1, lon1, lat2, lon2, reducer, max_bytes=BLOCK_BYTES, dtype='float64'):
+    """
+    Apply reducer(block) -> one value (or row) per row point to every block
+    and stack the results, e.g. the nearest column or a count within a radius
+    without ever holding the whole matrix
+
+    Args:
+        reducer: function of an (rows, m) block returning (rows, ...) results
+        max_bytes, dtype: see pairwise_blocks
+
+    Returns:
+        (n, ...) array
+    """
+    parts = [reducer(block) for _, block in pairwise_blocks(lat1, lon1, lat2, lon2, max_bytes, dtype)]
+    return np.concatenate(parts) if parts else np.empty(0)
@@ -0,0 +1,173 @@
+"""
+Listing Reverse Geocoder
+Gives every RVshare listing the GeoID of the county it's actually parked in,
+search_county is only the county whose search found it (a van in Orange
+Beach shows up in every search within 50+ miles)
+- fast path: one batched KD-tree query over the gazetteer county centroids
+  (geo_index.SphereIndex), listings whose nearest centroid is in another
+  state fall back to their nearest centroid in their own state. It's only an
+  approximation, near a line between a small and a big county it picks the
+  wrong one (Roseville lands in Sacramento County, not Placer)
+- exact path (polygons=True): point in polygon against the census county
+  boundaries through a shapely STRtree, the centroid answer stays for the
+  few points no polygon contains (on the coast, rounded coordinates)
+- writes rvshare_listings_geocoded.csv, the listings plus GeoID,
+  GeoID_Method and Centroid_Distance_Miles (to the centroid of the county
+  in GeoID, whichever way it was found)
+
+    python geocode_listings.py              # centroids only
+    python geocode_listings.py --polygons   # refine with the county shapes
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import gazetteer
+import geo_kernels
+from geo_index import SphereIndex
+
+LISTINGS_FILE = '../Data/processed/rvshare_api_data.csv'
+OUTPUT_FILE = '../Data/processed/rvshare_listings_geocoded.csv'
+# census cartographic boundary counties (any file geopandas reads works)
+COUNTY_SHAPES = '../Data/raw/cb_2023_us_county_500k.zip'
+
+# neighbors looked at when the nearest centroid is across a state line
+STATE_CANDIDATES = 16
+
+
+def nearest_counties(lat, lng, state=None, gaz=None, k=STATE_CANDIDATES):
+    """
+    GeoID of the nearest county centroid for every point
+
+    Args:
+        lat, lng: listing coordinates (NaN allowed, they get None)
+        state: optional USPS codes, the nearest centroid in the same state wins
+        gaz: gazetteer records (default gazetteer.load())
+        k: centroids checked per point when matching the state
+
+    Returns:
+        (geoids, miles) object / float arrays
+    """
+    gaz = gazetteer.load() if gaz is None else gaz
+    geoids = np.asarray(gaz['GEOID']).astype(str)
+    index = SphereIndex(gaz['INTPTLAT'], gaz['INTPTLONG'])
+
+    miles, idx = index.query_nearest(lat, lng, k=k)
+    pick = np.zeros(len(idx), dtype=np.int64)
+    if state is not None:
+        usps = np.asarray(gaz['USPS']).astype(str)
+        same_state = (idx >= 0) & (usps[np.maximum(idx, 0)] == np.asarray(state, dtype=str)[:, None])
+        # first candidate in the right state, or the nearest overall if none of them are
+        pick = np.where(same_state.any(axis=1), same_state.argmax(axis=1), 0)
+
+    rows = np.arange(len(idx))
+    chosen = idx[rows, pick]
+    result = np.where(chosen >= 0, geoids[np.maximum(chosen, 0)], None)
+    return result, miles[rows, pick]
+
+
+def polygon_counties(lat, lng, shapes_path=COUNTY_SHAPES):
+    """
+    GeoID of the county polygon containing each point (None outside all of them)
+
+    Needs geopandas / shapely, one STRtree over the counties answers every
+    point in a single query
+    """
+    import geopandas as gpd
+    import shapely
+
+    counties = gpd.read_file(shapes_path, columns=['GEOID'])
+    counties = counties.to_crs('EPSG:4326')
+    points = gpd.points_from_xy(np.asarray(lng, dtype='float64'), np.asarray(lat, dtype='float64'))
+
+    tree = shapely.STRtree(counties.geometry.values)
+    point_idx, county_idx = tree.query(points, predicate='within')
+    found = np.full(len(points), None, dtype=object)
+    # a point on a shared edge can be in two, keep the first
+    first = np.unique(point_idx, return_index=True)[1]
+    found[point_idx[first]] = counties['GEOID'].values[county_idx[first]]
+    return found
+
+
+def geocode_listings(df=None, polygons=False, save=True, shapes_path=COUNTY_SHAPES):
+    """
+    Add GeoID, GeoID_Method ('centroid' / 'polygon') and Centroid_Distance_Miles to the listings
+
+    Args:
+        df: listings (None = read rvshare_api_data.csv)
+        polygons: refine with point in polygon (falls back to centroids if the
+                  shapes file or geopandas is missing)
+        save: write rvshare_listings_geocoded.csv
+
+    Returns:
+        the listings DataFrame (None on error)
+    """
+    if df is None:
+        if not os.path.exists(LISTINGS_FILE):
+            print(f"Error: {LISTINGS_FILE} not found. Run fetch_rvshare_api.py first.")
+            return None
+        df = pd.read_csv(LISTINGS_FILE)
+    gaz = gazetteer.load()
+    if gaz is None:
+        print("Error: Gazetteer text file not found. Run download_land_area.py first.")
+        return None
+
+    t0 = time.perf_counter()
+    state = df['state'].fillna('').values if 'state' in df.columns else None
+    geoids, miles = nearest_counties(df['lat'].values, df['lng'].values, state, gaz)
+    method = np.where(pd.notna(geoids), 'centroid', None)
+
+    if polygons:
+        if not os.path.exists(shapes_path):
+            print(f"Warning: {shapes_path} not found, keeping the centroid answers.")
+        else:
+            try:
+                exact = polygon_counties(df['lat'].values, df['lng'].values, shapes_path)
+            except ImportError as e:
+                print(f"Warning: point in polygon needs geopandas / shapely ({e}), keeping the centroid answers.")
+            else:
+                inside = pd.notna(exact)
+                print(f"Point in polygon: {inside.sum()} of {len(df)} listings, "
+                      f"{(exact[inside] != geoids[inside]).sum()} moved off their nearest centroid's county")
+                geoids = np.where(inside, exact, geoids)
+                method = np.where(inside, 'polygon', method)
+                # measure to the polygon's county, not the centroid it replaced
+                rows = gazetteer.rows_for(gaz, exact[inside])
+                found = rows >= 0
+                miles = np.asarray(miles, dtype='float64').copy()
+                moved = np.flatnonzero(inside)
+                miles[moved] = np.nan
+                miles[moved[found]] = geo_kernels.haversine(
+                    df['lat'].values[moved[found]], df['lng'].values[moved[found]],
+                    gaz['INTPTLAT'][rows[found]], gaz['INTPTLONG'][rows[found]])
+
+    df = df.copy()
+    df['GeoID'] = pd.array(geoids, dtype='string')
+    df['GeoID_Method'] = method
+    df['Centroid_Distance_Miles'] = miles
+    print(f"Geocoded {df['GeoID'].notna().sum()} of {len(df)} listings in {time.perf_counter() - t0:.2f}s")
+
+    if 'search_county' in df.columns:
+        # how often the searched county is where the van actually is, with
+        # centroid answers that's partly the geocoder's own error so say which
+        rows = gazetteer.rows_for(gaz, df['GeoID'].fillna(''))
+        names = np.where(rows >= 0, np.asarray(gaz['NAME'])[np.maximum(rows, 0)], None)
+        same = (names == df['search_county'].values).mean()
+        by_centroid = (df['GeoID_Method'] == 'centroid').mean()
+        basis = ("point in polygon" if by_centroid == 0 else
+                 f"{by_centroid:.0%} by nearest centroid, approximate near county lines")
+        print(f"Listing county matches search_county for {same:.1%} of listings ({basis})")
+
+    if save:
+        df.to_csv(OUTPUT_FILE, index=False)
+        print(f"Saved to {OUTPUT_FILE}")
+    return df
+
+
+if __name__ == "__main__":
+    if geocode_listings(polygons='--polygons' in sys.argv) is None:
+        sys.exit(1)
@@ -0,0 +1,256 @@
+"""
+On-Disk HTTP Cache
+One caching layer for every fetcher (census, gazetteer, overpass, rvshare)
+- requests are keyed by method + fully encoded url (params included)
+- bodies are stored gzip compressed and content addressed (sha256 of the body),
+  so identical responses are only stored once
+- each entry has a TTL, inside it we never touch the network
+- once it expires we revalidate with If-None-Match / If-Modified-Since and a
+  304 just refreshes the entry
+- if the network fails and we have an old copy, the old copy is used
+
+    response = http_cache.get(url, params=params, ttl=http_cache.DAY * 30)
+    data = response.json()
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+CACHE_DIR = '../Data/cache/http'
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+DEFAULT_TTL = 7 * DAY
+
+
+def request_url(url, params=None):
+    """Fully encoded url the way requests would send it"""
+    return requests.Request('GET', url, params=params).prepare().url
+
+
+def _atomic_write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class CachedResponse:
+    """The parts of requests.Response the fetchers use"""
+
+    def __init__(self, url, status_code, headers, content, from_cache):
+        self.url = url
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.content = content
+        self.from_cache = from_cache
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.HTTPError(f"{self.status_code} error for url: {self.url}")
+
+
+class HttpCache:
+    """
+    Args:
+        cache_dir: root folder for metadata and compressed bodies
+        ttl: default seconds an entry is served without asking the server
+        session: requests.Session used for network calls
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, ttl=DEFAULT_TTL, session=None):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.session = session or requests.Session()
+
+    # --- storage ---
+
+    def _key(self, method, url):
+        return hashlib.sha256(f"{method} {url}".encode('utf-8')).hexdigest()
+
+    def _meta_path(self, key):
+        return os.path.join(self.cache_dir, 'meta', key[:2], key + '.json')
+
+    def _blob_path(self, digest):
+        return os.path.join(self.cache_dir, 'blobs', digest[:2], digest + '.gz')
+
+    def _load_meta(self, key):
+        try:
+            with open(self._meta_path(key), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _read_body(self, meta):
+        try:
+            with gzip.open(self._blob_path(meta['body_sha256']), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_meta(self, key, meta):
+        _atomic_write(self._meta_path(key), json.dumps(meta).encode('utf-8'))
+
+    def _response(self, meta, content, from_cache=True):
+        return CachedResponse(meta['url'], meta['status'], meta['headers'], content, from_cache)
+
+    # --- lower level api (used directly by the async collector) ---
+
+    def lookup(self, url, params=None, ttl=None):
+        """Fresh cached response or None, never touches the network"""
+        full_url = request_url(url, params)
+        meta = self._load_meta(self._key('GET', full_url))
+        if meta is None:
+            return None
+        ttl = self.ttl if ttl is None else ttl
+        if time.time() - meta['stored_at'] > ttl:
+            return None
+        content = self._read_body(meta)
+        return None if content is None else self._response(meta, content)
+
+    def entry(self, url, params=None, ttl=None):
+        """Metadata of a fresh cached response (url, status, body_sha256, ...) without reading the body"""
+        meta = self._load_meta(self._key('GET', request_url(url, params)))
+        if meta is None:
+            return None
+        ttl = self.ttl if ttl is None else ttl
+        if time.time() - meta['stored_at'] > ttl:
+            return None
+        return meta
+
+    def stale(self, url, params=None):
+        """Cached response regardless of age (or None)"""
+        full_url = request_url(url, params)
+        meta = self._load_meta(self._key('GET', full_url))
+        if meta is None:
+            return None
+        content = self._read_body(meta)
+        return None if content is None else self._response(meta, content)
+
+    def conditional_headers(self, url, params=None):
+        """If-None-Match / If-Modified-Since headers for revalidating an expired entry"""
+        meta = self._load_meta(self._key('GET', request_url(url, params)))
+        headers = {}
+        if meta:
+            if meta['headers'].get('ETag'):
+                headers['If-None-Match'] = meta['headers']['ETag']
+            if meta['headers'].get('Last-Modified'):
+                headers['If-Modified-Since'] = meta['headers']['Last-Modified']
+        return headers
+
+    def store(self, url, params, status_code, headers, content):
+        """Save a 200 response"""
+        full_url = request_url(url, params)
+        digest = hashlib.sha256(content).hexdigest()
+        blob_path = self._blob_path(digest)
+        if not os.path.exists(blob_path):
+            _atomic_write(blob_path, gzip.compress(content, compresslevel=6))
+
+        keep = {k: headers.get(k) for k in ('Content-Type', 'ETag', 'Last-Modified') if headers.get(k)}
+        meta = {'url': full_url, 'status': status_code, 'headers': keep,
+                'body_sha256': digest, 'stored_at': time.time()}
+        self._write_meta(self._key('GET', full_url), meta)
+        return self._response(meta, content, from_cache=False)
+
+    def touch(self, url, params=None):
+        """Server said 304, restart the entry's TTL and return it"""
+        full_url = request_url(url, params)
+        key = self._key('GET', full_url)
+        meta = self._load_meta(key)
+        if meta is None:
+            return None
+        meta['stored_at'] = time.time()
+        self._write_meta(key, meta)
+        content = self._read_body(meta)
+        return None if content is None else self._response(meta, content)
+
+    def forget(self, url, params=None):
+        """Drop an entry (a 200 whose body turned out to be an error), the blob stays for other keys"""
+        try:
+            os.remove(self._meta_path(self._key('GET', request_url(url, params))))
+        except FileNotFoundError:
+            pass
+
+    # --- main entry point ---
+
+    def get(self, url, params=None, ttl=None, timeout=None, headers=None, secret_params=None):
+        """
+        GET through the cache
+
+        Args:
+            url: base url
+            params: query parameters (part of the cache key)
+            ttl: seconds to trust a cached copy (default: the cache's ttl, 0 = always revalidate)
+            timeout: passed to requests
+            headers: extra request headers
+            secret_params: query parameters only sent on the live request (api keys),
+                           never part of the cache key or the url saved with the entry
+
+        Returns:
+            CachedResponse (from_cache tells whether the network was used)
+        """
+        cached = self.lookup(url, params, ttl)
+        if cached is not None:
+            return cached
+
+        request_headers = dict(headers or {})
+        request_headers.update(self.conditional_headers(url, params))
+        send_params = {**(params or {}), **(secret_params or {})}
+        try:
+            resp = self.session.get(url, params=send_params, timeout=timeout, headers=request_headers)
+        except requests.RequestException:
+            # offline or the server is down - an old copy beats nothing
+            stale = self.stale(url, params)
+            if stale is not None:
+                print(f"  Network error, using cached copy of {stale.url}")
+                return stale
+            raise
+
+        if resp.status_code == 304:
+            refreshed = self.touch(url, params)
+            if refreshed is not None:
+                return refreshed
+            # body went missing from disk, ask again without conditions
+            resp = self.session.get(url, params=send_params, timeout=timeout, headers=headers)
+
+        if resp.status_code == 200:
+            return self.store(url, params, resp.status_code, resp.headers, resp.content)
+        # resp.url would carry the secret params
+        return CachedResponse(request_url(url, params), resp.status_code, resp.headers, resp.content,
+                              from_cache=False)
+
+
+_default_cache = None
+
+
+def default_cache():
+    """Shared cache instance for the pipeline scripts"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = HttpCache()
+    return _default_cache
+
+
+def get(url, params=None, ttl=None, timeout=None, headers=None, secret_params=None):
+    """GET through the shared cache (see HttpCache.get)"""
+    return default_cache().get(url, params=params, ttl=ttl, timeout=timeout, headers=headers,
+                               secret_params=secret_params)
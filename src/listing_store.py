@@ -0,0 +1,156 @@
+"""
+RVshare Listing Store
+SQLite (WAL mode) store for collected listings so a resumed collection doesnt
+have to re-read the whole csv, and a crash never leaves half a batch behind
+- listings table keyed on listing id with upsert semantics
+- checkpoints table with one row per finished search (county GEOID)
+- each county's listings and its checkpoint are committed in one transaction
+- export_csv writes the rvshare_api_data.csv layout finalize_rvshare_data.py expects
+"""
+
+import os
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+STORE_FILE = '../Data/pre_processed_data/rvshare_listings.sqlite'
+
+# column name -> sqlite type, in the order of the csv export
+LISTING_COLUMNS = {
+    'id': 'TEXT PRIMARY KEY',
+    'headline': 'TEXT',
+    'make_model': 'TEXT',
+    'year': 'INTEGER',
+    'type': 'TEXT',
+    'price_nightly': 'REAL',
+    'sleeps': 'INTEGER',
+    'length': 'REAL',
+    'fresh_water_tank': 'REAL',
+    'electric_service': 'REAL',
+    'generator_included': 'INTEGER',
+    'lat': 'REAL',
+    'lng': 'REAL',
+    'state': 'TEXT',
+    'city': 'TEXT',
+    'review_score': 'REAL',
+    'review_count': 'INTEGER',
+    'is_instant_book': 'INTEGER',
+    'search_county': 'TEXT',
+    'has_bathroom': 'INTEGER',
+    'has_generator': 'INTEGER',
+}
+
+# keep the first county a listing was found from, refresh everything else
+_UPDATE_COLUMNS = [c for c in LISTING_COLUMNS if c not in ('id', 'search_county')]
+
+
+class ListingStore:
+    """
+    Listings + per-search checkpoints in one sqlite file
+
+    Args:
+        path: database file (created if missing)
+    """
+
+    def __init__(self, path=STORE_FILE):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')  # safe with WAL, much faster commits
+
+        columns = ',\n'.join(f'{name} {sql_type}' for name, sql_type in LISTING_COLUMNS.items())
+        with self.conn:
+            self.conn.execute(f'CREATE TABLE IF NOT EXISTS listings (\n{columns}\n)')
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS checkpoints (
+                search_key TEXT PRIMARY KEY,
+                finished_at TEXT,
+                n_results INTEGER
+            )''')
+
+        names = ', '.join(LISTING_COLUMNS)
+        placeholders = ', '.join(f':{c}' for c in LISTING_COLUMNS)
+        updates = ', '.join(f'{c} = excluded.{c}' for c in _UPDATE_COLUMNS)
+        self._upsert_sql = (f'INSERT INTO listings ({names}) VALUES ({placeholders}) '
+                            f'ON CONFLICT(id) DO UPDATE SET {updates}')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM listings').fetchone()[0]
+
+    def has_listing(self, listing_id):
+        """Primary key lookup"""
+        row = self.conn.execute('SELECT 1 FROM listings WHERE id = ?', (str(listing_id),)).fetchone()
+        return row is not None
+
+    def is_done(self, search_key):
+        """True if this search already finished in an earlier run"""
+        row = self.conn.execute('SELECT 1 FROM checkpoints WHERE search_key = ?', (str(search_key),)).fetchone()
+        return row is not None
+
+    def done_keys(self):
+        """Every finished search key"""
+        return {row[0] for row in self.conn.execute('SELECT search_key FROM checkpoints')}
+
+    def _rows(self, listings):
+        for rv in listings:
+            row = {c: rv.get(c) for c in LISTING_COLUMNS}
+            row['id'] = str(row['id'])
+            yield row
+
+    def upsert(self, listings):
+        """Insert or refresh listings (dicts with LISTING_COLUMNS keys)"""
+        with self.conn:
+            self.conn.executemany(self._upsert_sql, self._rows(listings))
+
+    def save_search(self, search_key, listings, finished=True):
+        """
+        Upsert one search's listings and mark it finished in a single transaction
+
+        Args:
+            search_key: id of the search (county GEOID)
+            listings: list of listing dicts
+            finished: False keeps the listings but leaves the search to be retried on resume
+        """
+        with self.conn:
+            self.conn.executemany(self._upsert_sql, self._rows(listings))
+            if not finished:
+                return
+            self.conn.execute(
+                'INSERT OR REPLACE INTO checkpoints (search_key, finished_at, n_results) VALUES (?, ?, ?)',
+                (str(search_key), datetime.now().isoformat(timespec='seconds'), len(listings)))
+
+    def import_csv(self, csv_file):
+        """One time migration of a csv written by the old append-only collector"""
+        df = pd.read_csv(csv_file, dtype={'id': str})
+        df = df.astype(object).where(df.notna(), None)
+        self.upsert(df.to_dict('records'))
+        return len(df)
+
+    def to_frame(self):
+        """All listings in insertion order"""
+        df = pd.read_sql_query(f"SELECT {', '.join(LISTING_COLUMNS)} FROM listings ORDER BY rowid", self.conn)
+        df['is_instant_book'] = df['is_instant_book'].astype('boolean')
+        return df
+
+    def export_csv(self, csv_file):
+        """Write the listings to csv in the layout the downstream scripts read"""
+        df = self.to_frame()
+        if os.path.dirname(csv_file):
+            os.makedirs(os.path.dirname(csv_file), exist_ok=True)
+        # write then rename so a crash mid export never leaves a truncated csv
+        tmp_file = csv_file + '.tmp'
+        df.to_csv(tmp_file, index=False)
+        os.replace(tmp_file, csv_file)
+        return len(df)
@@ -0,0 +1,300 @@
+"""
+Local Stub Servers
+Tiny threaded HTTP servers that imitate the remote APIs the pipeline talks to,
+so collectors can be exercised and benchmarked offline
+
+    with StubServer(RVshareStubHandler, latency=0.05) as server, ListingStore(path) as store:
+        collect_listings(df_geo, store.save_search, base_url=server.url('/rv-rental.json'))
+"""
+
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Base handler, subclasses implement handle_get(path, query) -> (status, payload)"""
+
+    def do_GET(self):
+        server = self.server
+        max_in_flight = server.options.get('max_in_flight')
+        with server.lock:
+            server.request_count += 1
+            fail = server.fail_rate and server.rng.random() < server.fail_rate
+            server.in_flight += 1
+            busy = max_in_flight and server.in_flight > max_in_flight
+
+        try:
+            if busy:
+                # more parallel requests than the server allows one client
+                self.send_json(429, {'error': 'too many requests'})
+                return
+
+            if server.latency:
+                time.sleep(server.latency)
+
+            if fail:
+                self.send_json(503, {'error': 'stub failure'})
+                return
+
+            parsed = urlparse(self.path)
+            query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+            status, payload = self.handle_get(parsed.path, query)
+            self.send_json(status, payload)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def handle_get(self, path, query):
+        return 404, {'error': 'not found'}
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        etag = f'"{zlib.crc32(body):08x}"'
+
+        # answer revalidation like a real server so the http cache can be exercised
+        if status == 200 and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if status == 200:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # keep benchmark output clean
+
+
+class RVshareStubHandler(StubHandler):
+    """
+    Fake rv-rental.json search endpoint
+
+    Listings are generated deterministically from the search point so nearby
+    counties share ids the same way real overlapping searches do
+    """
+
+    def handle_get(self, path, query):
+        if not path.endswith('rv-rental.json'):
+            return 404, {'error': 'not found'}
+
+        lat = float(query.get('lat', 0))
+        lng = float(query.get('lng', 0))
+        page = int(query.get('page', 1))
+        limit = int(query.get('limit', 50))
+        per_area = self.server.options.get('listings_per_search', 120)
+
+        # snap to a ~1 degree grid cell so neighbouring searches overlap
+        cell = zlib.crc32(f"{round(lat)}:{round(lng)}".encode())
+        total_pages = max(1, -(-per_area // limit))
+        start = (page - 1) * limit
+        stop = min(start + limit, per_area)
+
+        results = []
+        for n in range(start, stop):
+            rv_id = cell * 1000 + n
+            results.append({
+                'id': rv_id,
+                'attributes': {
+                    'headline': f'Stub Van {rv_id}',
+                    'rv_make_model': 'Mercedes-Benz Sprinter',
+                    'rv_year': 2015 + n % 10,
+                    'type': 'Class B Camping Van',
+                    'rate': 100 + (rv_id % 200),
+                    'how_many_it_sleeps': 2 + n % 3,
+                    'length': 19 + n % 5,
+                    'fresh_water_tank': (n * 7) % 40,
+                    'electric_service': 30,
+                    'generator_usage_included': n % 2,
+                    'location': {'lat': lat, 'lng': lng, 'state': 'ZZ', 'name': 'Stubville'},
+                    'reviews': {'score': 90.0, 'count': n % 20},
+                    'is_instant_book': n % 2 == 0,
+                },
+            })
+
+        return 200, {'data': {'results': results}, 'pagination': {'totalPages': total_pages}}
+
+
+class CensusStubHandler(StubHandler):
+    """
+    Fake api.census.gov ACS endpoint (/data/<year>/acs/acs5[/subject])
+
+    Answers get=VAR,...&for=county:*&in=state:XX (or state:*) with the API's
+    list of lists layout. Values are generated from (year, variable, county)
+    so every run returns the same numbers. Options:
+        counties_per_state: counties in each state (default 62, ~3,200 total)
+        seconds_per_row: extra delay per county returned, bigger answers take
+                         longer like the real thing
+    """
+
+    STATES = ['%02d' % i for i in range(1, 57) if i not in (3, 7, 14, 43, 52)] + ['72']
+
+    def handle_get(self, path, query):
+        parts = path.strip('/').split('/')
+        if len(parts) < 4 or parts[0] != 'data' or parts[2:4] != ['acs', 'acs5']:
+            return 404, {'error': 'unknown dataset'}
+        year = parts[1]
+
+        variables = [v for v in query.get('get', '').split(',') if v]
+        if not variables or len(variables) > 50:
+            return 400, {'error': 'error: you can request at most 50 variables'}
+        if query.get('for') != 'county:*':
+            return 400, {'error': 'error: unsupported geography'}
+
+        state_filter = query.get('in', 'state:*').split(':', 1)[1]
+        states = self.STATES if state_filter == '*' else [state_filter]
+        per_state = self.server.options.get('counties_per_state', 62)
+
+        rows = [variables + ['state', 'county']]
+        for state in states:
+            for n in range(per_state):
+                county = '%03d' % (2 * n + 1)
+                values = []
+                for var in variables:
+                    if var == 'NAME':
+                        values.append(f'Stub County {county}, State {state}')
+                    else:
+                        values.append(str(zlib.crc32(f"{year}:{var}:{state}{county}".encode()) % 1000000))
+                rows.append(values + [state, county])
+
+        delay = self.server.options.get('seconds_per_row', 0.0) * (len(rows) - 1)
+        if delay:
+            time.sleep(delay)
+        return 200, rows
+
+
+class OverpassStubHandler(StubHandler):
+    """
+    Fake Overpass interpreter (/api/interpreter?data=<query>)
+
+    Serves a fixed, generated set of camp sites spread over the US regions.
+    A query with a (south,west,north,east) bbox gets the elements inside it,
+    ways / relations have an extent so the ones near a tile edge come back
+    from both tiles like they do from the real server. Options:
+        campgrounds: how many elements exist (default 20,000)
+        max_elements: a query matching more than this "times out" the way
+                      Overpass does, a 200 with an empty list and a remark
+        seconds_per_element: extra delay per element returned
+        max_in_flight: parallel requests allowed before answering 429
+    """
+
+    # (south, west, north, east, share of the camp sites)
+    REGIONS = [
+        (25.0, -124.5, 49.0, -67.0, 0.86),
+        (55.0, -165.0, 70.0, -131.0, 0.06),
+        (19.0, -160.0, 22.2, -155.0, 0.03),
+        (17.9, -67.3, 18.5, -64.6, 0.03),
+        (13.2, 144.6, 15.3, 145.9, 0.01),
+        (-14.4, -170.9, -14.2, -169.4, 0.01),
+    ]
+    BBOX = re.compile(r'\((-?[\d.]+),(-?[\d.]+),(-?[\d.]+),(-?[\d.]+)\)')
+
+    def elements(self):
+        """Every camp site as (element, extent), generated once per server"""
+        server = self.server
+        with server.lock:
+            if getattr(server, 'overpass_elements', None) is None:
+                rng = random.Random(480)
+                n = server.options.get('campgrounds', 20000)
+                elements = []
+                for i in range(n):
+                    south, west, north, east, _ = rng.choices(self.REGIONS, [r[4] for r in self.REGIONS])[0]
+                    lat = round(rng.uniform(south, north), 7)
+                    lon = round(rng.uniform(west, east), 7)
+                    kind = rng.choices(['node', 'way', 'relation'], [0.7, 0.28, 0.02])[0]
+                    tags = {'tourism': 'camp_site', 'name': f'Stub Campground {i}',
+                            'caravans': rng.choice(['yes', 'no', None])}
+                    tags = {k: v for k, v in tags.items() if v is not None}
+                    if kind == 'node':
+                        element = {'type': 'node', 'id': 100000 + i, 'lat': lat, 'lon': lon, 'tags': tags}
+                        extent = 0.0
+                    else:
+                        element = {'type': kind, 'id': 100000 + i, 'center': {'lat': lat, 'lon': lon}, 'tags': tags}
+                        extent = 0.05
+                    elements.append((element, lat, lon, extent))
+                server.overpass_elements = elements
+        return server.overpass_elements
+
+    def handle_get(self, path, query):
+        if not path.endswith('/interpreter'):
+            return 404, {'error': 'not found'}
+
+        match = self.BBOX.search(query.get('data', ''))
+        if match:
+            south, west, north, east = map(float, match.groups())
+            found = [el for el, lat, lon, ext in self.elements()
+                     if lat + ext >= south and lat - ext <= north and lon + ext >= west and lon - ext <= east]
+        else:
+            found = [el for el, _, _, _ in self.elements()]
+
+        payload = {'version': 0.6, 'generator': 'Overpass API (stub)', 'elements': found}
+        max_elements = self.server.options.get('max_elements')
+        if max_elements and len(found) > max_elements:
+            payload['elements'] = []
+            payload['remark'] = 'runtime error: Query timed out in "query" at line 3 after 180 seconds.'
+        delay = self.server.options.get('seconds_per_element', 0.0) * len(payload['elements'])
+        if delay:
+            time.sleep(delay)
+        return 200, payload
+
+
+class _ThreadingServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # default of 5 drops connections under concurrent clients
+
+
+class StubServer:
+    """
+    Run a stub handler on a random localhost port in a background thread
+
+    Args:
+        handler: StubHandler subclass
+        latency: seconds each request waits before answering
+        fail_rate: fraction of requests answered with a 503
+        seed: rng seed for the failures
+        **options: handler specific settings (available as self.server.options),
+                   max_in_flight works for every handler
+    """
+
+    def __init__(self, handler, latency=0.0, fail_rate=0.0, seed=0, **options):
+        self.httpd = _ThreadingServer(('127.0.0.1', 0), handler)
+        self.httpd.latency = latency
+        self.httpd.fail_rate = fail_rate
+        self.httpd.rng = random.Random(seed)
+        self.httpd.lock = threading.Lock()
+        self.httpd.request_count = 0
+        self.httpd.in_flight = 0
+        self.httpd.options = options
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def request_count(self):
+        return self.httpd.request_count
+
+    def url(self, path=''):
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}{path}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
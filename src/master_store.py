@@ -0,0 +1,149 @@
+"""
+Master Dataset Store
+The county master dataset lives in a typed Parquet file, the csv next to it is
+only an export for Power BI
+- explicit schema: GeoID / State_FIPS stay zero padded strings, the slicer
+  bands are ordered categoricals, measurements are float32 where that's enough
+- readers can ask for just the columns they need (only those are read from disk)
+- if only the csv exists (fresh clone, old pipeline run) it's read and typed
+  with the same schema
+
+    df = master_store.read_master(columns=['GeoID', 'Population_Density'])
+    master_store.write_master(df)
+"""
+
+import os
+
+import pandas as pd
+import pyarrow.parquet as pq
+from pandas.api.types import CategoricalDtype
+
+MASTER_FILE = '../Data/processed/master_dataset.parquet'
+MASTER_CSV = '../Data/processed/master_dataset_powerbi.csv'
+
+INCOME_BANDS = ['Low', 'Medium-Low', 'Medium-High', 'High']
+CLIMATE_ZONES = ['Cold (<40)', 'Cool (40-55)', 'Moderate (55-70)', 'Hot (>70)']
+DENSITY_CATEGORIES = ['Rural', 'Low-Density', 'Medium-Density', 'Urban']
+
+# zero padded code columns -> width
+CODE_WIDTHS = {'GeoID': 5, 'State_FIPS': 2}
+
+# column -> dtype, columns not listed here are stored as they come
+SCHEMA = {
+    'GeoID': 'string',
+    'GeoID_Name': 'string',
+    'Alt_Housing_Growth_Pct': 'float32',
+    'Median_Household_Income': 'float32',
+    'Median_Home_Value': 'float32',
+    'Population': 'float64',  # counts past 2^24 dont fit a float32 exactly
+    'Remote_Work_Pct': 'float32',
+    'Land_Area_Sq_Miles': 'float32',
+    'Population_Density': 'float32',
+    'Avg_Temp_F': 'float32',
+    'Is_Outlier_Growth': 'bool',
+    'Alt_Housing_Growth_Pct_Capped': 'float32',
+    'State_FIPS': 'string',
+    'Income_Band': CategoricalDtype(INCOME_BANDS, ordered=True),
+    'Climate_Zone': CategoricalDtype(CLIMATE_ZONES, ordered=True),
+    'Density_Category': CategoricalDtype(DENSITY_CATEGORIES, ordered=True),
+    'County_Lat': 'float32',
+    'County_Lon': 'float32',
+    'Distance_to_Park_Miles': 'float32',
+    'Nearest_Park': 'category',
+    'Park_Boundary_Distance_Miles': 'float32',
+    'Nearest_Park_Boundary': 'category',
+    'RV_Search_Covered': 'bool',
+}
+
+# fetch_campgrounds writes one count column per radius
+CAMPGROUND_PREFIX = 'Campgrounds_Within_'
+# aggregate_rv_supply writes RV_Listings* counts and float RV_ prices / shares
+RV_PREFIX = 'RV_'
+
+
+def column_dtype(name):
+    """Schema dtype for a column (None if it isnt part of the schema)"""
+    if name in SCHEMA:
+        return SCHEMA[name]
+    if name.startswith(CAMPGROUND_PREFIX):
+        return 'int32'
+    if name.startswith(RV_PREFIX):
+        return 'int32' if name.startswith(RV_PREFIX + 'Listings') else 'float32'
+    return None
+
+
+def apply_schema(df):
+    """Copy of df with every known column cast to its schema dtype"""
+    df = df.copy()
+    for col in df.columns:
+        dtype = column_dtype(col)
+        if dtype is None:
+            continue
+
+        if col in CODE_WIDTHS:
+            # csv readers turn 01001 into 1001 (or 1001.0), put the padding back
+            codes = df[col].astype('string').str.replace(r'\.0$', '', regex=True)
+            df[col] = codes.str.zfill(CODE_WIDTHS[col])
+        elif dtype == 'int32' and df[col].isna().any():
+            df[col] = df[col].astype('float32')  # a count that wasnt computed, keep the gap
+        else:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+def master_exists(path=MASTER_FILE, csv_path=MASTER_CSV):
+    """True if there is a master dataset in either format"""
+    return os.path.exists(path) or os.path.exists(csv_path)
+
+
+def read_master(columns=None, path=MASTER_FILE, csv_path=MASTER_CSV):
+    """
+    Load the master dataset
+
+    Args:
+        columns: only these columns (ones the file doesnt have are skipped, so
+                 callers can keep their `if col in df.columns` checks)
+        path: parquet file
+        csv_path: csv export, used when the parquet file doesnt exist yet
+
+    Returns:
+        typed DataFrame
+    """
+    if os.path.exists(path):
+        if columns is not None:
+            available = set(pq.read_schema(path).names)
+            columns = [c for c in columns if c in available]
+        return pd.read_parquet(path, columns=columns)
+
+    if columns is not None:
+        available = set(pd.read_csv(csv_path, nrows=0).columns)
+        columns = [c for c in columns if c in available]
+    df = pd.read_csv(csv_path, usecols=columns, dtype={c: str for c in CODE_WIDTHS})
+    return apply_schema(df)
+
+
+def write_master(df, path=MASTER_FILE, csv_path=MASTER_CSV):
+    """
+    Save the master dataset as parquet and refresh the csv export
+
+    Args:
+        df: master DataFrame (cast to the schema before writing)
+        path: parquet file
+        csv_path: Power BI export (None to skip it)
+
+    Returns:
+        the typed DataFrame that was written
+    """
+    df = apply_schema(df)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # write then rename so readers never see half a file
+    tmp_file = path + '.tmp'
+    df.to_parquet(tmp_file, index=False)
+    os.replace(tmp_file, path)
+
+    if csv_path is not None:
+        tmp_file = csv_path + '.tmp'
+        df.to_csv(tmp_file, index=False)
+        os.replace(tmp_file, csv_path)
+    return df
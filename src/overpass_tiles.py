@@ -0,0 +1,252 @@
+"""
+Tiled Overpass Queries
+Splits one big Overpass query into bounding box tiles so a timeout or a
+throttled request only costs that tile, not the whole pull
+- CONUS, Alaska (both sides of the antimeridian), Hawaii and the territories
+  are cut into tiles of about tile_degrees on a side
+- each tile keeps the area filter (US, or the territory's own ISO code) so the
+  Canadian / Mexican parts of border tiles are left out like before
+- at most `concurrency` tiles are in flight at once (overpass-api.de gives an
+  IP about two slots), failed tiles are retried in later rounds with a backoff
+  and a tile that timed out is split into quarters first
+- every finished tile is checkpointed as its own .npy of campground records,
+  a rerun only fetches the tiles that are missing
+- the tiles are merged and deduped on (OSM type, id), ways and relations
+  crossing a tile edge come back from both tiles
+
+    records = overpass_tiles.fetch_tiled(OVERPASS_URL, CAMPSITE_FILTER)
+"""
+
+import hashlib
+import io
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import campground_store
+import http_cache
+
+CHECKPOINT_DIR = '../Data/processed/osm_tiles'
+
+# name -> (south, west, north, east, ISO 3166-1 codes of the areas inside it)
+REGIONS = {
+    'conus': (24.3, -125.0, 49.5, -66.8, ('US',)),
+    'alaska': (51.0, -180.0, 71.6, -129.9, ('US',)),
+    'aleutians': (51.0, 172.0, 53.1, 180.0, ('US',)),  # west of the antimeridian
+    'hawaii': (18.8, -160.6, 22.4, -154.6, ('US',)),
+    'caribbean': (17.6, -68.0, 18.6, -64.5, ('PR', 'VI')),
+    'marianas': (13.2, 144.5, 20.6, 146.1, ('GU', 'MP')),
+    'samoa': (-14.6, -171.1, -10.9, -168.1, ('AS',)),
+}
+
+
+class Tile:
+    """One bounding box of a region, `name` is unique and stable across runs"""
+
+    def __init__(self, name, south, west, north, east, areas):
+        self.name = name
+        self.bbox = (south, west, north, east)
+        self.areas = areas
+
+    def __repr__(self):
+        return f"Tile({self.name}, {self.bbox})"
+
+    @property
+    def size(self):
+        south, west, north, east = self.bbox
+        return max(north - south, east - west)
+
+    def quarters(self):
+        """The four tiles this one splits into"""
+        south, west, north, east = self.bbox
+        mid_lat = (south + north) / 2
+        mid_lon = (west + east) / 2
+        boxes = [(south, west, mid_lat, mid_lon), (south, mid_lon, mid_lat, east),
+                 (mid_lat, west, north, mid_lon), (mid_lat, mid_lon, north, east)]
+        return [Tile(f"{self.name}_{i}", *box, self.areas) for i, box in enumerate(boxes)]
+
+
+def make_tiles(tile_degrees=5.0, regions=REGIONS):
+    """
+    Cover every region with a grid of tiles
+
+    Args:
+        tile_degrees: target tile height / width
+        regions: name -> (south, west, north, east, areas)
+
+    Returns:
+        list of Tile
+    """
+    tiles = []
+    for region, (south, west, north, east, areas) in regions.items():
+        rows = max(1, math.ceil((north - south) / tile_degrees))
+        cols = max(1, math.ceil((east - west) / tile_degrees))
+        lat_step = (north - south) / rows
+        lon_step = (east - west) / cols
+        for r in range(rows):
+            for c in range(cols):
+                tiles.append(Tile(f"{region}_{r}_{c}",
+                                  round(south + r * lat_step, 4), round(west + c * lon_step, 4),
+                                  round(south + (r + 1) * lat_step, 4), round(west + (c + 1) * lon_step, 4),
+                                  areas))
+    return tiles
+
+
+def tile_query(tile, tag_filter, timeout=90):
+    """
+    Overpass QL for every node / way / relation matching tag_filter in one tile
+
+    Args:
+        tile: Tile
+        tag_filter: e.g. '["tourism"="camp_site"]'
+        timeout: server side timeout in seconds
+    """
+    bbox = ','.join(f'{v:.5f}' for v in tile.bbox)
+    areas = ''.join(f'area["ISO3166-1"="{code}"];' for code in tile.areas)
+    parts = '\n'.join(f'  {kind}{tag_filter}(area.searchArea)({bbox});' for kind in ('node', 'way', 'relation'))
+    return f"""[out:json][timeout:{timeout}];
+({areas})->.searchArea;
+(
+{parts}
+);
+out center;
+"""
+
+
+def checkpoint_path(tile, tag_filter, checkpoint_dir=CHECKPOINT_DIR):
+    """Where a tile's records are kept, the hash keeps other filters / tile sizes apart"""
+    digest = hashlib.sha256(f"{tag_filter}|{tile.bbox}|{tile.areas}".encode('utf-8')).hexdigest()[:12]
+    return os.path.join(checkpoint_dir, f"{tile.name}_{digest}.npy")
+
+
+def _fresh(path, ttl):
+    return os.path.exists(path) and time.time() - os.path.getmtime(path) <= ttl
+
+
+def completed(tile, tag_filter, checkpoint_dir=CHECKPOINT_DIR, ttl=30 * http_cache.DAY, depth=3):
+    """
+    Checkpoint files covering a tile (its own, or all of its quarters after a
+    split in an earlier run), None if any part is missing or older than ttl
+    """
+    path = checkpoint_path(tile, tag_filter, checkpoint_dir)
+    if _fresh(path, ttl):
+        return [path]
+    if depth == 0:
+        return None
+    paths = []
+    for quarter in tile.quarters():
+        found = completed(quarter, tag_filter, checkpoint_dir, ttl, depth - 1)
+        if found is None:
+            return None
+        paths += found
+    return paths
+
+
+def fetch_tile(tile, url, tag_filter, cache, ttl, checkpoint_dir=CHECKPOINT_DIR, timeout=90):
+    """
+    Fetch, parse and checkpoint one tile
+
+    Returns:
+        None when the tile is done, else why it failed: 'timeout' (the server
+        gave up on the query, worth splitting), 'busy' (429 / 503 / 504) or 'error'
+    """
+    query = tile_query(tile, tag_filter, timeout)
+    try:
+        response = cache.get(url, params={'data': query}, ttl=ttl, timeout=timeout + 30)
+    except Exception as e:
+        print(f"  {tile.name}: {e}")
+        return 'error'
+
+    if response.status_code in (429, 503, 504):
+        return 'busy'
+    if not response.ok:
+        print(f"  {tile.name}: HTTP {response.status_code}")
+        return 'error'
+
+    if campground_store.overpass_error(response.content):
+        # a 200 as far as the cache knows, drop it so the next run asks again
+        cache.forget(url, {'data': query})
+        return 'timeout'
+
+    records = campground_store.build_layer(io.BytesIO(response.content))
+    path = checkpoint_path(tile, tag_filter, checkpoint_dir)
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    with open(path + '.tmp', 'wb') as f:
+        np.save(f, records)
+    os.replace(path + '.tmp', path)
+    return None
+
+
+def fetch_tiled(url, tag_filter, tiles=None, concurrency=2, rounds=4, ttl=30 * http_cache.DAY, cache=None,
+                checkpoint_dir=CHECKPOINT_DIR, min_tile_degrees=0.5, backoff=5.0, timeout=90):
+    """
+    Every element matching tag_filter across all tiles, merged and deduped
+
+    Args:
+        url: Overpass interpreter endpoint
+        tag_filter: Overpass tag filter, e.g. '["tourism"="camp_site"]'
+        tiles: list of Tile (default make_tiles())
+        concurrency: tiles in flight at once
+        rounds: tries per tile, later rounds only retry what failed
+        ttl: seconds a tile checkpoint / cached response is trusted
+        cache: HttpCache (default: the shared one)
+        checkpoint_dir: folder for the per tile records
+        min_tile_degrees: timed out tiles smaller than this are retried, not split
+        backoff: seconds to wait before the second round (doubles every round)
+        timeout: overpass server side timeout per tile
+
+    Returns:
+        campground_store records sorted by (type, id), None if some tiles
+        still failed after every round (the finished ones stay checkpointed)
+    """
+    cache = cache or http_cache.default_cache()
+    tiles = make_tiles() if tiles is None else tiles
+
+    done = []
+    pending = []
+    for tile in tiles:
+        paths = completed(tile, tag_filter, checkpoint_dir, ttl)
+        if paths is None:
+            pending.append(tile)
+        else:
+            done += paths
+    if done:
+        print(f"  {len(tiles) - len(pending)} of {len(tiles)} tiles already checkpointed")
+
+    for attempt in range(rounds):
+        if not pending:
+            break
+        if attempt:
+            wait = backoff * 2 ** (attempt - 1)
+            print(f"  retrying {len(pending)} tiles in {wait:.0f}s")
+            time.sleep(wait)
+
+        # a failed tile may have left a bad 200 in the http cache, ask the server again
+        round_ttl = ttl if attempt == 0 else 0
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            failures = list(pool.map(
+                lambda t: fetch_tile(t, url, tag_filter, cache, round_ttl, checkpoint_dir, timeout), pending))
+
+        retry = []
+        for tile, failure in zip(pending, failures):
+            if failure is None:
+                done.append(checkpoint_path(tile, tag_filter, checkpoint_dir))
+            elif failure == 'timeout' and tile.size / 2 >= min_tile_degrees:
+                retry += tile.quarters()
+            else:
+                retry.append(tile)
+        failed = sum(f is not None for f in failures)
+        print(f"  round {attempt + 1}: {len(pending) - failed} tiles done, {failed} failed")
+        pending = retry
+
+    if pending:
+        print(f"  {len(pending)} tiles still failing: {', '.join(t.name for t in pending[:10])}"
+              f"{' ...' if len(pending) > 10 else ''}")
+        return None
+
+    parts = [np.load(path) for path in done]
+    return campground_store.sort_unique(np.concatenate(parts)) if parts else \
+        np.empty(0, dtype=campground_store.CAMPGROUND_DTYPE)
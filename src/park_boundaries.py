@@ -0,0 +1,108 @@
+"""
+National Park Boundary Distances
+Distance from each county to the nearest national park *edge* instead of the
+park's single coordinate (which makes Yellowstone or Death Valley look a lot
+farther away than they are)
+- boundaries come from the NPS boundary shapefile (nps_boundary.shp, the
+  metadata for it is in Data/raw), filtered to UNIT_TYPE = National Park
+- everything is projected to an equal-area CRS, Conus Albers for the lower
+  48 with Alaska / Hawaii / Puerto Rico getting their own, so distances are
+  plain planar meters
+- polygons are simplified once at load time (100 m by default), a few
+  thousand vertices per park instead of hundreds of thousands
+- one shapely STRtree over the parks per CRS, query_nearest prunes to the
+  candidates whose boxes are close and measures only those, a county
+  centroid inside a park is 0 miles
+
+    parks = park_boundaries.load_boundaries()
+    miles, names = park_boundaries.boundary_distances(df['County_Lat'], df['County_Lon'],
+                                                      df['State_FIPS'], parks)
+"""
+
+import os
+
+import geopandas as gpd
+import numpy as np
+import shapely
+
+BOUNDARY_FILE = '../Data/raw/nps_boundary.shp'
+
+METERS_PER_MILE = 1609.344
+
+# state FIPS -> equal-area CRS used for that state's counties (and the parks measured against them)
+STATE_CRS = {
+    '02': 'EPSG:3338',      # Alaska Albers
+    '15': 'ESRI:102007',    # Hawaii Albers
+    '72': 'EPSG:32161',     # Puerto Rico / Virgin Islands (Lambert, the closest local choice)
+}
+DEFAULT_CRS = 'EPSG:5070'   # NAD83 Conus Albers
+
+PARK_TYPES = ('National Park',)
+
+
+def load_boundaries(path=BOUNDARY_FILE, unit_types=PARK_TYPES, simplify_meters=100):
+    """
+    Park polygons in every CRS the counties need, simplified
+
+    Args:
+        path: anything geopandas can read (shapefile, zipped shapefile, geopackage)
+        unit_types: UNIT_TYPE values to keep (None = every unit in the file)
+        simplify_meters: Douglas-Peucker tolerance, 0 to keep every vertex
+
+    Returns:
+        dict CRS -> GeoDataFrame with Name and geometry
+    """
+    parks = gpd.read_file(path)
+    if unit_types and 'UNIT_TYPE' in parks.columns:
+        parks = parks[parks['UNIT_TYPE'].isin(unit_types)]
+    name_col = 'UNIT_NAME' if 'UNIT_NAME' in parks.columns else parks.columns[0]
+    parks = parks[[name_col, 'geometry']].rename(columns={name_col: 'Name'})
+    parks = parks[parks.geometry.notna() & ~parks.geometry.is_empty]
+    if parks.crs is None:
+        parks = parks.set_crs('EPSG:4326')
+
+    projected = {}
+    for crs in set(STATE_CRS.values()) | {DEFAULT_CRS}:
+        layer = parks.to_crs(crs)
+        if simplify_meters:
+            layer['geometry'] = layer.geometry.simplify(simplify_meters, preserve_topology=True)
+        projected[crs] = layer.reset_index(drop=True)
+    return projected
+
+
+def boundary_distances(lat, lon, state_fips, parks):
+    """
+    Miles from every point to the nearest park boundary, and that park's name
+
+    Args:
+        lat, lon: county coordinates (NaN allowed, they get NaN / None)
+        state_fips: two digit state codes, choose each point's CRS
+        parks: load_boundaries() result
+
+    Returns:
+        (miles, names) arrays of len(lat)
+    """
+    lat = np.asarray(lat, dtype='float64')
+    lon = np.asarray(lon, dtype='float64')
+    state_fips = np.asarray(state_fips, dtype=object)
+    miles = np.full(len(lat), np.nan)
+    names = np.full(len(lat), None, dtype=object)
+
+    valid = ~(np.isnan(lat) | np.isnan(lon))
+    point_crs = np.array([STATE_CRS.get(s, DEFAULT_CRS) for s in state_fips], dtype=object)
+    for crs, layer in parks.items():
+        rows = np.flatnonzero(valid & (point_crs == crs))
+        if not len(rows) or layer.empty:
+            continue
+        points = gpd.GeoSeries(gpd.points_from_xy(lon[rows], lat[rows]), crs='EPSG:4326').to_crs(crs)
+
+        tree = shapely.STRtree(layer.geometry.values)
+        (point_idx, park_idx), dist = tree.query_nearest(points.values, return_distance=True, all_matches=False)
+        miles[rows[point_idx]] = dist / METERS_PER_MILE
+        names[rows[point_idx]] = layer['Name'].values[park_idx]
+    return miles, names
+
+
+def boundary_file_exists(path=BOUNDARY_FILE):
+    """The shapefile itself (not just its .xml metadata) is there"""
+    return os.path.exists(path)
@@ -0,0 +1,145 @@
+"""
+RVshare Query Planner
+Picks a small set of search centers so every county centroid is within the
+search radius of at least one center (greedy set cover over a radius index)
+
+Searching every county centroid at 50 miles overlaps heavily in the dense
+eastern states, most of those responses are listings we already have. The
+planner keeps one search per neighbourhood instead of one per county.
+
+Note: covering a county's centroid is not the same as covering its whole 50 mile
+search disk, pass a smaller cover_radius to trade requests for overlap.
+"""
+
+import heapq
+import os
+
+import numpy as np
+import pandas as pd
+
+from geo_index import SphereIndex
+
+PLAN_FILE = '../Data/raw/gazetteer/rvshare_query_plan.csv'
+
+# miles every RVshare search reaches (the 'distance' param in fetch_rvshare_api),
+# a cover radius past it would leave counties outside every search
+SEARCH_DISTANCE = 50
+
+
+def plan_query_centers(lat, lon, cover_radius=50):
+    """
+    Greedy set cover of points by radius disks centered on the points themselves
+
+    Args:
+        lat: array of point latitudes
+        lon: array of point longitudes
+        cover_radius: miles, a point is covered if a chosen center is within this distance
+
+    Returns:
+        (centers, assigned) - centers is an array of chosen point indices in pick order,
+        assigned gives for every point the index of the center that covered it (-1 if no coords)
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    n = len(lat)
+
+    index = SphereIndex(lat, lon)
+    center_idx, point_idx, _ = index.query_radius_pairs(lat, lon, cover_radius)
+
+    # csr layout: neighbours of candidate i are point_idx[starts[i]:starts[i + 1]]
+    order = np.argsort(center_idx, kind='stable')
+    center_idx = center_idx[order]
+    point_idx = point_idx[order]
+    starts = np.searchsorted(center_idx, np.arange(n + 1))
+
+    covered = np.isnan(lat) | np.isnan(lon)  # nothing to cover for missing coords
+    assigned = np.full(n, -1, dtype=np.int64)
+    centers = []
+
+    # lazy greedy - a candidate's gain can only shrink so a stale heap entry is an upper bound
+    heap = [(-(starts[i + 1] - starts[i]), i) for i in range(n) if not covered[i]]
+    heapq.heapify(heap)
+    remaining = int((~covered).sum())
+
+    while heap and remaining > 0:
+        neg_gain, i = heapq.heappop(heap)
+        neighbours = point_idx[starts[i]:starts[i + 1]]
+        gain = int((~covered[neighbours]).sum())
+        if gain == 0:
+            continue
+        if gain < -neg_gain:
+            heapq.heappush(heap, (-gain, i))
+            continue
+
+        new = neighbours[~covered[neighbours]]
+        covered[new] = True
+        assigned[new] = i
+        remaining -= len(new)
+        centers.append(i)
+
+    return np.array(centers, dtype=np.int64), assigned
+
+
+def build_query_plan(df_geo, cover_radius=SEARCH_DISTANCE):
+    """
+    Build the list of search centers for the RVshare collector
+
+    Args:
+        df_geo: gazetteer DataFrame with GEOID, NAME, INTPTLAT, INTPTLONG (USPS optional)
+        cover_radius: miles
+
+    Returns:
+        DataFrame of centers in the same layout as df_geo plus Counties_Covered
+    """
+    if cover_radius > SEARCH_DISTANCE:
+        raise ValueError(f"cover_radius {cover_radius} is past the {SEARCH_DISTANCE} mile search distance, "
+                         "counties between the two would never be searched")
+    centers, assigned = plan_query_centers(df_geo['INTPTLAT'].values, df_geo['INTPTLONG'].values,
+                                           cover_radius)
+    covered_counts = np.bincount(assigned[assigned >= 0], minlength=len(df_geo))
+
+    df_plan = df_geo.iloc[centers].copy()
+    df_plan['Counties_Covered'] = covered_counts[centers]
+    return df_plan.reset_index(drop=True)
+
+
+def plan_report(df_geo, df_plan, pages_per_search=3):
+    """Print how many requests the plan saves against searching every county"""
+    per_county = len(df_geo)
+    planned = len(df_plan)
+    saved = 1 - planned / per_county if per_county else 0
+
+    print(f"Per-county plan: {per_county:,} searches (up to {per_county * pages_per_search:,} page requests)")
+    print(f"Covering plan:   {planned:,} searches (up to {planned * pages_per_search:,} page requests)")
+    print(f"Saves {saved:.1%} of requests")
+
+    if 'USPS' in df_geo.columns:
+        by_state = pd.DataFrame({
+            'Counties': df_geo.groupby('USPS').size(),
+            'Searches': df_plan.groupby('USPS').size(),
+        }).fillna(0).astype(int)
+        by_state['Saved_Pct'] = (1 - by_state['Searches'] / by_state['Counties']) * 100
+        print("\nStates with the most overlap:")
+        print(by_state.sort_values('Saved_Pct', ascending=False).head(10).to_string(float_format='%.1f'))
+
+
+def plan_rvshare_queries(cover_radius=SEARCH_DISTANCE):
+    """Build the plan from the gazetteer, print the report and save it"""
+    # imported here so importing the planner doesnt pull in requests
+    from fetch_rvshare_api import load_county_points
+
+    df_geo = load_county_points()
+    if df_geo is None:
+        return None
+
+    df_plan = build_query_plan(df_geo, cover_radius)
+    plan_report(df_geo, df_plan)
+
+    os.makedirs(os.path.dirname(PLAN_FILE), exist_ok=True)
+    df_plan.to_csv(PLAN_FILE, index=False)
+    print(f"\nSaved {len(df_plan)} search centers to {PLAN_FILE}")
+    return df_plan
+
+
+if __name__ == "__main__":
+    plan_rvshare_queries()
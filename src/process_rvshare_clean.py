@@ -8,7 +8,9 @@ import pandas as pd
 import numpy as np
 import re
 import os
+import sys
 import glob
+from amenity_matcher import AmenityMatcher
 
 def clean_price(price_str):
     """Convert price string like '$95' or '$1,990' to numeric"""
@@ -26,47 +28,29 @@ def extract_amenities_list(amenity_str):
         return []
     return [a.strip() for a in str(amenity_str).split(',')]
 
-def create_amenity_features(df):
+# flags this dataset has always had (the matcher also knows solar / backup camera
+# for the scraper, they stay out so the output columns dont change)
+AMENITY_FEATURES = [
+    'has_shower', 'has_toilet', 'has_bathroom_sink',
+    'has_refrigerator', 'has_microwave', 'has_kitchen_sink', 'has_stove', 'has_oven',
+    'has_tv', 'has_dvd_player', 'has_radio', 'has_cd_player', 'has_bluetooth',
+    'has_ac', 'has_heating',
+    'has_slide_out', 'has_generator', 'has_awning',
+]
+
+def create_amenity_features(df, matcher=None):
     """
     Create binary amenity features from amenity columns
     
     Args:
         df: DataFrame with bathroom, kitchen, entertainment, temperature_control columns
+        matcher: AmenityMatcher to use (default: AMENITY_FEATURES)
     
     Returns:
         DataFrame with added binary amenity columns
     """
-    
-    # define amenity mappings
-    amenity_map = {
-        # bathroom
-        'has_shower': ['shower'],
-        'has_toilet': ['toilet'],
-        'has_bathroom_sink': ['bathroom sink'],
-        
-        # kitchen
-        'has_refrigerator': ['refrigerator', 'fridge'],
-        'has_microwave': ['microwave'],
-        'has_kitchen_sink': ['kitchen sink'],
-        'has_stove': ['range', 'stove', 'range (stove)'],
-        'has_oven': ['oven'],
-        
-        # entertainment
-        'has_tv': ['tv', 'television'],
-        'has_dvd_player': ['dvd player', 'dvd'],
-        'has_radio': ['am/fm radio', 'radio', 'am/fm'],
-        'has_cd_player': ['cd player'],
-        'has_bluetooth': ['bluetooth', 'ipod docking station'],
-        
-        # climate
-        'has_ac': ['air conditioning', 'roof air conditioning', 'in dash air conditioning', 'a/c', 'ac'],
-        'has_heating': ['heating', 'furnace', 'hot & cold water supply'],
-        
-        # other
-        'has_slide_out': ['slide out', 'slideout'],
-        'has_generator': ['generator'],
-        'has_awning': ['awning'],
-    }
+    if matcher is None:
+        matcher = AmenityMatcher(AMENITY_FEATURES)
     
     # combine all amenity columns into one text field per row
     amenity_cols = ['bathroom', 'kitchen', 'entertainment', 'temperature_control']
@@ -76,27 +60,28 @@ def create_amenity_features(df):
         print("  WARNING: No amenity columns found")
         return df
     
-    df['all_amenities_text'] = df[existing_cols].fillna('').agg(' '.join, axis=1).str.lower()
+    # column wise str.cat, a row wise agg(' '.join) costs more than the matching itself
+    texts = [df[col].fillna('').astype(str) for col in existing_cols]
+    df['all_amenities_text'] = texts[0].str.cat(texts[1:], sep=' ').str.lower()
     
-    # create binary features
-    for feature_name, keywords in amenity_map.items():
-        df[feature_name] = df['all_amenities_text'].apply(
-            lambda x: 1 if any(keyword in x for keyword in keywords) else 0
-        )
+    # every flag from one scan of the text (was one .apply pass per feature)
+    flags = matcher.frame(df['all_amenities_text'])
+    for feature in matcher.features:
+        df[feature] = flags[feature]
     
     # count total amenities
-    amenity_feature_cols = list(amenity_map.keys())
-    df['total_amenities'] = df[amenity_feature_cols].sum(axis=1)
+    df['total_amenities'] = flags.sum(axis=1)
     
     return df
 
-def process_classb_data(input_files=None, output_file='../Data/processed/rvshare_classb_amenities.csv'):
+def process_classb_data(input_files=None, output_file='../Data/processed/rvshare_classb_amenities.csv', save=True):
     """
     Process RVshare data and create Class B focused dataset
     
     Args:
         input_files: List of CSV files or glob pattern (default: existing rvshare data)
         output_file: Path to save processed CSV
+        save: write output_file (False just returns the frame)
     """
     
     # default to existing data if no input specified
@@ -232,8 +217,9 @@ def process_classb_data(input_files=None, output_file='../Data/processed/rvshare
     df_final = df_final.sort_values(sort_cols)
     
     # save
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    df_final.to_csv(output_file, index=False)
+    if save:
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        df_final.to_csv(output_file, index=False)
     
     display_cols = ['name', 'year', 'price_nightly_clean', 'total_amenities']
     if 'state' in df_final.columns:
@@ -247,3 +233,5 @@ if __name__ == "__main__":
     
     if df is not None:
         print("done ready!")
+    else:
+        sys.exit(1)
@@ -1,56 +1,406 @@
 #!/usr/bin/env python3
 """
 Master Data Pipeline Runner
-Runs all data collection and processing scripts in the correct order
+Runs all data collection and processing scripts as a dependency graph
+- each stage declares the files it reads and writes, the order between
+  stages comes from those declarations
+- stages whose dependencies are done run at the same time
+- a stage is skipped when its code (script + local modules it imports) and
+  inputs hash the same as on its last successful run
+- if a stage fails but its outputs from an earlier run are still there (say a
+  download while offline) the rest of the graph carries on with them, nothing
+  built on top of it is remembered as up to date
+- --in-process calls the stage functions in this interpreter and hands the
+  DataFrames from one stage to the next, so pandas is imported once and the
+  master csv isnt re-read and re-written by every stage. Outputs are written
+  once at the end (or after every stage with --checkpoint)
+
+Usage:
+    python run_all.py                # incremental build
+    python run_all.py --force        # rerun every stage
+    python run_all.py --jobs 1       # one stage at a time
+    python run_all.py --in-process   # one interpreter, frames passed in memory
 """
 
+import argparse
+import ast
+import hashlib
+import importlib
+import json
+import os
 import subprocess
 import sys
-import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+STATE_FILE = '../Data/.pipeline_state.json'
+
+MASTER = '../Data/processed/master_dataset.parquet'
+MASTER_CSV = '../Data/processed/master_dataset_powerbi.csv'
+CENSUS = '../Data/raw/census_api/county_data_2023.csv'
+LAND_AREA = '../Data/raw/gazetteer/county_land_area.csv'
+GAZETTEER = '../Data/raw/gazetteer/2023_Gaz_counties_national.txt'
+
+# stage name -> script, description, files read, files written
+# when two stages touch the same file the one listed first runs first
+# for --in-process: 'function' is called from the script's module with save=...,
+# it returns the frame for the first output, 'frame_args' maps keyword args to
+# files an earlier stage is holding in memory
+STAGES = [
+    {
+        'name': 'download_census_api',
+        'script': 'download_census_api.py',
+        'function': 'download_census_data',
+        'description': 'Download Census Data',
+        'inputs': [],
+        'outputs': [CENSUS],
+    },
+    {
+        'name': 'download_land_area',
+        'script': 'download_land_area.py',
+        'function': 'download_land_area',
+        'description': 'Download Land Area Data',
+        'inputs': [],
+        'outputs': [LAND_AREA, GAZETTEER],
+    },
+    {
+        'name': 'clean_data',
+        'script': 'clean_data.py',
+        'function': 'clean_data',
+        'frame_args': {'df_census': CENSUS, 'df_land': LAND_AREA},
+        'description': 'Clean and Merge County Data',
+        'inputs': [
+            '../Data/raw/PolicyMap Data (County) (Percent change 5 years).csv',
+            CENSUS,
+            LAND_AREA,
+            '../Data/raw/Noaa-countyaveragetemperature,12month,2024.csv',
+        ],
+        'outputs': [MASTER, MASTER_CSV],
+    },
+    {
+        'name': 'calculate_park_distance',
+        'script': 'calculate_park_distance.py',
+        'function': 'calculate_park_distance',
+        'frame_args': {'df_master': MASTER},
+        'description': 'Distance to Nearest National Park',
+        'inputs': [MASTER, GAZETTEER, '../Data/raw/national_parks_coords.csv'],
+        'outputs': [MASTER, MASTER_CSV],
+    },
+    {
+        'name': 'fetch_campgrounds',
+        'script': 'fetch_campgrounds.py',
+        'function': 'fetch_osm_campgrounds',
+        'frame_args': {'df_master': MASTER},
+        'description': 'Campground Density',
+        'inputs': [MASTER],
+        'outputs': [MASTER, MASTER_CSV],
+    },
+    {
+        'name': 'process_rvshare_clean',
+        'script': 'process_rvshare_clean.py',
+        'function': 'process_classb_data',
+        'description': 'Process RVshare Amenity Data',
+        'inputs': [
+            '../Data/raw/rvshare_classb_scraped.json',
+            '../Data/pre_processed_data/rvshare_api_data.csv',
+            '../Data/processed/rvshare_api_data.csv',
+        ],
+        'outputs': ['../Data/processed/rvshare_classb_amenities.csv'],
+    },
+    {
+        'name': 'geocode_listings',
+        'script': 'geocode_listings.py',
+        'function': 'geocode_listings',
+        'description': 'Assign RVshare Listings to Counties',
+        'inputs': ['../Data/processed/rvshare_api_data.csv', GAZETTEER],
+        'outputs': ['../Data/processed/rvshare_listings_geocoded.csv'],
+    },
+    {
+        'name': 'aggregate_rv_supply',
+        'script': 'aggregate_rv_supply.py',
+        'function': 'aggregate_rv_supply',
+        'frame_args': {'df_master': MASTER, 'df_listings': '../Data/processed/rvshare_listings_geocoded.csv'},
+        'description': 'RV Rental Supply per County',
+        'inputs': [MASTER, '../Data/processed/rvshare_listings_geocoded.csv'],
+        'outputs': [MASTER, MASTER_CSV],
+    },
+]
+
+def file_hash(path):
+    """sha256 of a file's contents ('missing' if it doesnt exist)"""
+    if not os.path.exists(path):
+        return 'missing'
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def local_modules(script, seen=None):
+    """The script plus every module in this folder it imports (recursively)"""
+    seen = set() if seen is None else seen
+    if script in seen or not os.path.exists(script):
+        return seen
+    seen.add(script)
+
+    with open(script, 'r') as f:
+        tree = ast.parse(f.read(), filename=script)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            local_modules(name.split('.')[0] + '.py', seen)
+    return seen
+
+def resolve_dependencies(stages):
+    """stage name -> names of earlier stages that write a file it reads or also writes"""
+    deps = {}
+    last_writer = {}
+    for stage in stages:
+        deps[stage['name']] = {last_writer[path] for path in stage['inputs'] + stage['outputs']
+                               if path in last_writer}
+        for path in stage['outputs']:
+            last_writer[path] = stage['name']
+    return deps
+
+def stage_keys(stages, deps):
+    """
+    Content key per stage from its code, its external inputs and the keys of
+    the stages it depends on (so a change upstream invalidates everything below)
+    """
+    produced = {path for stage in stages for path in stage['outputs']}
+    keys = {}
+    for stage in stages:
+        digest = hashlib.sha256(stage['name'].encode())
+        for module in sorted(local_modules(stage['script'])):
+            digest.update(f"code:{module}:{file_hash(module)}".encode())
+        for path in stage['inputs']:
+            # files made by another stage are covered by that stage's key
+            if path not in produced:
+                digest.update(f"input:{path}:{file_hash(path)}".encode())
+        for dep in sorted(deps[stage['name']]):
+            digest.update(f"dep:{keys[dep]}".encode())
+        keys[stage['name']] = digest.hexdigest()
+    return keys
+
+def load_state():
+    try:
+        with open(STATE_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_state(state):
+    os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
+    tmp_file = STATE_FILE + '.tmp'
+    with open(tmp_file, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_file, STATE_FILE)
 
 def run_script(script_name, description):
-    """Run a Python script and handle errors"""
-    
+    """Run a Python script and handle errors, returns (success, output)"""
+
     try:
         result = subprocess.run(
             [sys.executable, script_name],
-            capture_output=False,
+            capture_output=True,
             text=True,
             check=True
         )
-        return True
+        return True, result.stdout + result.stderr
     except subprocess.CalledProcessError as e:
-        print(f"error here : {e}")
-        return False
+        return False, (e.stdout or '') + (e.stderr or '') + f"\nerror here : {e}"
     except FileNotFoundError:
-        print(f"broken script: {script_name}")
-        return False
+        return False, f"broken script: {script_name}"
+
+def run_function(stage, frames, save):
+    """
+    Call a stage's function in this process, returns (success, output)
+
+    Frames the stage reads come from `frames` (file path -> DataFrame) when an
+    earlier stage left them there, the frame it returns is stored under its
+    first output
+    """
+    try:
+        module = importlib.import_module(stage['script'][:-len('.py')])
+        kwargs = {arg: frames.get(path) for arg, path in stage.get('frame_args', {}).items()}
+        df = getattr(module, stage['function'])(save=save, **kwargs)
+    except Exception:
+        traceback.print_exc()
+        return False, ''
+    if df is None:
+        return False, ''
+    frames[stage['outputs'][0]] = df
+    return True, ''
+
+def write_frames(frames):
+    """Write every frame held in memory to its file, returns seconds spent"""
+    t0 = time.perf_counter()
+    for path, df in frames.items():
+        if path == MASTER:
+            # typed parquet + the power bi csv
+            import master_store
+            master_store.write_master(df, path, MASTER_CSV)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_file = path + '.tmp'
+            df.to_csv(tmp_file, index=False)
+            os.replace(tmp_file, path)
+        print(f"wrote {path}")
+    return time.perf_counter() - t0
+
+def run_pipeline(stages, jobs=4, force=False, in_process=False, checkpoint=False):
+    """
+    Run the stage graph
+
+    Args:
+        stages: list of stage dicts (see STAGES)
+        jobs: max stages running at once
+        force: ignore the saved state and run everything
+        in_process: call the stage functions here instead of a subprocess per script
+        checkpoint: with in_process, write each stage's output as soon as it finishes
+                    (otherwise each file is written once at the end)
+
+    Returns:
+        list of (description, status, seconds)
+    """
+    deps = resolve_dependencies(stages)
+    keys = stage_keys(stages, deps)
+    state = {} if force else load_state()
+    by_name = {stage['name']: stage for stage in stages}
+
+    pending = [stage['name'] for stage in stages]
+    done, failed = set(), set()
+    stale = set()  # failed but left usable outputs from an earlier run (or built on top of those)
+    results = []
+    lock = threading.Lock()
+
+    frames = {}  # in process: file path -> latest DataFrame for it
+    deferred = {}  # in process without checkpoints: state to save once the outputs are written
+    if in_process:
+        jobs = 1  # stages print straight to stdout and share frames
+
+    def run_stage(name):
+        stage = by_name[name]
+        if in_process:
+            print(f"\n--- {stage['description']} ({stage['function']}, in process) ---")
+            t0 = time.perf_counter()
+            success, output = run_function(stage, frames, save=checkpoint)
+            return success, time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        success, output = run_script(stage['script'], stage['description'])
+        elapsed = time.perf_counter() - t0
+        with lock:
+            # print the whole stage at once so parallel output doesnt interleave
+            print(f"\n--- {stage['description']} ({stage['script']}, {elapsed:.1f}s) ---")
+            print(output.rstrip())
+        return success, elapsed
+
+    def record(name):
+        entry = {'key': keys[name], 'finished_at': time.strftime('%Y-%m-%dT%H:%M:%S')}
+        if in_process and not checkpoint:
+            deferred[name] = entry
+        else:
+            state[name] = entry
+            save_state(state)
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        running = {}
+        while pending or running:
+            for name in list(pending):
+                if deps[name] & failed:
+                    pending.remove(name)
+                    failed.add(name)
+                    results.append((by_name[name]['description'], 'blocked', 0.0))
+                    continue
+                if not deps[name] <= done:
+                    continue
+
+                pending.remove(name)
+                stage = by_name[name]
+                outputs_exist = all(os.path.exists(path) for path in stage['outputs'])
+                if state.get(name, {}).get('key') == keys[name] and outputs_exist and not deps[name] & stale:
+                    print(f"skip {stage['description']} (unchanged)")
+                    done.add(name)
+                    results.append((stage['description'], 'skipped', 0.0))
+                    continue
+
+                print(f"start {stage['description']}")
+                running[pool.submit(run_stage, name)] = name
+
+            if not running:
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                stage = by_name[name]
+                success, elapsed = future.result()
+                if success and not deps[name] & stale:
+                    done.add(name)
+                    record(name)
+                    results.append((stage['description'], 'ran', elapsed))
+                elif success:
+                    # ran on outputs of a failed stage, dont remember it so it reruns next time
+                    done.add(name)
+                    stale.add(name)
+                    results.append((stage['description'], 'stale', elapsed))
+                elif all(os.path.exists(path) for path in stage['outputs']):
+                    # e.g. a download failed offline but the last good copy is still on disk
+                    print(f"warning: {stage['description']} failed, continuing with its existing outputs")
+                    done.add(name)
+                    stale.add(name)
+                    results.append((stage['description'], 'stale', elapsed))
+                else:
+                    print(f"broken at {stage['description']}")
+                    failed.add(name)
+                    results.append((stage['description'], 'failed', elapsed))
+
+    if in_process and not checkpoint and frames:
+        # each file once, no matter how many stages updated it
+        print()
+        results.append(('Write outputs', 'ran', write_frames(frames)))
+        state.update(deferred)
+        save_state(state)
+    return results
 
 def main():
     """Run the complete data pipeline"""
-    
+
+    parser = argparse.ArgumentParser(description="Run the data pipeline")
+    parser.add_argument('--force', action='store_true', help='rerun every stage even if nothing changed')
+    parser.add_argument('--jobs', type=int, default=4, help='max stages running at once')
+    parser.add_argument('--in-process', action='store_true',
+                        help='run the stage functions in this interpreter and pass DataFrames in memory')
+    parser.add_argument('--checkpoint', action='store_true',
+                        help='with --in-process, write every stage output to disk as it finishes')
+    args = parser.parse_args()
+
     # change to src directory
     os.chdir(os.path.dirname(os.path.abspath(__file__)))
-    
-    steps = [
-        ("download_census_api.py", "Download Census Data"),
-        ("download_land_area.py", "Download Land Area Data"),
-        ("clean_data.py", "Clean and Merge County Data"),
-        ("process_rvshare_clean.py", "Process RVshare Amenity Data"),
-    ]
-    
-    results = []
-    for script, description in steps:
-        success = run_script(script, description)
-        results.append((description, success))
-        
-        if not success:
-            print(f"broken at {description}")
-            sys.exit(1)
-    
+
+    t0 = time.perf_counter()
+    results = run_pipeline(STAGES, jobs=args.jobs, force=args.force,
+                           in_process=args.in_process, checkpoint=args.checkpoint)
+    total = time.perf_counter() - t0
+
+    print()
+    for description, status, elapsed in results:
+        print(f"  {status:<8} {elapsed:6.1f}s  {description}")
+    print(f"  {'total':<8} {total:6.1f}s")
+
+    if any(status in ('failed', 'blocked') for _, status, _ in results):
+        sys.exit(1)
+
     # completed
     print("done")
 
 if __name__ == "__main__":
     main()
-
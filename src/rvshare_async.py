@@ -0,0 +1,172 @@
+"""
+Async RVshare Collector
+Concurrent version of fetch_rvshare_api.collect_listings built on asyncio + aiohttp
+- bounded number of counties in flight at once
+- token bucket so the whole run stays under a requests-per-second limit
+- retries with exponential backoff on timeouts, 429s and 5xx
+- pages 2-3 of a county are requested together as soon as page 1 says they exist,
+  while other counties keep downloading / parsing
+- reads through the shared http cache, fresh hits skip the rate limiter
+"""
+
+import asyncio
+import json
+import random
+import time
+
+import aiohttp
+
+from fetch_rvshare_api import (SEARCH_URL, MAX_PAGES, USER_AGENT, CACHE_TTL, build_search_params, parse_listing,
+                               warn_if_capped)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Async token bucket, each acquire() takes one token (rate=None means unlimited)"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate or 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.rate:
+            return
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+async def fetch_json(session, limiter, url, params, cache=None, retries=4, backoff=0.5, timeout=10):
+    """
+    GET a json page with rate limiting, retries and the shared http cache
+
+    Returns:
+        parsed json, or None when the server says no (4xx) or retries run out
+    """
+    if cache is not None:
+        # fresh cache hits dont count against the rate limit
+        cached = cache.lookup(url, params, ttl=CACHE_TTL)
+        if cached is not None:
+            return cached.json()
+
+    for attempt in range(retries + 1):
+        await limiter.acquire()
+        headers = cache.conditional_headers(url, params) if cache is not None else None
+        try:
+            async with session.get(url, params=params, headers=headers,
+                                   timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+                if resp.status == 304 and cache is not None:
+                    refreshed = cache.touch(url, params)
+                    if refreshed is not None:
+                        return refreshed.json()
+                if resp.status == 200:
+                    body = await resp.read()
+                    if cache is not None:
+                        cache.store(url, params, resp.status, resp.headers, body)
+                    return json.loads(body)
+                if resp.status not in RETRY_STATUSES:
+                    return None
+                retry_after = resp.headers.get('Retry-After')
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            retry_after = None
+
+        if attempt == retries:
+            return None
+
+        # exponential backoff with jitter, but respect the server if it tells us how long
+        delay = backoff * (2 ** attempt) * (0.5 + random.random())
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        await asyncio.sleep(delay)
+    return None
+
+
+async def fetch_county(session, limiter, base_url, county_name, lat, lng, cache=None):
+    """Fetch up to MAX_PAGES of results for one county, returns (items, ok)"""
+    first = await fetch_json(session, limiter, base_url, build_search_params(county_name, lat, lng, 1), cache)
+    if first is None:
+        return [], False
+
+    items = first.get('data', {}).get('results', [])
+    if not items:
+        return [], True
+
+    # page 1 tells us how many pages exist so ask for the rest at the same time
+    warn_if_capped(county_name, first.get('pagination', {}).get('totalPages', 1))
+    total_pages = min(first.get('pagination', {}).get('totalPages', 1), MAX_PAGES)
+    pages = await asyncio.gather(*[
+        fetch_json(session, limiter, base_url, build_search_params(county_name, lat, lng, page), cache)
+        for page in range(2, total_pages + 1)
+    ])
+
+    for data in pages:
+        if data is None:
+            return items, False  # same as the sync loop, stop paging on error
+        more = data.get('data', {}).get('results', [])
+        if not more:
+            break
+        items.extend(more)
+    return items, True
+
+
+async def _collect(df_geo, save_search, base_url, concurrency, requests_per_second, cache):
+    queue = asyncio.Queue()
+    for row in df_geo.itertuples(index=False):
+        queue.put_nowait((row.GEOID, row.NAME, row.INTPTLAT, row.INTPTLONG))
+
+    limiter = TokenBucket(requests_per_second)
+    stats = {'done': 0, 'failed': 0}
+    total_counties = len(df_geo)
+
+    async def worker(session):
+        while True:
+            try:
+                geoid, county_name, lat, lng = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            items, ok = await fetch_county(session, limiter, base_url, county_name, lat, lng, cache)
+            if not ok:
+                stats['failed'] += 1
+                print(f"  Error fetching {county_name}: gave up after retries")
+
+            # single event loop so saves never interleave, unfinished counties get retried on resume
+            save_search(geoid, [parse_listing(item, county_name) for item in items], ok)
+
+            stats['done'] += 1
+            if stats['done'] % 50 == 0:
+                print(f"Processed {stats['done']}/{total_counties} counties...")
+
+    connector = aiohttp.TCPConnector(limit=concurrency * MAX_PAGES)
+    async with aiohttp.ClientSession(connector=connector, headers={'User-Agent': USER_AGENT}) as session:
+        await asyncio.gather(*[worker(session) for _ in range(max(1, concurrency))])
+    return stats
+
+
+def collect_listings_async(df_geo, save_search, base_url=SEARCH_URL, concurrency=16, requests_per_second=8.0,
+                           cache=None):
+    """
+    Async drop-in for fetch_rvshare_api.collect_listings
+
+    Args:
+        df_geo: DataFrame with GEOID, NAME, INTPTLAT, INTPTLONG columns
+        save_search: called as save_search(geoid, listings, finished) once per county
+        base_url: search endpoint (point at a local stub for benchmarks)
+        concurrency: counties in flight at once
+        requests_per_second: token bucket rate shared by every request (None = unlimited)
+        cache: http_cache.HttpCache to read through (None = always hit the network)
+
+    Returns:
+        dict with counts of finished and failed counties
+    """
+    return asyncio.run(_collect(df_geo, save_search, base_url, concurrency, requests_per_second, cache))
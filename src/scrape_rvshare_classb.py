@@ -12,6 +12,9 @@ from scrapy.crawler import CrawlerProcess
 import json
 import re
 from datetime import datetime
+from amenity_matcher import scraper_matcher
+
+AMENITY_MATCHER = scraper_matcher()
 
 class ClassBRVItem(scrapy.Item):
     """Define the data structure for Class B RV listings"""
@@ -43,6 +46,8 @@ class ClassBRVItem(scrapy.Item):
     has_bluetooth = scrapy.Field()
     has_ac = scrapy.Field()
     has_heating = scrapy.Field()
+    has_cd_player = scrapy.Field()
+    has_slide_out = scrapy.Field()
     has_generator = scrapy.Field()
     has_solar = scrapy.Field()
     has_awning = scrapy.Field()
@@ -180,33 +185,10 @@ class RVShareClassBSpider(scrapy.Spider):
         # create binary amenity flags
         all_amenities = ' '.join(bathroom_amenities + kitchen_amenities + entertainment_amenities + climate_amenities + other_amenities).lower()
         
-        # bathroom
-        item['has_shower'] = 1 if 'shower' in all_amenities else 0
-        item['has_toilet'] = 1 if 'toilet' in all_amenities else 0
-        item['has_bathroom_sink'] = 1 if 'bathroom sink' in all_amenities else 0
-        
-        # kitchen
-        item['has_refrigerator'] = 1 if 'refrigerator' in all_amenities or 'fridge' in all_amenities else 0
-        item['has_microwave'] = 1 if 'microwave' in all_amenities else 0
-        item['has_kitchen_sink'] = 1 if 'kitchen sink' in all_amenities or 'sink' in all_amenities else 0
-        item['has_stove'] = 1 if 'stove' in all_amenities or 'range' in all_amenities else 0
-        item['has_oven'] = 1 if 'oven' in all_amenities else 0
-        
-        # entertainment
-        item['has_tv'] = 1 if 'tv' in all_amenities or 'television' in all_amenities else 0
-        item['has_dvd_player'] = 1 if 'dvd' in all_amenities else 0
-        item['has_radio'] = 1 if 'radio' in all_amenities or 'am/fm' in all_amenities else 0
-        item['has_bluetooth'] = 1 if 'bluetooth' in all_amenities else 0
-        
-        # climate
-        item['has_ac'] = 1 if 'air conditioning' in all_amenities or 'a/c' in all_amenities or 'ac' in all_amenities else 0
-        item['has_heating'] = 1 if 'heat' in all_amenities or 'furnace' in all_amenities else 0
-        
-        # other
-        item['has_generator'] = 1 if 'generator' in all_amenities else 0
-        item['has_solar'] = 1 if 'solar' in all_amenities else 0
-        item['has_awning'] = 1 if 'awning' in all_amenities else 0
-        item['has_backup_camera'] = 1 if 'backup camera' in all_amenities or 'rear camera' in all_amenities else 0
+        # every flag from one scan (shared with process_rvshare_clean, whole word matches
+        # so 'ac' doesnt fire on 'back' and 'sink' alone isnt a kitchen sink)
+        for feature, flag in AMENITY_MATCHER.flags(all_amenities).items():
+            item[feature] = flag
         
         yield item
     